@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Check that the command line Logic Simulator starts within its budget.
+
+This script imports logsim in a fresh interpreter with -X importtime, and
+checks that the import takes no longer than the startup budget and does not
+load any of the graphical user interface dependencies.
+
+Usage
+-----
+Check the default budget: bench_startup.py
+Check another budget: bench_startup.py <budget in milliseconds>
+"""
+import os
+import subprocess
+import sys
+
+STARTUP_BUDGET_MS = 100  # cumulative time to import logsim
+GUI_MODULES = ["wx", "OpenGL", "numpy"]
+
+
+def parse_import_times(report):
+    """Return {module: cumulative microseconds} from an -X importtime report.
+
+    Top level modules are reported under their own name and submodules under
+    their dotted name, with any indentation removed.
+    """
+    import_times = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the header line
+        import_times[fields[2].strip()] = int(fields[1])
+    return import_times
+
+
+def measure_startup():
+    """Import logsim in a fresh interpreter and return its import times."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             "import logsim"], cwd=directory,
+                            capture_output=True, text=True, check=True)
+    return parse_import_times(result.stderr)
+
+
+def main(arg_list):
+    """Measure the startup time and return 0 if it is within budget."""
+    budget_ms = float(arg_list[0]) if arg_list else STARTUP_BUDGET_MS
+    import_times = measure_startup()
+    startup_ms = import_times["logsim"] / 1000
+    gui_modules = [module for module in GUI_MODULES
+                   if module in import_times]
+
+    print("logsim import: {:.1f} ms (budget {:.1f} ms)".format(startup_ms,
+                                                               budget_ms))
+    slowest = sorted(import_times.items(), key=lambda item: item[1],
+                     reverse=True)
+    for module, microseconds in slowest[:5]:
+        print("  {:<20} {:8.1f} ms".format(module, microseconds / 1000))
+
+    if gui_modules:
+        print("Error: imported " + ", ".join(gui_modules))
+        return 1
+    if startup_ms > budget_ms:
+        print("Error: startup budget exceeded")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
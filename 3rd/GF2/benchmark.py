@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Measure how the Logic Simulator scales with the size of the circuit.
+
+This script generates each workload of netgen at each size, then times the
+scanner, the parser, the execution of the network and the recording of the
+monitors, and measures the memory held by the parsed circuit. The results
+are written as JSON, so that runs on different commits can be compared.
+
+Usage
+-----
+Default benchmark: benchmark.py
+Options: benchmark.py [-w <workload,...>] [-s <size,...>] [-c <cycles>]
+                      [-o <output path>]
+
+Functions
+---------
+make_circuit(path): Returns the names, devices, network and monitors parsed
+                    from a definition file.
+
+time_scanner(path): Returns the time taken to scan a definition file.
+
+measure_workload(workload, size, cycles, directory): Returns the results of
+                                                     one workload and size.
+
+run_benchmark(workloads, sizes, cycles): Returns the results of all the
+                                         workloads and sizes.
+"""
+import contextlib
+import getopt
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import netgen
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+DEFAULT_SIZES = [100, 1000, 10000]
+DEFAULT_CYCLES = 20
+
+
+def make_circuit(path):
+    """Return (names, devices, network, monitors) parsed from path.
+
+    Return None if the definition file has errors. The parser's messages
+    are discarded.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsed = parser.parse_network()
+    scanner.f.close()
+    if not parsed:
+        return None
+    return names, devices, network, monitors
+
+
+def time_scanner(path):
+    """Return the time in seconds taken to scan every symbol in path."""
+    names = Names()
+    scanner = Scanner(path, names)
+    start = time.perf_counter()
+    scanner.advance()
+    while scanner.get_symbol().type != scanner.EOF:
+        pass
+    seconds = time.perf_counter() - start
+    scanner.f.close()
+    return seconds
+
+
+def measure_workload(workload, size, cycles, directory):
+    """Return a dictionary of the results of one workload and size."""
+    path = os.path.join(directory, "{}_{}.txt".format(workload, size))
+    with open(path, "w") as definition_file:
+        definition_file.write(netgen.generate(workload, size, seed=0))
+
+    scan_seconds = time_scanner(path)
+    start = time.perf_counter()
+    circuit = make_circuit(path)
+    parse_seconds = time.perf_counter() - start
+    names, devices, network, monitors = circuit
+
+    execute_seconds = 0.0
+    record_seconds = 0.0
+    for _ in range(cycles):
+        start = time.perf_counter()
+        network.execute_network()
+        middle = time.perf_counter()
+        monitors.record_signals()
+        execute_seconds += middle - start
+        record_seconds += time.perf_counter() - middle
+
+    # Parse again with tracemalloc on, as it slows everything down
+    del circuit, names, devices, network, monitors
+    tracemalloc.start()
+    circuit = make_circuit(path)
+    memory_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    os.remove(path)
+
+    return {"workload": workload, "size": size,
+            "devices": len(circuit[1].devices_list),
+            "scan_s": scan_seconds, "parse_s": parse_seconds,
+            "execute_us_per_cycle": execute_seconds * 1e6 / cycles,
+            "record_us_per_cycle": record_seconds * 1e6 / cycles,
+            "memory_bytes": memory_bytes}
+
+
+def get_commit():
+    """Return the current git commit, or None if it is not known."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmark(workloads, sizes, cycles=DEFAULT_CYCLES):
+    """Return a dictionary of the results of every workload and size."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for workload in workloads:
+            for size in sizes:
+                results.append(measure_workload(workload, size, cycles,
+                                                directory))
+    return {"commit": get_commit(), "python": platform.python_version(),
+            "cycles": cycles, "results": results}
+
+
+def main(arg_list):
+    """Run the benchmark given by the command line arguments."""
+    usage_message = ("Usage: benchmark.py [-w <workload,...>] "
+                     "[-s <size,...>] [-c <cycles>] [-o <output path>]\n"
+                     "Workloads: " + ", ".join(netgen.DEVICES_PER_UNIT))
+    try:
+        options, arguments = getopt.getopt(arg_list, "w:s:c:o:")
+        option_values = dict(options)
+        workloads = option_values.get(
+            "-w", ",".join(netgen.DEVICES_PER_UNIT)).split(",")
+        sizes = [int(size) for size in option_values.get(
+            "-s", ",".join(str(size) for size in DEFAULT_SIZES)).split(",")]
+        cycles = int(option_values.get("-c", DEFAULT_CYCLES))
+    except (getopt.GetoptError, ValueError):
+        print(usage_message)
+        return 1
+    if arguments or not all(workload in netgen.DEVICES_PER_UNIT
+                            for workload in workloads):
+        print(usage_message)
+        return 1
+
+    benchmark = run_benchmark(workloads, sizes, cycles)
+    for result in benchmark["results"]:
+        print("{workload:<8} {devices:>8} devices  scan {scan_s:8.3f} s  "
+              "parse {parse_s:8.3f} s  execute {execute_us_per_cycle:12.1f} "
+              "us/cycle  record {record_us_per_cycle:8.1f} us/cycle  "
+              "memory {memory_bytes:>12} B".format(**result))
+    output_path = option_values.get("-o")
+    if output_path is not None:
+        with open(output_path, "w") as output_file:
+            json.dump(benchmark, output_file, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
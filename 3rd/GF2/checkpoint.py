@@ -0,0 +1,211 @@
+"""Save checkpoints of a simulation to disk and resume from them.
+
+Used in the Logic Simulator project so that long runs can be resumed after
+the process stops. Each checkpoint appends the cycles recorded since the
+previous checkpoint to a new trace segment file, with a small file listing
+what the segment holds, so the cost of a checkpoint grows with the new
+cycles only. It then replaces the state file, which holds the device states
+and the range of segments in use.
+
+Classes
+-------
+Checkpointer - saves checkpoints to a directory and resumes from them.
+"""
+import json
+import os
+
+
+class Checkpointer:
+
+    """Save checkpoints of a simulation to a directory and resume from them.
+
+    The directory holds a state file, state.json, and numbered trace segment
+    files, segment_<n>.bin, each listed by segment_<n>.json. A segment holds,
+    for each monitor, the cycles recorded since the previous checkpoint. Once
+    the traces are reset, the next segment holds the whole of every trace and
+    starts a fresh range of segments, and the segments before it are
+    deleted. The same happens on the first save to a directory which already
+    holds a checkpoint that was not resumed, with the fresh range numbered
+    after the old one. The state file is replaced in one step after its
+    segment is written, so a checkpoint is either complete or ignored.
+
+    Parameters
+    ----------
+    directory: directory to keep the checkpoints in.
+    devices: instance of the devices.Devices() class.
+    monitors: instance of the monitors.Monitors() class.
+    interval: number of cycles between checkpoints during a run.
+
+    Public methods
+    --------------
+    get_path(self, file_name): Returns the path of a file in the checkpoint
+                               directory.
+
+    get_circuit(self): Returns the name and kind of each device and
+                       subcircuit instance.
+
+    read_state(self): Returns the contents of the state file, or None if
+                      there is none.
+
+    save(self, cycles_completed): Saves a checkpoint of the simulation.
+
+    write_json(self, file_name, data): Writes data to a file in the
+                                       checkpoint directory as JSON.
+
+    resume(self): Returns the simulation to the latest checkpoint and returns
+                  the number of cycles completed, or None if there is none.
+    """
+
+    def __init__(self, directory, devices, monitors, interval=10000):
+        """Initialise the checkpoint directory and the saved trace lengths."""
+        self.directory = directory
+        self.devices = devices
+        self.monitors = monitors
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+
+        # Segments first_segment to next_segment - 1 rebuild the traces, and
+        # saved_traces stores {(device_id, output_id): (signal_list, length)}
+        # for each monitor. A checkpoint already in the directory keeps its
+        # segments until the first save replaces it.
+        state = self.read_state()
+        if state is None:
+            self.first_segment = 0
+            self.next_segment = 0
+        else:
+            self.first_segment = state["first_segment"]
+            self.next_segment = state["next_segment"]
+        self.saved_traces = {}
+
+    def get_path(self, file_name):
+        """Return the path of a file in the checkpoint directory."""
+        return os.path.join(self.directory, file_name)
+
+    def get_circuit(self):
+        """Return [device name, device kind] for each device, in order.
+
+        The subcircuit instances follow, with the name of their subcircuit
+        as their kind.
+        """
+        names = self.devices.names
+        return [[names.get_name_string(device.device_id),
+                 names.get_name_string(device.device_kind)]
+                for device in self.devices.devices_list] + [
+                    [names.get_name_string(instance.instance_id),
+                     names.get_name_string(instance.subcircuit.subcircuit_id)]
+                    for instance in self.devices.instances]
+
+    def read_state(self):
+        """Return the contents of the state file, or None if there is none."""
+        try:
+            with open(self.get_path("state.json")) as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return None
+
+    def save(self, cycles_completed):
+        """Save a checkpoint of the simulation."""
+        self.monitors.flush_signals()
+        monitors_dictionary = self.monitors.monitors_dictionary
+
+        # A trace which was reset, rather than extended, starts a fresh range
+        # of segments holding the whole of every trace, as does the first
+        # save of traces which were not resumed from the checkpoint
+        reset = not self.saved_traces or any(
+            saved_list is not monitors_dictionary.get(monitor, saved_list) or
+            length > len(saved_list)
+            for monitor, (saved_list, length) in self.saved_traces.items())
+        if reset:
+            self.saved_traces = {}
+        obsolete = range(self.first_segment,
+                         self.next_segment if reset else self.first_segment)
+
+        segment_number = self.next_segment
+        entries = []
+        offset = 0
+        with open(self.get_path("segment_{}.bin".format(segment_number)),
+                  "wb") as segment_file:
+            for monitor, signal_list in monitors_dictionary.items():
+                saved_list, start = self.saved_traces.get(monitor,
+                                                          (None, 0))
+                if saved_list is not signal_list:
+                    start = 0  # a new monitor, so save all of it
+                new_cycles = bytes(signal_list[start:])
+                segment_file.write(new_cycles)
+                entries.append([self.devices.get_signal_name(*monitor), start,
+                                offset, len(new_cycles)])
+                offset += len(new_cycles)
+                self.saved_traces[monitor] = (signal_list, len(signal_list))
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+        self.write_json("segment_{}.json".format(segment_number), entries)
+
+        if reset:
+            self.first_segment = segment_number
+        self.next_segment = segment_number + 1
+        self.write_json("state.json", {
+            "cycles_completed": cycles_completed,
+            "circuit": self.get_circuit(),
+            "devices": self.devices.snapshot(),
+            "monitors": [entry[0] for entry in entries],
+            "first_segment": self.first_segment,
+            "next_segment": self.next_segment})
+
+        # Only delete the old segments once the state no longer uses them
+        for number in obsolete:
+            for extension in ["bin", "json"]:
+                os.remove(self.get_path("segment_{}.{}".format(number,
+                                                              extension)))
+
+    def write_json(self, file_name, data):
+        """Write data to the file as JSON, replacing the file in one step."""
+        temporary_path = self.get_path(file_name + ".tmp")
+        with open(temporary_path, "w") as json_file:
+            json.dump(data, json_file)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(temporary_path, self.get_path(file_name))
+
+    def resume(self):
+        """Return the simulation to the latest checkpoint.
+
+        The monitors are set to those of the checkpoint and their traces are
+        rebuilt from the segments. Return the number of cycles completed, or
+        None if there is no checkpoint. Raise ValueError if the checkpoint
+        was saved from a circuit with different devices.
+        """
+        state = self.read_state()
+        if state is None:
+            return None
+        if state["circuit"] != self.get_circuit():
+            raise ValueError("checkpoint was saved from a different circuit")
+
+        # Rebuild each trace from the segments it appears in
+        traces = {signal_name: bytearray()
+                  for signal_name in state["monitors"]}
+        for segment_number in range(state["first_segment"],
+                                    state["next_segment"]):
+            with open(self.get_path("segment_{}.json".format(
+                    segment_number))) as entries_file:
+                entries = json.load(entries_file)
+            with open(self.get_path("segment_{}.bin".format(
+                    segment_number)), "rb") as segment_file:
+                segment = segment_file.read()
+            for signal_name, start, offset, length in entries:
+                if signal_name in traces:
+                    del traces[signal_name][start:]
+                    traces[signal_name] += segment[offset:offset + length]
+
+        self.devices.restore(state["devices"])
+        for monitor in list(self.monitors.monitors_dictionary):
+            self.monitors.remove_monitor(*monitor)
+        self.saved_traces = {}
+        for signal_name, trace in traces.items():
+            monitor = tuple(self.devices.get_signal_ids(signal_name))
+            self.monitors.make_monitor(*monitor)
+            signal_list = self.monitors.monitors_dictionary[monitor]
+            signal_list.extend(trace)
+            self.saved_traces[monitor] = (signal_list, len(signal_list))
+        self.first_segment = state["first_segment"]
+        self.next_segment = state["next_segment"]
+        return state["cycles_completed"]
@@ -52,7 +52,9 @@ class Devices:
     """Make and store devices.
 
     This class contains many functions for making devices and ports.
-    It stores all the devices in a list.
+    It stores all the devices in a list, and the instances of subcircuits in
+    another. The devices of an instance are not stored, but are found by
+    name and given as views of the instance's state.
 
     Parameters
     ----------
@@ -63,6 +65,8 @@ class Devices:
     get_device(self, device_id): Returns the Device object corresponding
                                  to the device ID.
 
+    add_instance(self, instance): Adds a subcircuit instance to the network.
+
     find_devices(self, device_kind=None): Returns a list of device_ids of
                                           the specified device_kind.
 
@@ -99,10 +103,29 @@ class Devices:
 
     make_d_type(self, device_id): Makes a D-type device.
 
-    cold_startup(self): Simulates cold start-up of D-types and clocks.
+    cold_startup(self, seed=None): Simulates cold start-up of D-types and
+                                   clocks.
+
+    build_device(self, device_id, device_kind, device_property=None,
+                 device_property_2=None): Returns a new device of the
+                                 specified kind without adding it.
+
+    add_devices(self, new_devices): Adds a list of devices to the network.
+
+    check_device(self, device_kind, device_property=None,
+                 device_property_2=None): Returns the error in the kind and
+                                 properties of a device, if any.
 
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
+
+    make_devices(self, device_specs): Creates many devices in one pass and
+                                      returns the error for each one.
+
+    snapshot(self): Returns the state of all the devices as a compact list.
+
+    restore(self, state): Returns all the devices to a state returned by
+                          snapshot().
     """
 
     def __init__(self, names):
@@ -112,6 +135,20 @@ class Devices:
 
         self.devices_list = []
 
+        # device_map stores {device_id: Device} for fast lookups
+        self.device_map = {}
+
+        # instances stores the subcircuit.Instance objects in the order they
+        # were made, and instance_map stores {instance_id: Instance}
+        self.instances = []
+        self.instance_map = {}
+
+        # Counts the devices, ports and connections added, so a netlist made
+        # from the devices can tell when it is out of date. Changes made to
+        # a Device directly, rather than through Devices or Network, are not
+        # counted.
+        self.structure_changes = 0
+
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "SIGGEN"]
         dtype_inputs = ["CLK", "SET", "CLEAR", "DATA"]
@@ -135,12 +172,39 @@ class Devices:
 
         self.max_gate_inputs = 16
 
+        # Gate inputs are named I1 to I16, so their IDs are made once here.
+        # gate_input_ids[n] is the tuple of input IDs of an n-input gate.
+        input_ids = tuple(self.names.lookup(
+            ["I" + str(input_number)
+             for input_number in range(1, self.max_gate_inputs + 1)]))
+        self.gate_input_ids = tuple(input_ids[:no_of_inputs] for no_of_inputs
+                                    in range(self.max_gate_inputs + 1))
+
     def get_device(self, device_id):
-        """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        """Return the Device object corresponding to device_id.
+
+        A device of a subcircuit instance, named after the instance as in
+        H1_X1, is given as a view of the instance's state, made on each
+        call. Return None if there is no such device.
+        """
+        device = self.device_map.get(device_id)
+        if device is None and self.instance_map and device_id is not None:
+            device_name = self.names.get_name_string(device_id)
+            if device_name is not None:
+                for instance_id, local_name in \
+                        self.names.split_name(device_name):
+                    instance = self.instance_map.get(instance_id)
+                    if instance is not None:
+                        device = instance.get_device(device_id, local_name)
+                        if device is not None:
+                            break
+        return device
+
+    def add_instance(self, instance):
+        """Add the subcircuit.Instance object to the network."""
+        self.instances.append(instance)
+        self.instance_map[instance.instance_id] = instance
+        self.structure_changes += 1
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -161,6 +225,8 @@ class Devices:
         new_device = Device(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.device_map[device_id] = new_device
+        self.structure_changes += 1
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -170,6 +236,7 @@ class Devices:
         device = self.get_device(device_id)
         if device is not None:
             device.inputs.setdefault(input_id)
+            self.structure_changes += 1
             return True
         else:
             return False
@@ -182,6 +249,7 @@ class Devices:
         device = self.get_device(device_id)
         if device is not None:
             device.outputs[output_id] = signal
+            self.structure_changes += 1
             return True
         else:
             return False
@@ -235,91 +303,145 @@ class Devices:
 
     def make_switch(self, device_id, initial_state):
         """Make a switch device and set its initial state."""
-        self.add_device(device_id, self.SWITCH)
-        self.add_output(device_id, output_id=None)
-        self.set_switch(device_id, initial_state)
+        self.add_devices([self.build_device(device_id, self.SWITCH,
+                                            initial_state)])
 
     def make_clock(self, device_id, clock_half_period):
         """Make a clock device with the specified half period.
 
         clock_half_period is an integer > 0. It is the number of simulation
-        cycles before the clock switches state.
+        cycles before the clock switches state. The clock starts LOW at the
+        beginning of its cycle until cold_startup() is called.
         """
-        self.add_device(device_id, self.CLOCK)
-        device = self.get_device(device_id)
-        device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        self.add_devices([self.build_device(device_id, self.CLOCK,
+                                            clock_half_period)])
 
     def make_siggen(self, device_id, siggen_high_period, siggen_low_period):
         """Make signal generator with specified period of high
         annd low period"""
-        self.add_device(device_id, self.SIGGEN)
-        device = self.get_device(device_id)
-        device.siggen_high_period = siggen_high_period
-        device.siggen_low_period = siggen_low_period
-        self.cold_startup()
+        self.add_devices([self.build_device(device_id, self.SIGGEN,
+                                            siggen_high_period,
+                                            siggen_low_period)])
 
     def make_gate(self, device_id, device_kind, no_of_inputs):
         """Make logic gates with the specified number of inputs."""
-        self.add_device(device_id, device_kind)
-        self.add_output(device_id, output_id=None)
-
-        for input_number in range(1, no_of_inputs + 1):
-            input_name = "".join(["I", str(input_number)])
-            [input_id] = self.names.lookup([input_name])
-            self.add_input(device_id, input_id)
+        self.add_devices([self.build_device(device_id, device_kind,
+                                            no_of_inputs)])
 
     def make_d_type(self, device_id):
         """Make a D-type device."""
-        self.add_device(device_id, self.D_TYPE)
-        for input_id in self.dtype_input_ids:
-            self.add_input(device_id, input_id)
-        for output_id in self.dtype_output_ids:
-            self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
-
-    def cold_startup(self):
+        self.add_devices([self.build_device(device_id, self.D_TYPE)])
+
+    def build_device(self, device_id, device_kind, device_property=None,
+                     device_property_2=None):
+        """Return a new Device of the specified kind, in its initial state.
+
+        The properties are as in make_device(), and must be valid. The
+        device is not added to the network.
+        """
+        device = Device(device_id)
+        device.device_kind = device_kind
+        if device_kind == self.SWITCH:
+            device.outputs[None] = self.LOW
+            device.switch_state = device_property
+        elif device_kind == self.CLOCK:
+            device.clock_half_period = device_property
+            device.outputs[None] = self.LOW
+            device.clock_counter = 0
+        elif device_kind == self.SIGGEN:
+            device.siggen_high_period = device_property
+            device.siggen_low_period = device_property_2
+            device.outputs[None] = self.HIGH
+            device.siggen_high_counter = 0
+            device.siggen_low_counter = 1
+        elif device_kind == self.D_TYPE:
+            device.inputs = dict.fromkeys(self.dtype_input_ids)
+            device.outputs = dict.fromkeys(self.dtype_output_ids, self.LOW)
+            # D-types start LOW until cold_startup() is called
+            device.dtype_memory = self.LOW
+        else:  # a gate, where XOR gates always have two inputs
+            if device_kind == self.XOR:
+                device_property = 2
+            device.outputs[None] = self.LOW
+            device.inputs = dict.fromkeys(self.gate_input_ids[device_property])
+        return device
+
+    def add_devices(self, new_devices):
+        """Add the Device objects in the list new_devices to the network."""
+        self.devices_list.extend(new_devices)
+        self.device_map.update((device.device_id, device)
+                               for device in new_devices)
+        self.structure_changes += 1
+
+    def cold_startup(self, seed=None):
         """Simulate cold start-up of D-types and clocks.
 
         Set the memory of the D-types to a random state and make the clocks
-        begin from a random point in their cycles.
+        begin from a random point in their cycles. The random states are
+        drawn together, and the same seed always gives the same states.
+        Devices are made in a fixed state, so this only needs to be called
+        once the whole network has been made. The D-types and clocks of
+        subcircuit instances are drawn after those of the devices, in the
+        order of netlist.Netlist.make_state(seed).
         """
+        generator = random.Random(seed)
+        dtype_devices = []
+        clock_devices = []
         for device in self.devices_list:
             if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
+                dtype_devices.append(device)
             elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = \
-                    random.randrange(device.clock_half_period)
-
+                clock_devices.append(device)
             elif device.device_kind == self.SIGGEN:
-                initial_signal = self.HIGH
-                self.add_output(device.device_id, output_id=None,
-                                signal=initial_signal)
+                device.outputs[None] = self.HIGH
                 device.siggen_high_counter = 0
                 device.siggen_low_counter = 1
 
-    def make_device(self, device_id, device_kind, device_property=None,
-                    device_property_2=None):
-        """Create the specified device.
-
-        Return self.NO_ERROR if successful. Return corresponding error if not.
+        instance_clocks = [
+            (instance.state, clock) for instance in self.instances
+            for clock in instance.subcircuit.netlist.find_clocks()]
+        dtype_count = len(dtype_devices) + sum(
+            len(instance.state.dtype_memory) for instance in self.instances)
+
+        # One draw for the D-type memories and clock signals together
+        levels = generator.choices([self.LOW, self.HIGH],
+                                   k=dtype_count + len(clock_devices) +
+                                   len(instance_clocks))
+        for device, level in zip(dtype_devices, levels):
+            device.dtype_memory = level
+        position = len(dtype_devices)
+        for instance in self.instances:
+            dtype_memory = instance.state.dtype_memory
+            dtype_memory[:] = levels[position:position + len(dtype_memory)]
+            position += len(dtype_memory)
+        for device, level in zip(clock_devices, levels[dtype_count:]):
+            device.outputs[None] = level
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = generator.randrange(
+                device.clock_half_period)
+        for (state, (slot, number, half_period)), level in zip(
+                instance_clocks, levels[dtype_count + len(clock_devices):]):
+            state.signals[slot] = level
+            state.clock_counters[number] = generator.randrange(half_period)
+        for instance in self.instances:
+            for slot, number in instance.subcircuit.netlist.find_siggens():
+                instance.state.signals[slot] = self.HIGH
+                instance.state.siggen_counters[number] = [0, 1]
+
+    def check_device(self, device_kind, device_property=None,
+                     device_property_2=None):
+        """Check the kind and properties of a device to be made.
+
+        Return self.NO_ERROR if they are valid. Return corresponding error if
+        not. Whether the device is already present is not checked.
         """
-        # Device has already been added to the devices_list
-        if self.get_device(device_id) is not None:
-            error_type = self.DEVICE_PRESENT
-        elif device_kind == self.SWITCH:
+        if device_kind == self.SWITCH:
             # Device property is the switch initial state: 0(LOW) or 1(HIGH)
             if device_property is None:
                 error_type = self.NO_QUALIFIER
             elif device_property not in [self.LOW, self.HIGH]:
                 error_type = self.INVALID_QUALIFIER
             else:
-                self.make_switch(device_id, device_property)
                 error_type = self.NO_ERROR
 
         elif device_kind == self.CLOCK:
@@ -329,7 +451,6 @@ class Devices:
             elif device_property <= 0:
                 error_type = self.INVALID_QUALIFIER
             else:
-                self.make_clock(device_id, device_property)
                 error_type = self.NO_ERROR
 
         elif device_kind == self.SIGGEN:
@@ -344,8 +465,6 @@ class Devices:
             elif device_property_2 <= 0:
                 error_type = self.INVALID_QUALIFIER
             else:
-                self.make_siggen(device_id, device_property,
-                                 device_property_2)
                 error_type = self.NO_ERROR
 
         elif device_kind in self.gate_types:
@@ -354,7 +473,6 @@ class Devices:
                 if device_property is not None:
                     error_type = self.QUALIFIER_PRESENT
                 else:
-                    self.make_gate(device_id, device_kind, 2)
                     error_type = self.NO_ERROR
             else:  # other gates
                 if device_property is None:
@@ -362,17 +480,101 @@ class Devices:
                 elif device_property not in range(1, 17):  # between 1 and 16
                     error_type = self.INVALID_QUALIFIER
                 else:
-                    self.make_gate(device_id, device_kind, device_property)
                     error_type = self.NO_ERROR
 
         elif device_kind == self.D_TYPE:
             if device_property is not None:
                 error_type = self.QUALIFIER_PRESENT
             else:
-                self.make_d_type(device_id)
                 error_type = self.NO_ERROR
 
         else:
             error_type = self.BAD_DEVICE
 
         return error_type
+
+    def make_device(self, device_id, device_kind, device_property=None,
+                    device_property_2=None):
+        """Create the specified device.
+
+        Return self.NO_ERROR if successful. Return corresponding error if not.
+        """
+        # Device has already been added to the devices_list
+        if self.get_device(device_id) is not None:
+            return self.DEVICE_PRESENT
+        error_type = self.check_device(device_kind, device_property,
+                                       device_property_2)
+        if error_type == self.NO_ERROR:
+            self.add_devices([self.build_device(
+                device_id, device_kind, device_property, device_property_2)])
+        return error_type
+
+    def make_devices(self, device_specs):
+        """Create many devices in one pass.
+
+        device_specs is an iterable of (device_id, device_kind) tuples,
+        optionally followed by the device properties as in make_device().
+        Every spec is checked as make_device() would check it, against the
+        network and the devices made earlier in the same call. The devices
+        which pass are built directly and added to the network together.
+        Return a list of the errors, one for each device, with self.NO_ERROR
+        for each device that was made.
+        """
+        device_map = self.device_map
+        check_device = self.check_device
+        build_device = self.build_device
+        new_ids = set()
+        new_devices = []
+        errors = []
+        for device_spec in device_specs:
+            device_id = device_spec[0]
+            if device_id in device_map or device_id in new_ids:
+                error_type = self.DEVICE_PRESENT
+            else:
+                error_type = check_device(*device_spec[1:])
+                if error_type == self.NO_ERROR:
+                    new_ids.add(device_id)
+                    new_devices.append(build_device(*device_spec))
+            errors.append(error_type)
+        self.add_devices(new_devices)
+        return errors
+
+    def snapshot(self):
+        """Return the state of all the devices as a compact list.
+
+        The list holds the output signals, D-type memory, clock and signal
+        generator counters and switch state of each device, in the order of
+        devices_list, followed by the state of each subcircuit instance.
+        """
+        state = []
+        for device in self.devices_list:
+            state.extend(device.outputs.values())
+            state.extend([device.dtype_memory, device.clock_counter,
+                          device.siggen_high_counter,
+                          device.siggen_low_counter, device.switch_state])
+        for instance in self.instances:
+            for values in instance.get_state_lists():
+                state.extend(values)
+        return state
+
+    def restore(self, state):
+        """Return all the devices to a state returned by snapshot().
+
+        The devices and their outputs must be the same as when the snapshot
+        was taken. The outputs dictionaries are updated in place, so anything
+        holding on to them sees the restored signals.
+        """
+        position = 0
+        for device in self.devices_list:
+            outputs = device.outputs
+            for output_id in outputs:
+                outputs[output_id] = state[position]
+                position += 1
+            [device.dtype_memory, device.clock_counter,
+             device.siggen_high_counter, device.siggen_low_counter,
+             device.switch_state] = state[position:position + 5]
+            position += 5
+        for instance in self.instances:
+            for values in instance.get_state_lists():
+                values[:] = state[position:position + len(values)]
+                position += len(values)
@@ -8,10 +8,14 @@ Classes:
 MyGLCanvas - handles all canvas drawing operations.
 Gui - configures the main window and all the widgets.
 """
+import collections
 import wx
 import wx.glcanvas as wxcanvas
 from OpenGL import GL, GLUT
 
+import waveform
+from vertex_buffer import VertexBuffer
+
 
 class MyGLCanvas(wxcanvas.GLCanvas):
     """Handle all drawing operations.
@@ -39,6 +43,30 @@ class MyGLCanvas(wxcanvas.GLCanvas):
 
     render_text(self, text, x_pos, y_pos): Handles text drawing
                                            operations.
+
+    get_label_list(self, text, font): Returns the display list that draws the
+                                      given text, from a bounded cache.
+
+    clear_labels(self): Deletes the cached label display lists.
+
+    clear_traces(self): Deletes the cached trace buffers and geometry.
+
+    render_label(self, text, x_pos, y_pos): Draws a cached label.
+
+    get_summary_level(self, x_step_size): Returns the trace summary level that
+                                          matches the current zoom.
+
+    update_trace_buffers(self, row, x_start, y_origin, x_step_size,
+                         y_step_size): Appends the new cycles of the trace in
+                                       the given row to its vertex buffers.
+
+    get_trace_geometry(self, row, level, x_start, y_origin, x_step_size,
+                       y_step_size): Returns the cached summary vertex array
+                                     of the trace in the given row.
+
+    draw_trace(self, row, x_start, y_origin, x_step_size, y_step_size,
+               first_cycle, stop_cycle): Draws the visible part of the trace
+                                         in the given row.
     """
 
     def __init__(self, parent, devices, monitors):
@@ -71,6 +99,18 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         self.toggle = 0
         self.text_array = []
         self.signal_array = []
+        self.monitor_keys = []
+
+        # trace_buffers stores {row: [signal_list, length, vertices, colours]}
+        # and trace_geometry stores {row: (signal_list, length, level,
+        # geometry)} for traces drawn from their summaries
+        self.trace_buffers = {}
+        self.trace_geometry = {}
+
+        # label_lists stores {(text, font): display list} for the most
+        # recently drawn labels, least recently drawn first
+        self.label_lists = collections.OrderedDict()
+        self.label_cache_size = 256
 
     def init_gl(self):
         """Configure and initialise the OpenGL context."""
@@ -196,15 +236,177 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             else:
                 GLUT.glutBitmapCharacter(font, ord(character))
 
-    def draw_signals(self, text_array=[], signal_array=[]):
+    def get_label_list(self, text, font):
+        """Return the display list that draws the given text.
+
+        The list is compiled the first time the text is drawn. It moves the
+        raster position itself, so the caller only sets where the text starts.
+        Only the label_cache_size most recently drawn labels are kept, so
+        cycle numbers seen while scrolling do not pile up.
+        """
+        key = (text, font)
+        if key in self.label_lists:
+            self.label_lists.move_to_end(key)
+        else:
+            if len(self.label_lists) >= self.label_cache_size:
+                [old_key, old_list] = self.label_lists.popitem(last=False)
+                GL.glDeleteLists(old_list, 1)
+            label_list = GL.glGenLists(1)
+            GL.glNewList(label_list, GL.GL_COMPILE)
+            for line_number, line in enumerate(text.split('\n')):
+                if line_number:
+                    # Move back to the start of the line, 20 pixels down
+                    GL.glBitmap(0, 0, 0, 0, -line_width, -20, None)
+                line_width = 0
+                for character in line:
+                    GLUT.glutBitmapCharacter(font, ord(character))
+                    line_width += GLUT.glutBitmapWidth(font, ord(character))
+            GL.glEndList()
+            self.label_lists[key] = label_list
+        return self.label_lists[key]
+
+    def clear_labels(self):
+        """Delete the cached label display lists."""
+        for label_list in self.label_lists.values():
+            GL.glDeleteLists(label_list, 1)
+        self.label_lists = collections.OrderedDict()
+
+    def clear_traces(self):
+        """Delete the cached trace buffers and geometry of every row."""
+        for signal_list, length, vertices, colours in \
+                self.trace_buffers.values():
+            vertices.delete()
+            colours.delete()
+        self.trace_buffers = {}
+        self.trace_geometry = {}
+
+    def render_label(self, text, x_pos, y_pos):
+        """Draw a label from its cached display list."""
+        GL.glColor3f(1.0, 1.0, 1.0)  # text is white
+        GL.glRasterPos2f(x_pos, y_pos)
+        GL.glCallList(self.get_label_list(text, GLUT.GLUT_BITMAP_HELVETICA_12))
 
+    def get_summary_level(self, x_step_size):
+        """Return the trace summary level that matches the current zoom.
+
+        Level k draws one block per 2**k cycles, and is the coarsest level
+        at which no block is wider than one pixel, so no visible detail is
+        lost.
+        """
+        cycles_per_pixel = 1 / (x_step_size * self.zoom)
+        return max(0, int(cycles_per_pixel).bit_length() - 1)
+
+    def update_trace_buffers(self, row, x_start, y_origin, x_step_size,
+                             y_step_size):
+        """Bring the vertex buffers of the trace in the given row up to date.
+
+        Only the cycles added to the trace since it was last drawn are built
+        and appended, so continuing a simulation costs time proportional to
+        the new cycles. The buffers are refilled if the trace was replaced or
+        cut short. Return the (vertices, colours) pair of VertexBuffers.
+        """
+        signal_list = self.signal_array[row]
+        if row not in self.trace_buffers:
+            self.trace_buffers[row] = [None, 0, VertexBuffer(2),
+                                       VertexBuffer(3)]
+        [cached_list, length, vertices, colours] = self.trace_buffers[row]
+        if cached_list is not signal_list or length > len(signal_list):
+            vertices.clear()
+            colours.clear()
+            length = 0
+        if length < len(signal_list):
+            new_vertices, new_colours = waveform.trace_vertices_2d(
+                signal_list[length:], self.devices,
+                x_start + length * x_step_size, y_origin, x_step_size,
+                y_step_size)
+            vertices.append(new_vertices)
+            colours.append(new_colours)
+        self.trace_buffers[row] = [signal_list, len(signal_list), vertices,
+                                   colours]
+        return vertices, colours
+
+    def get_trace_geometry(self, row, level, x_start, y_origin, x_step_size,
+                           y_step_size):
+        """Return the summary vertex array of the trace in the given row.
+
+        The array is cached, and only rebuilt when the trace or the summary
+        level has changed. Return a (vertices, block_starts) pair, where
+        block_starts gives the first vertex of each summary block.
+        """
+        signal_list = self.signal_array[row]
+        cached = self.trace_geometry.get(row)
+        if (cached is None or cached[0] is not signal_list or
+                cached[1] != len(signal_list) or cached[2] != level):
+            [device_id, output_id] = self.monitor_keys[row]
+            summary = self.monitors.get_summary(device_id, output_id, level)
+            geometry = waveform.summary_vertices_2d(
+                summary, self.devices, x_start, y_origin,
+                x_step_size * (1 << level), y_step_size)
+            cached = (signal_list, len(signal_list), level, geometry)
+            self.trace_geometry[row] = cached
+        return cached[3]
+
+    def draw_trace(self, row, x_start, y_origin, x_step_size, y_step_size,
+                   first_cycle, stop_cycle):
+        """Draw the trace in the given row from its vertex arrays.
+
+        Only the cycles from first_cycle to stop_cycle - 1 are drawn. When
+        zoomed out too far to see single cycles, the trace is drawn from its
+        summary instead.
+        """
+        level = self.get_summary_level(x_step_size)
+        if level == 0 or row >= len(self.monitor_keys):
+            vertices, colours = self.update_trace_buffers(
+                row, x_start, y_origin, x_step_size, y_step_size)
+            first_vertex = 2 * first_cycle
+            stop_vertex = 2 * stop_cycle
+            if stop_vertex <= first_vertex:
+                return
+
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glEnableClientState(GL.GL_COLOR_ARRAY)
+            vertices.upload()
+            GL.glVertexPointer(2, GL.GL_FLOAT, 0, None)
+            colours.upload()
+            GL.glColorPointer(3, GL.GL_FLOAT, 0, None)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+            GL.glDrawArrays(GL.GL_LINE_STRIP, first_vertex,
+                            stop_vertex - first_vertex)
+            GL.glDisableClientState(GL.GL_COLOR_ARRAY)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            return
+
+        vertices, block_starts = self.get_trace_geometry(
+            row, level, x_start, y_origin, x_step_size, y_step_size)
+        block_size = 1 << level
+        first_block = first_cycle // block_size
+        stop_block = min(-(-stop_cycle // block_size), len(block_starts) - 1)
+        first_vertex = int(block_starts[first_block])
+        stop_vertex = int(block_starts[stop_block])
+        if stop_vertex <= first_vertex:
+            return
+
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glVertexPointer(2, GL.GL_FLOAT, 0, vertices)
+        GL.glColor3f(*waveform.TRACE_COLOUR)
+        GL.glDrawArrays(GL.GL_LINES, first_vertex, stop_vertex - first_vertex)
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+
+    def draw_signals(self, text_array=[], signal_array=[], monitor_keys=[]):
+
+        self.SetCurrent(self.context)
         if text_array:
+            if text_array != self.text_array:
+                # The monitor names have changed, so relabel and rebuild
+                # the traces
+                self.clear_labels()
+                self.clear_traces()
             self.text_array = text_array
             self.signal_array = signal_array
+            self.monitor_keys = monitor_keys
 
         self.toggle = 1
 
-        self.SetCurrent(self.context)
         if not self.init:
             # Configure the viewport, modelview and projection matrices
             self.init_gl()
@@ -213,62 +415,30 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         # Clear everything
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        for i in range(len(self.signal_array)):
+        # Only draw the rows and cycles that are on screen
+        size = self.GetClientSize()
+        first_row, stop_row = waveform.visible_range(
+            self.pan_y, self.zoom, size.height, 75, 150,
+            len(self.signal_array))
+
+        for i in range(first_row, stop_row):
             if self.text_array[i] is not None:
                 # Draw specified text at position (10, 10)
-                self.render_text(self.text_array[i], 75, 75+150*i)
+                self.render_label(self.text_array[i], 75, 75+150*i)
 
-            # Draw a sample signal trace
-            GL.glBegin(GL.GL_LINE_STRIP)
             x_step_size = 50
             y_step_size = 50
-            x = 100 - x_step_size
-            x_next = 100
+            x_start = 100
             y_origin = 100 + 150*i
 
-            for signal in self.signal_array[i]:
-                skip_next = False
-                GL.glColor3f(0.0, 1.0, 0.0)
-
-                if signal == self.devices.HIGH:
-                    x += x_step_size
-                    y = y_origin + y_step_size
-                    x_next += x_step_size
-                    y_next = y_origin + y_step_size
-
-                elif signal == self.devices.LOW:
-                    x += x_step_size
-                    y = y_origin
-                    x_next += x_step_size
-                    y_next = y_origin
-
-                elif signal == self.devices.RISING:
-                    x += 2*x_step_size
-                    y = y_origin
-                    x_next += x_step_size
-                    y_next = y_origin + y_step_size
-                    skip_next = True
-                elif signal == self.devices.FALLING:
-                    x += 2*x_step_size
-                    y = y_origin + y_step_size
-                    x_next += x_step_size
-                    y_next = y_origin
-                    skip_next = True
-                elif signal == self.devices.BLANK:
-                    x += x_step_size
-                    x_next += x_step_size
-                    y = y_origin
-                    y_next = y_origin
-                    GL.glColor3f(0.0, 0.0, 0.0)
-
-                GL.glVertex2f(x, y)
-                if not skip_next:
-                    GL.glVertex2f(x_next, y_next)
-
-            GL.glEnd()
+            first_cycle, stop_cycle = waveform.visible_range(
+                self.pan_x, self.zoom, size.width, x_start, x_step_size,
+                len(self.signal_array[i]))
+            self.draw_trace(i, x_start, y_origin, x_step_size, y_step_size,
+                            first_cycle, stop_cycle)
 
-            GL.glFlush()
-            self.SwapBuffers()
+        GL.glFlush()
+        self.SwapBuffers()
 
     def reset_view(self):
         self.pan_x = 0
@@ -598,8 +768,10 @@ class Gui(wx.Frame):
             if self.network.execute_network():
                 self.monitors.record_signals()
             else:
+                self.monitors.flush_signals()
                 self.print(_(u"Error! Network oscillating."))
                 return False
+        self.monitors.flush_signals()
         # self.monitors.display_signals()
         return True
 
@@ -635,6 +807,7 @@ class Gui(wx.Frame):
         margin = self.monitors.get_margin()
         text_array = []
         signal_array = []
+        monitor_keys = []
         for device_id, output_id in self.monitors.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
@@ -642,8 +815,9 @@ class Gui(wx.Frame):
             text = monitor_name + (margin - name_length) * " "
             signal_array.append(signal_list)
             text_array.append(text)
+            monitor_keys.append((device_id, output_id))
 
-        self.canvas.draw_signals(text_array, signal_array)
+        self.canvas.draw_signals(text_array, signal_array, monitor_keys)
 
     def print(self, text, append=False):
         """Print messages onto the status message box"""
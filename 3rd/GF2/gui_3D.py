@@ -8,12 +8,16 @@ Classes:
 MyGLCanvas - handles all canvas drawing operations.
 Gui - configures the main window and all the widgets.
 """
+import collections
 import wx
 import wx.glcanvas as wxcanvas
 import numpy as np
 import math
 from OpenGL import GL, GLU, GLUT
 
+import waveform
+from simulation_worker import SimulationWorker
+from vertex_buffer import VertexBuffer
 from names import Names
 from devices import Devices
 from network import Network
@@ -50,6 +54,39 @@ class MyGLCanvas(wxcanvas.GLCanvas):
 
     render_text(self, text, x_pos, y_pos, z_pos): Handles text drawing
                                                   operations.
+
+    get_label_list(self, text, font): Returns the display list that draws the
+                                      given text, from a bounded cache.
+
+    clear_labels(self): Deletes the cached label display lists.
+
+    clear_traces(self): Deletes the cached trace buffers and geometry.
+
+    render_label(self, text, x_pos, y_pos): Draws a cached label.
+
+    render_label_3d(self, text, x_pos, y_pos, z_pos): Draws a cached label in
+                                                      the 3D scene.
+
+    get_summary_level(self, x_step_size): Returns the trace summary level that
+                                          matches the current zoom.
+
+    get_trace_length(self, row): Returns the number of cycles of the trace in
+                                 the given row that may be drawn.
+
+    update_trace_buffers(self, row, x_start, y_origin, x_step_size,
+                         y_step_size): Appends the new cycles of the trace in
+                                       the given row to its vertex buffers.
+
+    get_trace_geometry(self, row, level, x_start, y_origin, x_step_size,
+                       y_step_size): Returns the cached summary vertex array
+                                     of the trace in the given row.
+
+    draw_trace(self, row, x_start, y_origin, x_step_size, y_step_size,
+               first_cycle, stop_cycle): Draws the visible part of the trace
+                                         in the given row.
+
+    draw_trace_3d(self, row, x_start, y_origin, x_step_size, y_step_size):
+                                     Draws the 3D trace in the given row.
     """
 
     def __init__(self, parent, devices, monitors):
@@ -105,6 +142,24 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         self.toggle = 0
         self.text_array = []
         self.signal_array = []
+        self.monitor_keys = []
+
+        # trace_buffers stores {row: [signal_list, length, vertices, colours]}
+        # and trace_meshes stores {row: [signal_list, length, mesh]}, while
+        # trace_geometry stores {row: (signal_list, length, level, geometry)}
+        # for traces drawn from their summaries
+        self.trace_buffers = {}
+        self.trace_geometry = {}
+        self.trace_meshes = {}
+
+        # trace_lengths stores how many cycles of each row may be drawn while
+        # a simulation is recording them, or None when none is running
+        self.trace_lengths = None
+
+        # label_lists stores {(text, font): display list} for the most
+        # recently drawn labels, least recently drawn first
+        self.label_lists = collections.OrderedDict()
+        self.label_cache_size = 256
         self.toggle_3D = False
 
     def init_gl(self):
@@ -464,16 +519,235 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             else:
                 GLUT.glutBitmapCharacter(font, ord(character))
 
-    def draw_signals(self, text_array=[], signal_array=[]):
+    def get_label_list(self, text, font):
+        """Return the display list that draws the given text.
+
+        The list is compiled the first time the text is drawn. It moves the
+        raster position itself, so the caller only sets where the text starts.
+        Only the label_cache_size most recently drawn labels are kept, so
+        cycle numbers seen while scrolling do not pile up.
+        """
+        key = (text, font)
+        if key in self.label_lists:
+            self.label_lists.move_to_end(key)
+        else:
+            if len(self.label_lists) >= self.label_cache_size:
+                [old_key, old_list] = self.label_lists.popitem(last=False)
+                GL.glDeleteLists(old_list, 1)
+            label_list = GL.glGenLists(1)
+            GL.glNewList(label_list, GL.GL_COMPILE)
+            for line_number, line in enumerate(text.split('\n')):
+                if line_number:
+                    # Move back to the start of the line, 20 pixels down
+                    GL.glBitmap(0, 0, 0, 0, -line_width, -20, None)
+                line_width = 0
+                for character in line:
+                    GLUT.glutBitmapCharacter(font, ord(character))
+                    line_width += GLUT.glutBitmapWidth(font, ord(character))
+            GL.glEndList()
+            self.label_lists[key] = label_list
+        return self.label_lists[key]
+
+    def clear_labels(self):
+        """Delete the cached label display lists."""
+        for label_list in self.label_lists.values():
+            GL.glDeleteLists(label_list, 1)
+        self.label_lists = collections.OrderedDict()
+
+    def clear_traces(self):
+        """Delete the cached trace buffers and geometry of every row."""
+        for signal_list, length, vertices, colours in \
+                self.trace_buffers.values():
+            vertices.delete()
+            colours.delete()
+        for signal_list, length, mesh in self.trace_meshes.values():
+            mesh.delete()
+        self.trace_meshes = {}
+        self.trace_buffers = {}
+        self.trace_geometry = {}
+
+    def render_label(self, text, x_pos, y_pos):
+        """Draw a label from its cached display list."""
+        GL.glColor3f(1.0, 1.0, 1.0)  # text is white
+        GL.glRasterPos2f(x_pos, y_pos)
+        GL.glCallList(self.get_label_list(text, GLUT.GLUT_BITMAP_HELVETICA_12))
+
+    def render_label_3d(self, text, x_pos, y_pos, z_pos):
+        """Draw a label in the 3D scene from its cached display list."""
+        GL.glDisable(GL.GL_LIGHTING)
+        GL.glRasterPos3f(x_pos, y_pos, z_pos)
+        GL.glCallList(self.get_label_list(text, GLUT.GLUT_BITMAP_HELVETICA_10))
+        GL.glEnable(GL.GL_LIGHTING)
 
+    def get_summary_level(self, x_step_size):
+        """Return the trace summary level that matches the current zoom.
+
+        Level k draws one block per 2**k cycles, and is the coarsest level
+        at which no block is wider than one pixel, so no visible detail is
+        lost.
+        """
+        cycles_per_pixel = 1 / (x_step_size * self.zoom)
+        return max(0, int(cycles_per_pixel).bit_length() - 1)
+
+    def get_trace_length(self, row):
+        """Return the number of cycles of the trace in the given row to draw.
+
+        While a simulation is running, this is the length in the latest
+        snapshot from the worker, as the trace may be growing.
+        """
+        if self.trace_lengths is None:
+            return len(self.signal_array[row])
+        return self.trace_lengths[row]
+
+    def update_trace_buffers(self, row, x_start, y_origin, x_step_size,
+                             y_step_size):
+        """Bring the vertex buffers of the trace in the given row up to date.
+
+        Only the cycles added to the trace since it was last drawn are built
+        and appended, so continuing a simulation costs time proportional to
+        the new cycles. The buffers are refilled if the trace was replaced or
+        cut short. Return the (vertices, colours) pair of VertexBuffers.
+        """
+        signal_list = self.signal_array[row]
+        if row not in self.trace_buffers:
+            self.trace_buffers[row] = [None, 0, VertexBuffer(2),
+                                       VertexBuffer(3)]
+        [cached_list, length, vertices, colours] = self.trace_buffers[row]
+        stop = self.get_trace_length(row)
+        if cached_list is not signal_list or length > stop:
+            vertices.clear()
+            colours.clear()
+            length = 0
+        if length < stop:
+            new_vertices, new_colours = waveform.trace_vertices_2d(
+                signal_list[length:stop], self.devices,
+                x_start + length * x_step_size, y_origin, x_step_size,
+                y_step_size)
+            vertices.append(new_vertices)
+            colours.append(new_colours)
+        self.trace_buffers[row] = [signal_list, stop, vertices, colours]
+        return vertices, colours
+
+    def get_trace_geometry(self, row, level, x_start, y_origin, x_step_size,
+                           y_step_size):
+        """Return the summary vertex array of the trace in the given row.
+
+        The array is cached, and only rebuilt when the trace or the summary
+        level has changed. Return a (vertices, block_starts) pair, where
+        block_starts gives the first vertex of each summary block.
+        """
+        signal_list = self.signal_array[row]
+        length = self.get_trace_length(row)
+        cached = self.trace_geometry.get(row)
+        if (cached is None or cached[0] is not signal_list or
+                cached[1] != length or cached[2] != level):
+            [device_id, output_id] = self.monitor_keys[row]
+            summary = self.monitors.get_summary(device_id, output_id, level,
+                                                length)
+            geometry = waveform.summary_vertices_2d(
+                summary, self.devices, x_start, y_origin,
+                x_step_size * (1 << level), y_step_size)
+            cached = (signal_list, length, level, geometry)
+            self.trace_geometry[row] = cached
+        return cached[3]
+
+    def draw_trace(self, row, x_start, y_origin, x_step_size, y_step_size,
+                   first_cycle, stop_cycle):
+        """Draw the trace in the given row from its vertex arrays.
+
+        Only the cycles from first_cycle to stop_cycle - 1 are drawn. When
+        zoomed out too far to see single cycles, the trace is drawn from its
+        summary instead.
+        """
+        level = self.get_summary_level(x_step_size)
+        if level == 0 or row >= len(self.monitor_keys):
+            vertices, colours = self.update_trace_buffers(
+                row, x_start, y_origin, x_step_size, y_step_size)
+            first_vertex = 2 * first_cycle
+            stop_vertex = 2 * stop_cycle
+            if stop_vertex <= first_vertex:
+                return
+
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glEnableClientState(GL.GL_COLOR_ARRAY)
+            vertices.upload()
+            GL.glVertexPointer(2, GL.GL_FLOAT, 0, None)
+            colours.upload()
+            GL.glColorPointer(3, GL.GL_FLOAT, 0, None)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+            GL.glDrawArrays(GL.GL_LINE_STRIP, first_vertex,
+                            stop_vertex - first_vertex)
+            GL.glDisableClientState(GL.GL_COLOR_ARRAY)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            return
+
+        vertices, block_starts = self.get_trace_geometry(
+            row, level, x_start, y_origin, x_step_size, y_step_size)
+        block_size = 1 << level
+        first_block = first_cycle // block_size
+        stop_block = min(-(-stop_cycle // block_size), len(block_starts) - 1)
+        first_vertex = int(block_starts[first_block])
+        stop_vertex = int(block_starts[stop_block])
+        if stop_vertex <= first_vertex:
+            return
+
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glVertexPointer(2, GL.GL_FLOAT, 0, vertices)
+        GL.glColor3f(*waveform.TRACE_COLOUR)
+        GL.glDrawArrays(GL.GL_LINES, first_vertex, stop_vertex - first_vertex)
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+
+    def draw_trace_3d(self, row, x_start, y_origin, x_step_size,
+                      y_step_size):
+        """Draw the 3D trace in the given row from its cached mesh.
+
+        The mesh holds the blocks of every cycle in one buffer of interleaved
+        normals and vertices. Only the blocks of cycles added since the trace
+        was last drawn are built and appended, and rotating the scene never
+        regenerates it.
+        """
+        signal_list = self.signal_array[row]
+        if row not in self.trace_meshes:
+            self.trace_meshes[row] = [None, 0, VertexBuffer(6)]
+        [cached_list, length, mesh] = self.trace_meshes[row]
+        stop = self.get_trace_length(row)
+        if cached_list is not signal_list or length > stop:
+            mesh.clear()
+            length = 0
+        if length < stop:
+            mesh.append(waveform.trace_mesh_3d(
+                signal_list[length:stop], self.devices,
+                x_start + length * x_step_size, y_origin, x_step_size,
+                y_step_size, 10, 10))
+        self.trace_meshes[row] = [signal_list, stop, mesh]
+        if not mesh.length:
+            return
+
+        mesh.upload()
+        GL.glInterleavedArrays(GL.GL_N3F_V3F, 0, None)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        GL.glDrawArrays(GL.GL_QUADS, 0, mesh.length)
+        GL.glDisableClientState(GL.GL_NORMAL_ARRAY)
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+
+    def draw_signals(self, text_array=[], signal_array=[], monitor_keys=[],
+                     trace_lengths=None):
+
+        self.SetCurrent(self.context)
         if text_array:
+            if text_array != self.text_array:
+                # The monitor names have changed, so relabel and rebuild
+                # the traces
+                self.clear_labels()
+                self.clear_traces()
             self.text_array = text_array
             self.signal_array = signal_array
+            self.monitor_keys = monitor_keys
+            self.trace_lengths = trace_lengths
 
         self.toggle = 1
 
         if self.toggle_3D:
-            self.SetCurrent(self.context)
             if not self.init:
                 # Configure the viewport, modelview and projection matrices
                 self.init_gl_3d()
@@ -493,37 +767,25 @@ class MyGLCanvas(wxcanvas.GLCanvas):
                 y = y_origin + y_step_size*i
                 if self.text_array[i] is not None:
                     # Draw specified text at position (10, 10)
-                    self.render_text_3d(self.text_array[i]+":", x-50, y, 0)
-                    self.render_text_3d("0", x-20, y, 0)
-                    self.render_text_3d("1", x-20, y + y_step_size/2, 0)
+                    self.render_label_3d(self.text_array[i]+":", x-50, y, 0)
+                    self.render_label_3d("0", x-20, y, 0)
+                    self.render_label_3d("1", x-20, y + y_step_size/2, 0)
 
                 if i == 0:
-                    self.render_text("0", x_origin-x_step_size/2, y_origin - y_step_size/2)
-                    for counter in range(len(self.signal_array[i])):
-                        self.render_text_3d(str(counter+1), x_origin + (counter+0.5)*x_step_size, y_origin - y_step_size/2, 0)
-
-                for signal in self.signal_array[i]:
-                    GL.glColor3f(1.0, 0.7, 0.5)  # signal trace is beige
-
-                    if signal == self.devices.HIGH:
-                        self.draw_cuboid(x, y, 10, 10, y_step_size/2 + 1)
-                        x += x_step_size
-
-                    elif signal == self.devices.LOW:
-                        self.draw_cuboid(x, y, 10, 10, 1)
-                        x += x_step_size
-
-                    elif signal == self.devices.RISING:
-                        self.draw_prism(x, y, 10, 10, y_step_size/2 + 1)
-                        x += x_step_size
-
-                    elif signal == self.devices.FALLING:
-                        self.draw_prism(x, y, 10, 10, y_step_size/2 + 1, rise=False)
-                        x += x_step_size
-
-                    elif signal == self.devices.BLANK:
-                        self.draw_cuboid(x, y, 10, 0, 0)
-                        x += x_step_size
+                    self.render_label("0", x_origin - x_step_size/2,
+                                      y_origin - y_step_size/2)
+                    # Leave out labels that would overlap at this zoom
+                    count = self.get_trace_length(i)
+                    stride = waveform.label_stride(x_step_size * self.zoom,
+                                                   8 * len(str(count)) + 8)
+                    for number in range(stride, count + 1, stride):
+                        self.render_label_3d(
+                            str(number),
+                            x_origin + (number - 0.5) * x_step_size,
+                            y_origin - y_step_size/2, 0)
+
+                GL.glColor3f(1.0, 0.7, 0.5)  # signal trace is beige
+                self.draw_trace_3d(i, x_origin, y, x_step_size, y_step_size)
 
                 GL.glColor3f(1.0, 1.0, 1.0)  # text is white
             GL.glFlush()
@@ -539,69 +801,45 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             # Clear everything
             GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-            for i in range(len(self.signal_array)):
+            # Only draw the rows and cycles that are on screen
+            size = self.GetClientSize()
+            first_row, stop_row = waveform.visible_range(
+                self.pan_y, self.zoom, size.height, 25, 75,
+                len(self.signal_array))
+
+            for i in range(first_row, stop_row):
                 if self.text_array[i] is not None:
                     # Draw specified text at position
-                    self.render_text(self.text_array[i]+":", 5, 50+75*i)
-                    self.render_text("0", 40, 45 + 75 * i)
-                    self.render_text("1", 40, 70 + 75 * i)
+                    self.render_label(self.text_array[i]+":", 5, 50+75*i)
+                    self.render_label("0", 40, 45 + 75 * i)
+                    self.render_label("1", 40, 70 + 75 * i)
 
                 x_step_size = 25
                 y_step_size = 25
-                x_next = 50
-                x = x_next - x_step_size
+                x_start = 50
                 y_origin = 50 + 75*i
 
+                first_cycle, stop_cycle = waveform.visible_range(
+                    self.pan_x, self.zoom, size.width, x_start, x_step_size,
+                    self.get_trace_length(i))
+
                 if i == 0:
-                    self.render_text("0", x_next, y_origin - 25)
-                    for counter in range(len(self.signal_array[i])):
-                        self.render_text(str(counter+1), 50 + (counter+1)*x_step_size, y_origin - 25)
-
-                # Draw a sample signal trace
-                GL.glBegin(GL.GL_LINE_STRIP)
-
-                for signal in self.signal_array[i]:
-                    skip_next = False
-                    GL.glColor3f(0.0, 1.0, 0.0)
-
-                    if signal == self.devices.HIGH:
-                        x += x_step_size
-                        y = y_origin + y_step_size
-                        x_next += x_step_size
-                        y_next = y_origin + y_step_size
-
-                    elif signal == self.devices.LOW:
-                        x += x_step_size
-                        y = y_origin
-                        x_next += x_step_size
-                        y_next = y_origin
-
-                    elif signal == self.devices.RISING:
-                        x += 2*x_step_size
-                        y = y_origin
-                        x_next += x_step_size
-                        y_next = y_origin + y_step_size
-                        skip_next = True
-                    elif signal == self.devices.FALLING:
-                        x += 2*x_step_size
-                        y = y_origin + y_step_size
-                        x_next += x_step_size
-                        y_next = y_origin
-                        skip_next = True
-                    elif signal == self.devices.BLANK:
-                        x += x_step_size
-                        x_next += x_step_size
-                        y = y_origin
-                        y_next = y_origin
-                        GL.glColor3f(0.0, 0.0, 0.0)
-
-                    GL.glVertex2f(x, y)
-                    if not skip_next:
-                        GL.glVertex2f(x_next, y_next)
-
-                GL.glEnd()
-                GL.glFlush()
-                self.SwapBuffers()
+                    self.render_label("0", x_start, y_origin - 25)
+                    # Leave out labels that would overlap at this zoom
+                    count = self.get_trace_length(i)
+                    stride = waveform.label_stride(x_step_size * self.zoom,
+                                                   8 * len(str(count)) + 8)
+                    first_label = stride * -(-(first_cycle + 1) // stride)
+                    for number in range(first_label, stop_cycle + 1, stride):
+                        self.render_label(str(number),
+                                          50 + number * x_step_size,
+                                          y_origin - 25)
+
+                self.draw_trace(i, x_start, y_origin, x_step_size,
+                                y_step_size, first_cycle, stop_cycle)
+
+            GL.glFlush()
+            self.SwapBuffers()
 
     def reset_view(self):
         self.pan_x = 0
@@ -655,12 +893,26 @@ class Gui(wx.Frame):
 
     on_quit_button(self, event): Event handler for when the user clicks the Quit button
 
+    on_cancel_button(self, event): Event handler for when the user clicks the
+                                   Cancel button.
+
+    on_close(self, event): Event handler for when the window is closed.
+                           Stops any running simulation.
+
     run_command(self): Runs the simulation from scratch.
 
     continue_command(self): Continues a previously run simulation.
 
-    run_network(self, cycles): Runs the network for the specified number of
-                               simulation cycles.
+    run_network(self, cycles): Starts running the network for the specified
+                               number of simulation cycles in the background.
+
+    set_running(self, running): Enables only the widgets that can be used
+                                while a simulation is running, or all of them.
+
+    on_simulation_progress(self, cycles, trace_lengths): Redraws the signals
+                                    part way through a run.
+
+    on_simulation_finished(self, cycles, status): Reports the end of a run.
 
     monitor_command(self): Sets the specified monitor.
 
@@ -708,6 +960,8 @@ class Gui(wx.Frame):
         self.restore_view_button = wx.Button(self, wx.ID_ANY, _(u"Restore view"))
         self.threeD_button = wx.Button(self, wx.ID_ANY, _(u"Enable 3D"))
         self.quit_button = wx.Button(self, wx.ID_ANY, _(u"Quit"))
+        self.cancel_button = wx.Button(self, wx.ID_ANY, _(u"Cancel"))
+        self.cancel_button.Enable(False)
         self.switch_button = wx.Button(self, wx.ID_ANY, _(u"Set Switches On/Off"))
         self.monitor_button = wx.Button(self, wx.ID_ANY, _(u"Set/Zap Monitors"))
         self.status_text = wx.StaticText(self, wx.ID_ANY, _(u"Status Messages:"))
@@ -726,6 +980,8 @@ class Gui(wx.Frame):
         self.restore_view_button.Bind(wx.EVT_BUTTON, self.on_restore_view_button)
         self.threeD_button.Bind(wx.EVT_BUTTON, self.on_three_d_button)
         self.quit_button.Bind(wx.EVT_BUTTON, self.on_quit_button)
+        self.cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel_button)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
 
         # Configure sizers for layout
         self.main_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -750,6 +1006,8 @@ class Gui(wx.Frame):
         simulate_continue_sizer.Add(self.spin_continue, 2, wx.ALL, 5)
         simulate_continue_sizer.Add(self.text_continue_cycle, 1, wx.ALL, 5)
 
+        button_sizer.Add(self.cancel_button, 1, wx.ALL, 5)
+
         button_sizer.Add(self.switch_button, 1, wx.ALL, 5)
         button_sizer.Add(self.monitor_button, 1, wx.ALL, 5)
         button_sizer.Add(self.restore_view_button, 1, wx.ALL, 5)
@@ -779,6 +1037,12 @@ class Gui(wx.Frame):
         # enables printing to console/terminal
         self.logging = False
 
+        # the background simulation, while one is running, and the trace
+        # lengths it last reported, which are safe to draw
+        self.worker = None
+        self.worker_continuing = False
+        self.trace_lengths = None
+
     def on_menu(self, event):
         """Handle the event when the user selects a menu item."""
         Id = event.GetId()
@@ -788,7 +1052,10 @@ class Gui(wx.Frame):
             wx.MessageBox(_(u"Logic Simulator\nCreated by Team 10\n2019"),
                           _(u"About Logsim"), wx.ICON_INFORMATION | wx.OK)
         if Id == wx.ID_OPEN:
-            self.load_file()
+            if self.worker is not None:
+                self.print(_(u"Error! Cancel the simulation first."))
+            else:
+                self.load_file()
 
     def on_spin_run(self, event):
         """Handle the event when the user changes the spin control value."""
@@ -936,6 +1203,20 @@ class Gui(wx.Frame):
         """ Handles the event when Quit button is clicked. Ends the program and closes the window."""
         self.Close()
 
+    def on_cancel_button(self, event):
+        """Handle the event when the user clicks the cancel button."""
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_close(self, event):
+        """Stop any running simulation before the window is closed."""
+        if self.worker is not None:
+            worker = self.worker
+            self.worker = None
+            worker.cancel()
+            worker.join()
+        event.Skip()
+
     # ported from userint.py and changed slightly
     def run_command(self):
         """Run the simulation from scratch."""
@@ -946,8 +1227,8 @@ class Gui(wx.Frame):
             self.monitors.reset_monitors()
             self.print("".join([_(u"Running for "), str(cycles), _(u" cycles")]))
             self.devices.cold_startup()
-            if self.run_network(cycles):
-                self.cycles_completed += cycles
+            self.worker_continuing = False
+            self.run_network(cycles)
 
         self.draw_signals()
 
@@ -957,26 +1238,79 @@ class Gui(wx.Frame):
         if cycles is not None:  # if the number of cycles provided is valid
             if self.cycles_completed == 0:
                 self.print(_(u"Error! Nothing to continue. Run first."))
-            elif self.run_network(cycles):
-                self.cycles_completed += cycles
-                self.print(" ".join([_(u"Continuing for"), str(cycles), _(u"cycles."),
-                           _(u"Total:"), str(self.cycles_completed)]), append=True)
+            else:
+                self.worker_continuing = True
+                self.run_network(cycles)
 
         self.draw_signals()
 
     def run_network(self, cycles):
-        """Run the network for the specified number of simulation cycles.
+        """Start running the network for the specified number of cycles.
 
-        Return True if successful.
+        The network runs in a background thread, so the window stays
+        responsive and the run can be cancelled. The signals are redrawn as
+        the run progresses, and on_simulation_finished() is called when it
+        ends.
         """
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                self.print(_(u"Error! Network oscillating."))
-                return False
-        # self.monitors.display_signals()
-        return True
+        self.set_running(True)
+        self.trace_lengths = self.monitors.snapshot()
+        self.worker = SimulationWorker(self.network, self.monitors, cycles,
+                                       wx.CallAfter,
+                                       self.on_simulation_progress,
+                                       self.on_simulation_finished)
+        self.worker.start()
+
+    def set_running(self, running):
+        """Enable only the widgets that can be used during a simulation.
+
+        The circuit and the monitors must not change while the network is
+        running, so only the Cancel button is enabled until it stops.
+        """
+        self.cancel_button.Enable(running)
+        self.run_button.Enable(not running)
+        self.continue_button.Enable(not running and self.toggle_run)
+        self.switch_button.Enable(not running)
+        self.monitor_button.Enable(not running)
+
+    def on_simulation_progress(self, cycles, trace_lengths):
+        """Redraw the signals part way through a run.
+
+        Only the cycles in the worker's snapshot of the trace lengths are
+        drawn, as the worker carries on recording while the GUI draws.
+        """
+        if self.worker is None:
+            return
+        self.trace_lengths = trace_lengths
+        self.draw_signals()
+
+    def on_simulation_finished(self, cycles, status):
+        """Report the end of a run and redraw the signals."""
+        if self.worker is None:
+            return
+        worker = self.worker
+        self.worker = None
+        self.trace_lengths = None
+        self.set_running(False)
+        self.cycles_completed += cycles
+
+        if status == worker.OSCILLATING:
+            self.print(_(u"Error! Network oscillating."))
+            if self.network.oscillating_devices:
+                device_names = ", ".join(
+                    self.names.get_name_string(device_id)
+                    for device_id in self.network.oscillating_devices)
+                self.print("\n" + " ".join([_(u"Oscillating devices:"),
+                                            device_names]), append=True)
+        elif status == worker.CANCELLED:
+            self.print(" ".join([_(u"Simulation cancelled after"),
+                                 str(cycles), _(u"cycles."), _(u"Total:"),
+                                 str(self.cycles_completed)]), append=True)
+        elif self.worker_continuing:
+            self.print(" ".join([_(u"Continuing for"), str(cycles),
+                                 _(u"cycles."), _(u"Total:"),
+                                 str(self.cycles_completed)]), append=True)
+
+        self.draw_signals()
 
     def monitor_command(self, monitor):
         """Set the specified monitor."""
@@ -1010,6 +1344,7 @@ class Gui(wx.Frame):
         margin = self.monitors.get_margin()
         text_array = []
         signal_array = []
+        monitor_keys = []
         for device_id, output_id in self.monitors.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
@@ -1017,8 +1352,14 @@ class Gui(wx.Frame):
             text = monitor_name + (margin - name_length) * " "
             signal_array.append(signal_list)
             text_array.append(text)
+            monitor_keys.append((device_id, output_id))
 
-        self.canvas.draw_signals(text_array, signal_array)
+        trace_lengths = None
+        if self.trace_lengths is not None:
+            trace_lengths = [self.trace_lengths.get(monitor_key, 0)
+                             for monitor_key in monitor_keys]
+        self.canvas.draw_signals(text_array, signal_array, monitor_keys,
+                                 trace_lengths)
 
     def load_file(self):
         """Loads the selected definition file and reinitialises the GUI parameters. """
@@ -1039,6 +1380,16 @@ class Gui(wx.Frame):
                 self.parser.parse_network()
                 self.cycles_completed = 0  # number of simulation cycles completed
                 self.canvas.devices = self.devices
+                self.canvas.monitors = self.monitors
+
+                # Forget the traces and labels of the old circuit
+                self.canvas.SetCurrent(self.canvas.context)
+                self.canvas.clear_labels()
+                self.canvas.clear_traces()
+                self.canvas.text_array = []
+                self.canvas.signal_array = []
+                self.canvas.monitor_keys = []
+                self.canvas.trace_lengths = None
 
                 # Configure default/initial values
                 self.switch_selections = []
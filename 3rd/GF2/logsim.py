@@ -8,8 +8,19 @@ Usage
 -----
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
+Command script: logsim.py -c <file path> -b <script path, or - for stdin>
+Switch sweep: logsim.py -s <cycles> [-n <samples>] <file path>
+Checkpoints: logsim.py -c <file path> -k <checkpoint directory> [-r to resume]
+Profile the simulation: logsim.py -c <file path> -p
+Memory report: logsim.py -c <file path> -m
+Simulation server: logsim.py -l <host:port, or Unix socket path>
 Graphical user interface: logsim.py <file path>
+
+The graphical user interface modules, and with them wx, OpenGL and NumPy, are
+only imported when the graphical user interface is used, so the command line
+user interface starts quickly.
 """
+import builtins
 import getopt
 import sys
 from names import Names
@@ -19,8 +30,9 @@ from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
 from userint import UserInterface
-from gui_3D import Gui, LanguageGui
-import app_base as ab
+
+# app_base installs wx.GetTranslation as _, until then leave text untranslated
+builtins.__dict__.setdefault('_', lambda text: text)
 
 
 def main(arg_list):
@@ -29,13 +41,22 @@ def main(arg_list):
     Run either the command line user interface, the graphical user interface,
     or display the usage message.
     """
-    print('arg_list', arg_list)
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
                      "Command line user interface: logsim.py -c <file path>\n"
+                     "Command script: logsim.py -c <file path> "
+                     "-b <script path, or - for stdin>\n"
+                     "Switch sweep: logsim.py -s <cycles> [-n <samples>] "
+                     "<file path>\n"
+                     "Checkpoints: logsim.py -c <file path> "
+                     "-k <checkpoint directory> [-r to resume]\n"
+                     "Profile the simulation: logsim.py -c <file path> -p\n"
+                     "Memory report: logsim.py -c <file path> -m\n"
+                     "Simulation server: logsim.py "
+                     "-l <host:port, or Unix socket path>\n"
                      "Graphical user interface: logsim.py <file path>")
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(arg_list, "hc:b:s:n:k:rpml:")
     except getopt.GetoptError:
         print(_(u"Error: invalid command line arguments\n"))
         print(usage_message)
@@ -47,17 +68,105 @@ def main(arg_list):
     network = Network(names, devices)
     monitors = Monitors(names, devices, network)
 
+    # The command script, if any, is used by the command line interface
+    option_values = dict(options)
+    script_path = option_values.get("-b")
+    checkpoint_path = option_values.get("-k")
+    if ((script_path is not None or checkpoint_path is not None or
+            "-p" in option_values or "-m" in option_values) and
+            "-c" not in option_values):
+        print(usage_message)
+        sys.exit()
+    if "-r" in option_values and checkpoint_path is None:
+        print(usage_message)
+        sys.exit()
+
+    if "-l" in option_values:  # serve simulations over a socket
+        if arguments:
+            print(usage_message)
+            sys.exit()
+        # Only import asyncio when it is needed
+        import asyncio
+        import server
+        try:
+            asyncio.run(server.SimulationServer().serve(option_values["-l"]))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if "-s" in option_values:  # simulate every combination of switch states
+        cycles = option_values["-s"]
+        samples = option_values.get("-n")
+        if (len(arguments) != 1 or not cycles.isdigit() or
+                (samples is not None and not samples.isdigit())):
+            print(usage_message)
+            sys.exit()
+        [path] = arguments
+        scanner = Scanner(path, names)
+        parser = Parser(names, devices, network, monitors, scanner)
+        if parser.parse_network():
+            # Only import the process pool when it is needed
+            import sweep
+            table = sweep.sweep(names, devices, network, monitors,
+                                int(cycles), None if samples is None
+                                else int(samples))
+            sys.stdout.write(sweep.format_table(names, devices, monitors,
+                                                table))
+        return
+    elif "-n" in option_values:
+        print(usage_message)
+        sys.exit()
+
     for option, path in options:
         if option == "-h":  # print the usage message
             print(usage_message)
             sys.exit()
         elif option == "-c":  # use the command line user interface
+            if "-m" in option_values:
+                # Trace the allocations of the parser onwards
+                import memory
+                import tracemalloc
+                tracemalloc.start()
             scanner = Scanner(path, names)
             parser = Parser(names, devices, network, monitors, scanner)
             if parser.parse_network():
                 # Initialise an instance of the userint.UserInterface() class
                 userint = UserInterface(names, devices, network, monitors)
-                userint.command_interface()
+                if checkpoint_path is not None:
+                    import checkpoint
+                    userint.checkpointer = checkpoint.Checkpointer(
+                        checkpoint_path, devices, monitors)
+                    if "-r" in option_values:
+                        try:
+                            cycles = userint.checkpointer.resume()
+                        except ValueError as error:
+                            print("Cannot resume: {}.".format(error))
+                            sys.exit()
+                        if cycles is None:
+                            print("No checkpoint to resume from.")
+                        else:
+                            userint.cycles_completed = cycles
+                            print("Resumed after {} cycles.".format(cycles))
+                if "-m" in option_values:
+                    sys.stdout.write(memory.memory_report(
+                        names, devices, network, monitors).get_report())
+                if "-p" in option_values:
+                    import profiler
+                    simulation_profiler = profiler.Profiler(network, monitors)
+                    simulation_profiler.enable()
+                if script_path is None:
+                    userint.command_interface()
+                elif script_path == "-":
+                    userint.batch_interface(sys.stdin)
+                else:
+                    with open(script_path) as command_file:
+                        userint.batch_interface(command_file)
+                if "-p" in option_values:
+                    stats = simulation_profiler.disable()
+                    sys.stdout.write(stats.get_report())
+                if "-m" in option_values:
+                    sys.stdout.write(memory.memory_report(
+                        names, devices, network, monitors).get_report())
 
     if not options:  # no option given, use the graphical user interface
 
@@ -75,6 +184,8 @@ def main(arg_list):
         parser = Parser(names, devices, network, monitors, scanner)
         if parser.parse_network():
             # Initialise an instance of the gui.Gui() class
+            import app_base as ab
+            from gui_3D import Gui, LanguageGui
 
             app = ab.BaseApp(redirect=False)
             language = LanguageGui()
@@ -94,4 +205,4 @@ def main(arg_list):
 
 
 if __name__ == "__main__":
-    main(["definition_1.txt"])
+    main(sys.argv[1:])
@@ -0,0 +1,215 @@
+"""Account for the memory used by each part of the Logic Simulator.
+
+Used in the Logic Simulator project to find which subsystem holds the memory
+of a large run: the names, the devices, the network connections or the
+monitor traces. The sizes are found by walking the structures of each
+subsystem, and, when tracemalloc is tracing, also by the file which
+allocated the memory. The growth of the traces is used to project the memory
+needed by a run before it starts.
+
+Classes
+-------
+MemoryReport - stores the memory used by each subsystem.
+
+Functions
+---------
+get_deep_size(objects, seen): Returns the size in bytes of the objects and
+                              the containers and strings they hold.
+
+memory_report(names, devices, network, monitors): Returns a MemoryReport of
+                                                  the simulator.
+"""
+import os
+import sys
+import tracemalloc
+
+SUBSYSTEMS = ["names", "devices", "network", "monitors"]
+
+# The subsystem charged for memory allocated in each file, when tracing
+SUBSYSTEM_FILES = {"names.py": "names", "devices.py": "devices",
+                   "network.py": "network", "netlist.py": "network",
+                   "monitors.py": "monitors",
+                   "scanner.py": "parser", "parse.py": "parser"}
+
+CYCLES_PER_STEP = 10000  # growth is given per this many cycles
+
+
+def get_deep_size(objects, seen):
+    """Return the size in bytes of the objects and everything they hold.
+
+    Lists, tuples, sets and dictionaries are followed into their items, and
+    objects already in seen, a set of object IDs, are not counted again.
+    """
+    size = 0
+    stack = list(objects)
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
+
+class MemoryReport:
+
+    """Store the memory used by each subsystem of the simulator.
+
+    Parameters
+    ----------
+    subsystem_bytes: dictionary of {subsystem: bytes} found by walking the
+                     structures of each subsystem.
+    traced_bytes: dictionary of {subsystem: bytes} allocated by the files of
+                  each subsystem, or None if tracemalloc is not tracing.
+    counts: dictionary of the number of names, devices, connections,
+            monitors and recorded cycles.
+    bytes_per_step: growth of the monitor traces every CYCLES_PER_STEP
+                    cycles.
+
+    Public methods
+    --------------
+    project(self, cycles): Returns the memory expected after running for
+                           that many more cycles.
+
+    get_report(self): Returns the report as text.
+    """
+
+    def __init__(self, subsystem_bytes, traced_bytes, counts,
+                 bytes_per_step):
+        """Store the report."""
+        self.subsystem_bytes = subsystem_bytes
+        self.traced_bytes = traced_bytes
+        self.counts = counts
+        self.bytes_per_step = bytes_per_step
+
+    def project(self, cycles):
+        """Return the bytes expected to be used after cycles more cycles."""
+        return (sum(self.subsystem_bytes.values()) +
+                self.bytes_per_step * cycles // CYCLES_PER_STEP)
+
+    def get_report(self):
+        """Return the report as text, one subsystem per line."""
+        lines = ["{:<10} {:>10} {:>14} {:>14}".format(
+            "subsystem", "count", "bytes", "traced bytes")]
+        count_names = {"names": "names", "devices": "devices",
+                       "network": "connections", "monitors": "monitors"}
+        subsystems = SUBSYSTEMS
+        if self.traced_bytes is not None:
+            subsystems = SUBSYSTEMS + [subsystem for subsystem
+                                       in self.traced_bytes
+                                       if subsystem not in SUBSYSTEMS]
+        for subsystem in subsystems:
+            count = self.counts.get(count_names.get(subsystem), "")
+            traced = ("" if self.traced_bytes is None
+                      else self.traced_bytes.get(subsystem, 0))
+            lines.append("{:<10} {:>10} {:>14} {:>14}".format(
+                subsystem, count, self.subsystem_bytes.get(subsystem, ""),
+                traced))
+        lines.append("{:<10} {:>10} {:>14}".format(
+            "total", "", sum(self.subsystem_bytes.values())))
+        lines.append("trace growth: {} bytes per {} cycles, after {} "
+                     "cycles recorded".format(self.bytes_per_step,
+                                              CYCLES_PER_STEP,
+                                              self.counts["cycles"]))
+        for cycles in [10 ** 5, 10 ** 6, 10 ** 7]:
+            lines.append("projected after {} more cycles: {} bytes".format(
+                cycles, self.project(cycles)))
+        return "\n".join(lines) + "\n"
+
+
+def memory_report(names, devices, network, monitors):
+    """Return a MemoryReport of the simulator.
+
+    The subsystems are walked in the order names, devices, network and
+    monitors, and anything shared is charged to the first one holding it.
+    The devices are charged for the Device objects, their __dict__ and their
+    outputs and state, and for the subcircuit instances and, once each, the
+    netlists of their subcircuits. The network is charged for the inputs
+    dictionaries holding the connections and for the netlist executing them,
+    with its state, once it has been made. Trace growth is measured from the
+    cycles recorded so far, or estimated from the number of monitors if
+    there are none.
+    """
+    monitors.flush_signals()
+    seen = set()
+    subsystem_bytes = {}
+    subsystem_bytes["names"] = get_deep_size(
+        [names.name_string_list, names.name_index], seen)
+
+    # The __dict__ of each device is counted without being walked, as its
+    # inputs are charged to the network
+    device_objects = [devices.devices_list, devices.device_map]
+    dict_bytes = 0
+    for device in devices.devices_list:
+        device_dict = vars(device)
+        if id(device_dict) not in seen:
+            seen.add(id(device_dict))
+            dict_bytes += sys.getsizeof(device_dict)
+        device_objects.extend(value for attribute, value
+                              in device_dict.items() if attribute != "inputs")
+
+    # Each subcircuit instance is charged for its state and the connections
+    # of its ports, and each subcircuit once for its netlist
+    subcircuits = {}
+    for instance in devices.instances:
+        device_objects.extend([instance, vars(instance), instance.state,
+                               vars(instance.state)])
+        subcircuits[id(instance.subcircuit)] = instance.subcircuit
+    for subcircuit in subcircuits.values():
+        device_objects.extend([subcircuit, vars(subcircuit),
+                               subcircuit.netlist, vars(subcircuit.netlist)])
+    subsystem_bytes["devices"] = dict_bytes + get_deep_size(device_objects,
+                                                            seen)
+    network_objects = [device.inputs for device in devices.devices_list]
+    if network.netlist is not None:
+        network_objects.extend(vars(network.netlist).values())
+        network_objects.extend(vars(network.state).values())
+        network_objects.extend([
+            network.output_dictionaries, network.output_links,
+            network.switch_devices, network.d_type_devices,
+            network.clock_devices, network.siggen_devices])
+    subsystem_bytes["network"] = get_deep_size(network_objects, seen)
+
+    trace_bytes = get_deep_size(
+        list(monitors.monitors_dictionary.values()) +
+        [monitors.summaries], seen)
+    subsystem_bytes["monitors"] = trace_bytes + get_deep_size(
+        [monitors.monitors_dictionary, monitors.probes, monitors.traces,
+         monitors.pending_columns, monitors.summary_lengths], seen)
+
+    traced_bytes = None
+    if tracemalloc.is_tracing():
+        traced_bytes = {}
+        for statistic in tracemalloc.take_snapshot().statistics("filename"):
+            file_name = os.path.basename(statistic.traceback[0].filename)
+            subsystem = SUBSYSTEM_FILES.get(file_name, "other")
+            traced_bytes[subsystem] = (traced_bytes.get(subsystem, 0) +
+                                       statistic.size)
+
+    cycles = max([len(trace) for trace
+                  in monitors.monitors_dictionary.values()] + [0])
+    if cycles:
+        empty_bytes = sys.getsizeof([]) * len(monitors.monitors_dictionary)
+        bytes_per_step = ((trace_bytes - empty_bytes) * CYCLES_PER_STEP //
+                          cycles)
+    else:
+        # Each cycle adds a reference to a signal to every trace
+        bytes_per_step = ((sys.getsizeof([0] * CYCLES_PER_STEP) -
+                           sys.getsizeof([])) *
+                          len(monitors.monitors_dictionary))
+
+    counts = {"names": len(names.name_string_list),
+              "devices": len(devices.devices_list),
+              "connections": sum(
+                  connected_output is not None
+                  for device in devices.devices_list
+                  for connected_output in device.inputs.values()),
+              "monitors": len(monitors.monitors_dictionary),
+              "cycles": cycles}
+    return MemoryReport(subsystem_bytes, traced_bytes, counts,
+                        bytes_per_step)
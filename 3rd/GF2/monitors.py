@@ -9,6 +9,7 @@ Monitors - records and displays specified output signals.
 
 """
 import collections
+import sys
 
 
 class Monitors:
@@ -44,7 +45,23 @@ class Monitors:
 
     get_margin(self): Returns the length of the longest monitor's name.
 
-    display_signals(self): Displays signal trace(s) in the text console.
+    display_signals(self, start=None, stop=None): Displays signal trace(s) in
+                                                  the text console.
+
+    compile_probes(self): Rebuilds the probe list used by record_signals.
+
+    set_batch_size(self, batch_size): Sets how many cycles are gathered before
+                                      they are flushed into the traces.
+
+    flush_signals(self): Moves any batched cycles into the signal traces.
+
+    get_summary(self, device_id, output_id, level, length=None): Returns the
+                          summary of the specified trace at the given level.
+
+    snapshot(self): Returns the length of each signal trace.
+
+    restore(self, state): Cuts the signal traces back to the lengths returned
+                          by snapshot().
     """
 
     def __init__(self, names, devices, network):
@@ -57,6 +74,38 @@ class Monitors:
         # {(device_id, output_id): [signal_list]}
         self.monitors_dictionary = collections.OrderedDict()
 
+        # probes stores [(outputs_dictionary, output_id)] and traces stores
+        # the matching signal lists, both in monitors_dictionary order
+        self.probes = []
+        self.traces = []
+
+        # Columns of recorded signals waiting to be flushed into the traces
+        self.batch_size = 1
+        self.pending_columns = []
+
+        # summaries stores {(device_id, output_id): [level_1, level_2, ...]},
+        # where entry i of level k is a bit mask of the signals present in
+        # cycles i * 2**k to (i + 1) * 2**k - 1, with bit (1 << signal) set
+        # for each signal found. summary_lengths stores how many cycles of
+        # each trace have been summarised so far.
+        self.summaries = {}
+        self.summary_lengths = {}
+
+        # Translation table from signal levels to the characters used to
+        # display them, and the bytes of any other values, which are left out
+        signal_characters = [(self.devices.HIGH, "-"),
+                             (self.devices.LOW, "_"),
+                             (self.devices.RISING, "/"),
+                             (self.devices.FALLING, "\\"),
+                             (self.devices.BLANK, " ")]
+        self.display_table = bytes.maketrans(
+            bytes(signal for signal, character in signal_characters),
+            "".join(character for signal, character
+                    in signal_characters).encode())
+        self.display_ignored = bytes(
+            set(range(256)) - {signal for signal, character
+                               in signal_characters})
+
         [self.NO_ERROR, self.NOT_OUTPUT,
          self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
 
@@ -77,8 +126,10 @@ class Monitors:
             # monitor, then initialise the signal trace with an n-length list
             # of BLANK signals. Otherwise, initialise the trace with an empty
             # list.
+            self.flush_signals()
             self.monitors_dictionary[(device_id, output_id)] = [
                 self.devices.BLANK] * cycles_completed
+            self.compile_probes()
             return self.NO_ERROR
 
     def remove_monitor(self, device_id, output_id):
@@ -89,7 +140,11 @@ class Monitors:
         if (device_id, output_id) not in self.monitors_dictionary:
             return False
         else:
+            self.flush_signals()
             del self.monitors_dictionary[(device_id, output_id)]
+            self.summaries.pop((device_id, output_id), None)
+            self.summary_lengths.pop((device_id, output_id), None)
+            self.compile_probes()
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -105,12 +160,127 @@ class Monitors:
     def record_signals(self):
         """Record the current signal level for every monitor.
 
-        This function is called at every simulation cycle.
+        This function is called at every simulation cycle. The signal levels
+        are gathered straight from the monitored output slots into a column,
+        which is either appended to the traces or batched until batch_size
+        columns have been gathered.
         """
-        for device_id, output_id in self.monitors_dictionary:
-            signal_level = self.get_monitor_signal(device_id, output_id)
-            self.monitors_dictionary[(device_id,
-                                      output_id)].append(signal_level)
+        column = [outputs[output_id] for outputs, output_id in self.probes]
+        if self.batch_size == 1:
+            for trace, signal_level in zip(self.traces, column):
+                trace.append(signal_level)
+        else:
+            self.pending_columns.append(column)
+            if len(self.pending_columns) >= self.batch_size:
+                self.flush_signals()
+
+    def compile_probes(self):
+        """Rebuild the probe list from the monitors dictionary.
+
+        Each probe refers directly to the outputs dictionary of the monitored
+        device, so record_signals needs no device or signal lookups.
+        """
+        self.probes = []
+        self.traces = []
+        for (device_id, output_id), trace in self.monitors_dictionary.items():
+            device = self.devices.get_device(device_id)
+            self.probes.append((device.outputs, output_id))
+            self.traces.append(trace)
+
+    def set_batch_size(self, batch_size):
+        """Set the number of cycles gathered before flushing the traces.
+
+        With a batch size greater than 1, the traces are only complete after
+        flush_signals() has been called.
+        """
+        if not isinstance(batch_size, int):
+            raise TypeError("Expected batch_size to be an integer.")
+        if batch_size < 1:
+            raise ValueError("Expected batch_size to be at least 1.")
+        self.flush_signals()
+        self.batch_size = batch_size
+
+    def flush_signals(self):
+        """Append any batched signal columns to the signal traces."""
+        if self.pending_columns:
+            for trace, signal_levels in zip(self.traces,
+                                            zip(*self.pending_columns)):
+                trace.extend(signal_levels)
+            self.pending_columns = []
+
+    def get_summary(self, device_id, output_id, level, length=None):
+        """Return the summary of the specified trace at the given level.
+
+        Level 0 gives one bit mask per cycle and level k gives one bit mask
+        per block of 2**k cycles. A block containing both the HIGH and LOW
+        bits, or a RISING or FALLING bit, contains a transition. Only the
+        cycles appended since the last call are summarised. If length is
+        given, only the first length cycles are summarised and no batched
+        cycles are flushed, so the summary can be taken while another thread
+        is recording. Return None if the monitor does not exist.
+        """
+        if (device_id, output_id) not in self.monitors_dictionary:
+            return None
+        trace = self.monitors_dictionary[(device_id, output_id)]
+        if length is None:
+            self.flush_signals()
+            length = len(trace)
+        if level == 0:
+            return [1 << trace[cycle] for cycle in range(length)]
+        levels = self.update_summary(device_id, output_id, length)
+        if level > len(levels):
+            # Coarser than the whole trace, so a single block covers it all
+            level = len(levels)
+            if level == 0:
+                return [1 << trace[cycle] for cycle in range(length)]
+        return levels[level - 1]
+
+    def update_summary(self, device_id, output_id, length=None):
+        """Summarise the cycles appended to the trace since the last update.
+
+        Only the blocks containing new cycles are recomputed at each level,
+        up to length cycles if it is given. Return the list of summary
+        levels.
+        """
+        trace = self.monitors_dictionary[(device_id, output_id)]
+        levels = self.summaries.setdefault((device_id, output_id), [])
+        if length is None:
+            length = len(trace)
+        summarised = self.summary_lengths.get((device_id, output_id), 0)
+        if summarised == length:
+            return levels
+
+        # Cycles before first_changed are already summarised, unless the
+        # trace has been truncated since the last update
+        first_changed = min(summarised, length)
+
+        below = trace
+        below_length = length
+        level_number = 1
+        while below_length > 1:
+            block_count = (below_length + 1) // 2
+            if level_number > len(levels):
+                levels.append([])
+            level = levels[level_number - 1]
+            first_changed //= 2
+            del level[first_changed:]
+            for i in range(first_changed, block_count):
+                if level_number == 1:
+                    mask = 1 << below[2 * i]
+                    if 2 * i + 1 < below_length:
+                        mask |= 1 << below[2 * i + 1]
+                else:
+                    mask = below[2 * i]
+                    if 2 * i + 1 < below_length:
+                        mask |= below[2 * i + 1]
+                level.append(mask)
+            below = level
+            below_length = block_count
+            level_number += 1
+        del levels[level_number - 1:]
+
+        self.summary_lengths[(device_id, output_id)] = length
+        return levels
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -135,8 +305,12 @@ class Monitors:
 
         The list of stored signal levels for each monitor is deleted.
         """
+        self.pending_columns = []
+        self.summaries = {}
+        self.summary_lengths = {}
         for device_id, output_id in self.monitors_dictionary:
             self.monitors_dictionary[(device_id, output_id)] = []
+        self.compile_probes()
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -155,23 +329,44 @@ class Monitors:
         else:
             return None
 
-    def display_signals(self):
-        """Display the signal trace(s) in the text console."""
+    def display_signals(self, start=None, stop=None):
+        """Display the signal trace(s) in the text console.
+
+        Only cycles start to stop - 1 are displayed, with the same meaning as
+        a slice, so display_signals(-n) displays the last n cycles. Each
+        trace is translated to text in one step, and all the traces are
+        written at once.
+        """
+        self.flush_signals()
         margin = self.get_margin()
+        lines = []
         for device_id, output_id in self.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
             name_length = len(monitor_name)
             signal_list = self.monitors_dictionary[(device_id, output_id)]
-            print(monitor_name + (margin - name_length) * " ", end=': ')
-            for signal in signal_list:
-                if signal == self.devices.HIGH:
-                    print("-", end="")
-                if signal == self.devices.LOW:
-                    print("_", end="")
-                if signal == self.devices.RISING:
-                    print("/", end="")
-                if signal == self.devices.FALLING:
-                    print("\\", end="")
-                if signal == self.devices.BLANK:
-                    print(" ", end="")
-            print("\n", end="")
+            trace = bytes(signal_list[start:stop]).translate(
+                self.display_table, self.display_ignored)
+            lines.append("".join([monitor_name, (margin - name_length) * " ",
+                                  ": ", trace.decode(), "\n"]))
+        sys.stdout.write("".join(lines))
+
+    def snapshot(self):
+        """Return {(device_id, output_id): trace length} for every monitor."""
+        self.flush_signals()
+        return {monitor: len(signal_list) for monitor, signal_list
+                in self.monitors_dictionary.items()}
+
+    def restore(self, state):
+        """Cut the signal traces back to the lengths returned by snapshot().
+
+        The traces are cut in place. Monitors made since the snapshot was
+        taken are cut back to the same number of cycles as the others, and
+        monitors zapped since then are not brought back.
+        """
+        self.flush_signals()
+        cycles = max(state.values(), default=0)
+        for monitor, signal_list in self.monitors_dictionary.items():
+            del signal_list[state.get(monitor, cycles):]
+            # The summaries may cover cycles that are about to be rerun
+            self.summaries.pop(monitor, None)
+            self.summary_lengths.pop(monitor, None)
@@ -36,12 +36,19 @@ class Names:
 
     get_name_string(self, name_id): Returns the corresponding name string for
                         the name ID. Returns None if the ID is not present.
+
+    split_name(self, name_string): Returns the ways of splitting the name
+                        string at an underscore after a name which is
+                        present.
     """
 
     def __init__(self):
         """Initialise names list."""
         self.name_string_list = []
         self.name_id = []
+
+        # name_index stores {name_string: name_id} for fast lookups
+        self.name_index = {}
         self.error_code_count = 0  # how many error codes have been declared
 
     def unique_error_codes(self, num_error_codes):
@@ -61,10 +68,7 @@ class Names:
         if name_string is not None:
             if type(name_string) is not str:
                 raise TypeError
-        try:
-            self.name_id = self.name_string_list.index(name_string)
-        except ValueError:
-            self.name_id = None
+        self.name_id = self.name_index.get(name_string)
         if self.name_id is not None:
             return self.name_id
         else:
@@ -83,17 +87,16 @@ class Names:
                 if type(name_string) is not str:
                     raise TypeError
 
-            try:
-                name_id = self.name_string_list.index(name_string)
-            except ValueError:
-                name_id = None
+            name_id = self.name_index.get(name_string)
 
             if name_id is not None:
                 name_id_list.append(name_id)
             else:
                 self.name_string_list.append(name_string)
                 # return the last index of name_list
-                name_id_list.append(len(self.name_string_list)-1)
+                name_id = len(self.name_string_list)-1
+                self.name_index[name_string] = name_id
+                name_id_list.append(name_id)
         return name_id_list
 
     def get_name_string(self, name_id):
@@ -108,3 +111,18 @@ class Names:
         else:
             return None
 
+    def split_name(self, name_string):
+        """Return the ways of splitting name_string at an underscore.
+
+        Return a list of (name_id, rest) for each underscore which follows a
+        name present in the names list, where rest is the string after the
+        underscore, as for the devices of subcircuit instances.
+        """
+        splits = []
+        position = name_string.find("_")
+        while position != -1:
+            name_id = self.name_index.get(name_string[:position])
+            if name_id is not None:
+                splits.append((name_id, name_string[position + 1:]))
+            position = name_string.find("_", position + 1)
+        return splits
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Generate circuit definition files of any size.
+
+Used in the Logic Simulator project to make workloads for benchmarks. Each
+generator returns the text of a valid definition file for a parameterised
+circuit, listing the devices so that each one follows the devices driving
+it where the circuit allows.
+
+Usage
+-----
+Write a definition file: netgen.py <workload> <device count> <file path>
+Workloads: adder, counter, lfsr, tree, dag, chain, ring
+
+Functions
+---------
+format_definition(devices, connections, monitors): Returns the text of a
+                                                   definition file.
+
+ripple_carry_adder(bits): Returns a ripple carry adder.
+
+counter(bits): Returns a ripple counter made of D-types.
+
+lfsr(bits): Returns a linear feedback shift register.
+
+gate_tree(inputs, fan_in): Returns a wide tree of AND and OR gates.
+
+random_dag(gates, seed): Returns a random network of gates without feedback.
+
+chain(length): Returns a deep chain of inverters.
+
+ring(length): Returns a ring of inverters.
+
+generate(workload, device_count, seed): Returns the workload with about
+                                        device_count devices.
+"""
+import random
+import sys
+
+# Number of devices added by each unit of a workload's size parameter
+DEVICES_PER_UNIT = {"adder": 7, "counter": 1, "lfsr": 1, "tree": 1,
+                    "dag": 1, "chain": 1, "ring": 1}
+
+
+def format_definition(devices, connections, monitors):
+    """Return the text of a definition file.
+
+    devices is a list of (name, kind, properties) tuples, connections a
+    dictionary of {output: [inputs]} signal names, in the order they are to
+    be written, and monitors a list of signal names.
+    """
+    lines = ["DEVICES"]
+    for name, kind, properties in devices:
+        lines.append(", ".join([name + " = " + kind] +
+                               [str(value) for value in properties]) + ";")
+    lines.append("")
+    lines.append("CONNECT")
+    for output, inputs in connections.items():
+        lines.append(output + " -> " + ", ".join(inputs) + ";")
+    lines.append("")
+    lines.append("MONITOR")
+    lines.extend(monitor + ";" for monitor in monitors)
+    lines.append("")
+    lines.append("END")
+    return "\n".join(lines) + "\n"
+
+
+def ripple_carry_adder(bits):
+    """Return a ripple carry adder of full adders.
+
+    The inputs are switches A0, B0, A1, B1, ... and CIN, and the sum and
+    carry of bit i are X2_i and G3_i.
+    """
+    devices = [("CIN", "SWITCH", [0])]
+    connections = {}
+    carry = "CIN"
+    for bit in range(bits):
+        a, b = "A" + str(bit), "B" + str(bit)
+        x1, x2 = "X1_" + str(bit), "X2_" + str(bit)
+        g1, g2, g3 = "G1_" + str(bit), "G2_" + str(bit), "G3_" + str(bit)
+        devices.extend([(a, "SWITCH", [bit % 2]), (b, "SWITCH", [1]),
+                        (x1, "XOR", []), (g1, "AND", [2]),
+                        (x2, "XOR", []), (g2, "AND", [2]), (g3, "OR", [2])])
+        connections[a] = [x1 + ".I1", g1 + ".I1"]
+        connections[b] = [x1 + ".I2", g1 + ".I2"]
+        connections.setdefault(carry, []).extend([x2 + ".I2", g2 + ".I2"])
+        connections[x1] = [x2 + ".I1", g2 + ".I1"]
+        connections[g1] = [g3 + ".I2"]
+        connections[g2] = [g3 + ".I1"]
+        carry = g3
+    monitors = ["X2_" + str(bit) for bit in range(min(bits, 8))] + [carry]
+    return format_definition(devices, connections, monitors)
+
+
+def counter(bits):
+    """Return a ripple counter of D-types D0, D1, ..., driven by CK."""
+    devices = [("CK", "CLOCK", [1])]
+    connections = {"CK": ["D0.CLK"]}
+    for bit in range(bits):
+        d_type = "D" + str(bit)
+        devices.append((d_type, "DTYPE", []))
+        connections[d_type + ".QBAR"] = [d_type + ".DATA"]
+        if bit + 1 < bits:
+            connections[d_type + ".Q"] = ["D" + str(bit + 1) + ".CLK"]
+    monitors = ["D" + str(bit) + ".Q" for bit in range(min(bits, 8))]
+    return format_definition(devices, connections, monitors)
+
+
+def lfsr(bits):
+    """Return a linear feedback shift register of D-types D0, D1, ...
+
+    The last two stages are fed back to D0 through the XOR gate FB. At
+    least two bits are made.
+    """
+    bits = max(bits, 2)
+    devices = [("CK", "CLOCK", [1]), ("FB", "XOR", [])]
+    connections = {"CK": [], "FB": ["D0.DATA"]}
+    for bit in range(bits):
+        d_type = "D" + str(bit)
+        devices.append((d_type, "DTYPE", []))
+        connections["CK"].append(d_type + ".CLK")
+        if bit + 1 < bits:
+            connections[d_type + ".Q"] = ["D" + str(bit + 1) + ".DATA"]
+    connections.setdefault("D" + str(bits - 1) + ".Q", []).append("FB.I1")
+    connections.setdefault("D" + str(bits - 2) + ".Q", []).append("FB.I2")
+    monitors = ["D" + str(bit) + ".Q" for bit in range(min(bits, 8))]
+    return format_definition(devices, connections, monitors)
+
+
+def gate_tree(inputs, fan_in=16):
+    """Return a tree of gates combining the switches S0, S1, ...
+
+    The levels of the tree alternate between AND and OR gates with up to
+    fan_in inputs each, and the root is the last gate.
+    """
+    devices = [("S" + str(number), "SWITCH", [number % 2])
+               for number in range(inputs)]
+    connections = {}
+    level = [name for name, kind, properties in devices]
+    level_number = 0
+    while len(level) > 1 or level_number == 0:
+        kind = ["AND", "OR"][level_number % 2]
+        next_level = []
+        for first in range(0, len(level), fan_in):
+            gate = "L{}_{}".format(level_number, len(next_level))
+            group = level[first:first + fan_in]
+            devices.append((gate, kind, [len(group)]))
+            for input_number, driver in enumerate(group, 1):
+                connections[driver] = [gate + ".I" + str(input_number)]
+            next_level.append(gate)
+        level = next_level
+        level_number += 1
+    return format_definition(devices, connections, level)
+
+
+def random_dag(gates, seed=None):
+    """Return a random network of two-input gates without feedback.
+
+    Each gate takes its inputs from switches or earlier gates, chosen at
+    random, and gates which drive nothing are monitored, up to eight.
+    """
+    generator = random.Random(seed)
+    switch_count = max(2, gates // 10)
+    devices = [("S" + str(number), "SWITCH", [generator.randrange(2)])
+               for number in range(switch_count)]
+    drivers = [name for name, kind, properties in devices]
+    connections = {}
+    for number in range(gates):
+        gate = "G" + str(number)
+        kind = generator.choice(["AND", "OR", "NAND", "NOR", "XOR"])
+        devices.append((gate, kind, [] if kind == "XOR" else [2]))
+        for input_number in [1, 2]:
+            driver = generator.choice(drivers)
+            connections.setdefault(driver, []).append(
+                gate + ".I" + str(input_number))
+        drivers.append(gate)
+    monitors = [driver for driver in reversed(drivers)
+                if driver not in connections][:8]
+    return format_definition(devices, connections, monitors)
+
+
+def chain(length):
+    """Return a chain of inverters N0, N1, ... driven by the switch SW."""
+    devices = [("SW", "SWITCH", [1])]
+    connections = {}
+    driver = "SW"
+    for number in range(length):
+        inverter = "N" + str(number)
+        devices.append((inverter, "NAND", [1]))
+        connections[driver] = [inverter + ".I1"]
+        driver = inverter
+    return format_definition(devices, connections, [driver])
+
+
+def ring(length):
+    """Return a ring of inverters R0, R1, ... enabled by the switch SW.
+
+    R0 is a two-input NAND gate enabled by SW. A ring of even length
+    settles, and a ring of odd length oscillates.
+    """
+    length = max(length, 2)
+    devices = [("SW", "SWITCH", [1]), ("R0", "NAND", [2])]
+    connections = {"SW": ["R0.I1"]}
+    for number in range(1, length):
+        devices.append(("R" + str(number), "NAND", [1]))
+        connections["R" + str(number - 1)] = ["R" + str(number) + ".I1"]
+    connections["R" + str(length - 1)] = ["R0.I2"]
+    return format_definition(devices, connections, ["R0"])
+
+
+def generate(workload, device_count, seed=None):
+    """Return the definition of the workload with about device_count devices.
+
+    Rings are given an even length, so that they settle.
+    """
+    units = max(1, device_count // DEVICES_PER_UNIT[workload])
+    if workload == "adder":
+        return ripple_carry_adder(units)
+    elif workload == "counter":
+        return counter(units)
+    elif workload == "lfsr":
+        return lfsr(units)
+    elif workload == "tree":
+        return gate_tree(units)
+    elif workload == "dag":
+        return random_dag(units, seed)
+    elif workload == "chain":
+        return chain(units)
+    else:
+        return ring(units + units % 2)
+
+
+def main(arg_list):
+    """Write the definition file given by the command line arguments."""
+    if (len(arg_list) != 3 or arg_list[0] not in DEVICES_PER_UNIT or
+            not arg_list[1].isdigit()):
+        print("Usage: netgen.py <workload> <device count> <file path>\n"
+              "Workloads: " + ", ".join(DEVICES_PER_UNIT))
+        return 1
+    workload, device_count, path = arg_list
+    with open(path, "w") as definition_file:
+        definition_file.write(generate(workload, int(device_count)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,775 @@
+"""Separate the structure of a network from the state of a simulation.
+
+Used in the Logic Simulator project as the simulation engine. A Netlist is
+made once from the parsed devices and holds only structure, in tuples that
+are never changed, so it can be shared by any number of threads, or by
+processes forked from the one holding it. Each simulation keeps its own
+SimulationState, which holds the signals, memories, counters, switch states
+and traces in flat lists. network.Network runs its devices on a Netlist
+too, so there is one set of device rules. Subcircuit instances are run from
+the netlist of their subcircuit, which is shared by all of them.
+
+Classes
+-------
+SimulationState - stores the state of one simulation of a Netlist.
+Netlist - stores the structure of a network and simulates it.
+"""
+import bisect
+import random
+import types
+
+# Next signal when moving towards HIGH and towards LOW, for each signal, as
+# outputs pass through RISING and FALLING. BLANK signals cannot be updated.
+LOW, HIGH, RISING, FALLING, BLANK = range(5)
+NEXT_SIGNALS = ((RISING, LOW), (HIGH, FALLING), (HIGH, FALLING),
+                (RISING, LOW), None)
+
+
+class SimulationState:
+
+    """Store the state of one simulation of a Netlist.
+
+    Parameters
+    ----------
+    signals: list of the signal at each output slot.
+    dtype_memory: list of the memory of each D-type.
+    clock_counters: list of the counter of each clock.
+    siggen_counters: list of [high_counter, low_counter] for each signal
+                     generator.
+    switch_states: list of the state of each switch.
+    monitor_count: number of monitored signals.
+
+    Public methods
+    --------------
+    copy(self): Returns an independent copy of the state.
+    """
+
+    def __init__(self, signals, dtype_memory, clock_counters,
+                 siggen_counters, switch_states, monitor_count):
+        """Store the state and make empty traces."""
+        self.signals = signals
+        self.dtype_memory = dtype_memory
+        self.clock_counters = clock_counters
+        self.siggen_counters = siggen_counters
+        self.switch_states = switch_states
+        self.traces = [bytearray() for _ in range(monitor_count)]
+        self.cycles_completed = 0
+
+        # Number of settling iterations taken by the last cycle, whether the
+        # current iteration has changed no signal, and the IDs of the devices
+        # found oscillating by the last cycle
+        self.last_iterations = 0
+        self.steady_state = True
+        self.oscillating_devices = []
+
+    def copy(self):
+        """Return an independent copy of the state, traces included."""
+        state = SimulationState(
+            list(self.signals), list(self.dtype_memory),
+            list(self.clock_counters),
+            [list(counters) for counters in self.siggen_counters],
+            list(self.switch_states), 0)
+        state.traces = [bytearray(trace) for trace in self.traces]
+        state.cycles_completed = self.cycles_completed
+        return state
+
+
+class Netlist:
+
+    """Store the structure of a network and simulate it.
+
+    Every device output is given a slot in the signals list of a
+    SimulationState, in the order of the devices and their outputs, and each
+    device is stored as a tuple of the slots it reads and writes, grouped by
+    kind in the order they are executed. Each subcircuit instance is given a
+    block of slots after them, laid out as in the netlist of its subcircuit,
+    and a block of the memories and counters in the same way. Its devices
+    are run from the tuples of that netlist, shared by every instance, with
+    the slots offset by the start of the block. The netlist cannot be
+    changed once made.
+
+    The netlist of a subcircuit is made with ports. Its unconnected inputs
+    are its ports, given slots after the outputs of its devices, and each
+    instance copies the signals connected to its ports into them before its
+    devices read them. Its gates are executed in the order of its devices,
+    which the subcircuit levelises, rather than grouped by kind.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class, with every input
+             connected unless ports is True.
+    monitors: instance of the monitors.Monitors() class, or None. Its
+              monitored signals are the ones recorded.
+    ports: True if unconnected inputs are made ports.
+
+    Public methods
+    --------------
+    make_state(self, seed=None): Returns a new SimulationState, starting from
+                                 the state of the devices when the netlist
+                                 was made, or from a cold start.
+
+    find_clocks(self): Returns the signal slot, counter number and half
+                       period of every clock, instances included.
+
+    find_siggens(self): Returns the signal slot and counter number of every
+                        signal generator, instances included.
+
+    get_slot(self, device_id, output_id): Returns the signal slot of an
+                                          output.
+
+    find_slot(self, device_name, output_id): Returns the signal slot of an
+                                             output of a named device.
+
+    get_owner(self, slot): Returns the ID of the device or instance holding
+                           a signal slot.
+
+    get_signal(self, state, device_id, output_id): Returns the signal at an
+                                                   output.
+
+    set_switch(self, state, device_id, level): Sets the state of a switch.
+
+    update_clocks(self, state): Sets clock and signal generator signals to
+                                RISING or FALLING at the start of a cycle.
+
+    execute_switches(self, state): Moves the switch outputs towards the
+                                   switch states.
+
+    execute_d_types(self, state): Updates the D-type memories and outputs.
+
+    execute_clocks(self, state): Finishes the edges of the clocks and signal
+                                 generators.
+
+    execute_gates(self, state): Updates the gate outputs.
+
+    execute_network(self, state): Executes all the devices for one
+                                  simulation cycle.
+
+    find_oscillating_devices(self, states): Returns the IDs of the devices in
+                                    feedback loops which change between the
+                                    given states.
+
+    find_loops(self, device_ids): Returns the IDs of the given devices which
+                                  are in feedback loops among them.
+
+    record_signals(self, state): Records the monitored signals.
+
+    run(self, state, cycles): Executes and records for a number of cycles.
+    """
+
+    def __init__(self, devices, monitors=None, ports=False):
+        """Record the structure of the devices and their current state.
+
+        Raise ValueError if an input is not connected, unless ports is True.
+        """
+        self.names = devices.names
+        slots = {}
+        signals = []
+        for device in devices.devices_list:
+            for output_id, signal in device.outputs.items():
+                slots[(device.device_id, output_id)] = len(signals)
+                signals.append(signal)
+
+        # port_list stores (device_id, input_id) for each unconnected input,
+        # those of instances named after the instance
+        port_list = [(device.device_id, input_id)
+                     for device in devices.devices_list
+                     for input_id, connected_output in device.inputs.items()
+                     if connected_output is None]
+        for instance in devices.instances:
+            for port_number, connected_output in enumerate(instance.inputs):
+                if connected_output is None:
+                    port_list.append(instance.get_port_id(port_number))
+        if port_list and not ports:
+            raise ValueError("unconnected input")
+        port_numbers = {port: number for number, port in enumerate(port_list)}
+        self.port_base = len(signals)
+        # owners stores the device ID of each slot, and None for the ports
+        self.owners = tuple([device_id for device_id, output_id in slots] +
+                            [None] * len(port_list))
+        signals.extend([LOW] * len(port_list))
+
+        switches = []
+        d_types = []
+        clocks = []
+        siggens = []
+        for device in devices.devices_list:
+            kind = device.device_kind
+            if kind == devices.SWITCH:
+                switches.append(device)
+            elif kind == devices.D_TYPE:
+                d_types.append(device)
+            elif kind == devices.CLOCK:
+                clocks.append(device)
+            elif kind == devices.SIGGEN:
+                siggens.append(device)
+        dtype_memory = [device.dtype_memory for device in d_types]
+        clock_counters = [device.clock_counter for device in clocks]
+        siggen_counters = [(device.siggen_high_counter,
+                            device.siggen_low_counter)
+                           for device in siggens]
+        switch_states = [device.switch_state for device in switches]
+
+        # Each instance's block of state follows those of the devices, and
+        # instances stores (instance_id, netlist, signal_base, dtype_base,
+        # clock_base, siggen_base, switch_base, input_slots) for each one,
+        # where input_slots holds the slot connected to each of its ports
+        instances = []
+        for instance in devices.instances:
+            instance_state = instance.state
+            instances.append([
+                instance.instance_id, instance.subcircuit.netlist,
+                len(signals), len(dtype_memory), len(clock_counters),
+                len(siggen_counters), len(switch_states)])
+            signals.extend(instance_state.signals)
+            dtype_memory.extend(instance_state.dtype_memory)
+            clock_counters.extend(instance_state.clock_counters)
+            siggen_counters.extend(tuple(counters) for counters
+                                   in instance_state.siggen_counters)
+            switch_states.extend(instance_state.switch_states)
+        self.instance_numbers = types.MappingProxyType(
+            {instance.instance_id: number
+             for number, instance in enumerate(devices.instances)})
+        self.instance_bases = tuple(record[2] for record in instances)
+        self.slots = types.MappingProxyType(slots)
+        # Instances are looked up by get_slot() before their input slots
+        # are known
+        self.instances = tuple(tuple(record) for record in instances)
+
+        def get_input_slot(device_id, input_id, connected_output):
+            if connected_output is None:
+                return self.port_base + port_numbers[(device_id, input_id)]
+            return self.get_slot(*connected_output)
+
+        def get_port_slot(instance, port_number):
+            connected_output = instance.inputs[port_number]
+            if connected_output is None:
+                return self.port_base + port_numbers[
+                    instance.get_port_id(port_number)]
+            return self.get_slot(*connected_output)
+
+        self.instances = tuple(
+            tuple(record) + (tuple(
+                get_port_slot(instance, port_number)
+                for port_number in range(len(instance.inputs))),)
+            for record, instance in zip(instances, devices.instances))
+
+        # Gates are grouped by kind, unless the netlist is a subcircuit's,
+        # whose gates keep the levelised order of its devices
+        gates = []
+        gate_rules = {devices.AND: (HIGH, HIGH), devices.OR: (LOW, LOW),
+                      devices.NAND: (HIGH, LOW), devices.NOR: (LOW, HIGH),
+                      devices.XOR: (None, None)}
+        for device in devices.devices_list:
+            if device.device_kind in gate_rules:
+                x, y = gate_rules[device.device_kind]
+                gates.append((device.device_kind, (
+                    slots[(device.device_id, None)], tuple(
+                        get_input_slot(device.device_id, input_id,
+                                       connected_output)
+                        for input_id, connected_output
+                        in device.inputs.items()), x, y)))
+        if not ports:
+            gates.sort(key=lambda gate: devices.gate_types.index(gate[0]))
+        self.gates = tuple(gate for kind, gate in gates)
+
+        self.ports = tuple(port_list)
+        self.port_numbers = types.MappingProxyType(port_numbers)
+        self.switch_ids = types.MappingProxyType(
+            {device.device_id: number
+             for number, device in enumerate(switches)})
+        # device_numbers stores the number of each switch, D-type, clock and
+        # signal generator among the devices of its kind
+        self.device_numbers = types.MappingProxyType(
+            {device.device_id: number
+             for kind_devices in [switches, d_types, clocks, siggens]
+             for number, device in enumerate(kind_devices)})
+        self.switch_slots = tuple(slots[(device.device_id, None)]
+                                  for device in switches)
+        self.d_types = tuple(
+            (slots[(device.device_id, devices.Q_ID)],
+             slots[(device.device_id, devices.QBAR_ID)]) +
+            tuple(get_input_slot(device.device_id, input_id,
+                                 device.inputs[input_id])
+                  for input_id in [devices.CLK_ID, devices.DATA_ID,
+                                   devices.SET_ID, devices.CLEAR_ID])
+            for device in d_types)
+        self.clocks = tuple((slots[(device.device_id, None)],
+                             device.clock_half_period) for device in clocks)
+        self.siggens = tuple((slots[(device.device_id, None)],
+                              device.siggen_high_period,
+                              device.siggen_low_period)
+                             for device in siggens)
+        self.clock_slots = tuple(
+            [clock[0] for clock in self.clocks] +
+            [siggen[0] for siggen in self.siggens])
+
+        # blocks stores (netlist, signal_base, dtype_base, clock_base,
+        # siggen_base, switch_base, copies) for the devices of this netlist
+        # and then those of each instance, nested ones included, in the
+        # order they are executed. copies holds (port_slot, slot) for each
+        # port whose signal is copied in before the devices are executed.
+        blocks = [(self, 0, 0, 0, 0, 0, ())]
+        for (instance_id, netlist, signal_base, dtype_base, clock_base,
+             siggen_base, switch_base, input_slots) in self.instances:
+            bases = (signal_base, dtype_base, clock_base, siggen_base,
+                     switch_base)
+            for number, block in enumerate(netlist.blocks):
+                if number == 0:
+                    copies = tuple(
+                        (signal_base + netlist.port_base + port_number, slot)
+                        for port_number, slot in enumerate(input_slots))
+                else:
+                    copies = tuple((signal_base + port_slot,
+                                    signal_base + slot)
+                                   for port_slot, slot in block[6])
+                blocks.append((block[0],) + tuple(
+                    base + block_base
+                    for base, block_base in zip(bases, block[1:6])) +
+                              (copies,))
+        self.blocks = tuple(blocks)
+
+        if monitors is None:
+            self.monitor_slots = ()
+        else:
+            self.monitor_slots = tuple(
+                self.get_slot(*monitor)
+                for monitor in monitors.monitors_dictionary)
+
+        # The state of the devices when the netlist was made
+        self.initial_signals = tuple(signals)
+        self.initial_dtype_memory = tuple(dtype_memory)
+        self.initial_clock_counters = tuple(clock_counters)
+        self.initial_siggen_counters = tuple(siggen_counters)
+        self.initial_switch_states = tuple(switch_states)
+
+        # Whether any devices are in a feedback loop, so that an instance of
+        # a subcircuit with one can be taken as a loop of its own
+        self.feedback = bool(self.find_loops(
+            set(self.owners[:self.port_base]) |
+            set(self.instance_numbers)))
+        self.frozen = True
+
+    def __setattr__(self, name, value):
+        """Refuse to change the netlist once it has been made."""
+        if getattr(self, "frozen", False):
+            raise AttributeError("Netlist cannot be changed")
+        super().__setattr__(name, value)
+
+    def make_state(self, seed=None):
+        """Return a new SimulationState.
+
+        The state is that of the devices when the netlist was made, unless
+        seed is given, in which case the D-types, clocks and signal
+        generators are given a cold start as by Devices.cold_startup(seed).
+        """
+        state = SimulationState(
+            list(self.initial_signals), list(self.initial_dtype_memory),
+            list(self.initial_clock_counters),
+            [list(counters) for counters in self.initial_siggen_counters],
+            list(self.initial_switch_states), len(self.monitor_slots))
+        if seed is not None:
+            generator = random.Random(seed)
+            clocks = self.find_clocks()
+            dtype_count = len(state.dtype_memory)
+            levels = generator.choices([LOW, HIGH],
+                                       k=dtype_count + len(clocks))
+            state.dtype_memory = levels[:dtype_count]
+            for level, (slot, number, half_period) in zip(
+                    levels[dtype_count:], clocks):
+                state.signals[slot] = level
+                state.clock_counters[number] = generator.randrange(
+                    half_period)
+            for slot, number in self.find_siggens():
+                state.signals[slot] = HIGH
+                state.siggen_counters[number] = [0, 1]
+        return state
+
+    def find_clocks(self):
+        """Return a list of (slot, number, half_period) for every clock.
+
+        slot is the signal slot of the clock and number the position of its
+        counter in the state. The clocks of instances follow those of the
+        devices, in the order of their blocks.
+        """
+        return [(signal_base + slot, number, half_period)
+                for (netlist, signal_base, dtype_base, clock_base,
+                     siggen_base, switch_base, copies) in self.blocks
+                for number, (slot, half_period)
+                in enumerate(netlist.clocks, clock_base)]
+
+    def find_siggens(self):
+        """Return a list of (slot, number) for every signal generator.
+
+        The signal generators are listed as the clocks are in find_clocks().
+        """
+        return [(signal_base + siggen[0], number)
+                for (netlist, signal_base, dtype_base, clock_base,
+                     siggen_base, switch_base, copies) in self.blocks
+                for number, siggen in enumerate(netlist.siggens, siggen_base)]
+
+    def get_slot(self, device_id, output_id):
+        """Return the signal slot of the output, or None if there is none.
+
+        Devices of instances are found by their names, as in find_slot().
+        """
+        slot = self.slots.get((device_id, output_id))
+        if slot is None and self.instances:
+            device_name = self.names.get_name_string(device_id)
+            if device_name is not None:
+                slot = self.find_slot(device_name, output_id)
+        return slot
+
+    def find_slot(self, device_name, output_id):
+        """Return the signal slot of an output of the named device.
+
+        A device of an instance named H1 of a subcircuit is named H1_ and
+        then its name in the subcircuit. Return None if there is no such
+        output.
+        """
+        slot = self.slots.get((self.names.query(device_name), output_id))
+        if slot is not None:
+            return slot
+        for instance_id, local_name in self.names.split_name(device_name):
+            number = self.instance_numbers.get(instance_id)
+            if number is not None:
+                record = self.instances[number]
+                local_slot = record[1].find_slot(local_name, output_id)
+                if local_slot is not None:
+                    return record[2] + local_slot
+        return None
+
+    def get_owner(self, slot):
+        """Return the ID of the device or instance holding the signal slot.
+
+        Return None if the slot is a port.
+        """
+        if slot < len(self.owners):
+            return self.owners[slot]
+        number = bisect.bisect_right(self.instance_bases, slot) - 1
+        return self.instances[number][0]
+
+    def get_signal(self, state, device_id, output_id):
+        """Return the signal at the output, or None if there is none."""
+        slot = self.get_slot(device_id, output_id)
+        if slot is None:
+            return None
+        return state.signals[slot]
+
+    def set_switch(self, state, device_id, level):
+        """Set the state of the switch. Return True if successful."""
+        number = self.switch_ids.get(device_id)
+        if number is None:
+            return False
+        state.switch_states[number] = level
+        return True
+
+    def update_clocks(self, state):
+        """Set clock and signal generator signals to RISING or FALLING.
+
+        This is done once at the start of each simulation cycle, for those
+        which have counted to the end of their period.
+        """
+        signals = state.signals
+        clock_counters = state.clock_counters
+        siggen_counters = state.siggen_counters
+        for (netlist, signal_base, dtype_base, clock_base, siggen_base,
+             switch_base, copies) in self.blocks:
+            for number, (slot, half_period) in enumerate(netlist.clocks,
+                                                         clock_base):
+                slot += signal_base
+                if clock_counters[number] == half_period:
+                    clock_counters[number] = 0
+                    if signals[slot] == HIGH:
+                        signals[slot] = FALLING
+                    elif signals[slot] == LOW:
+                        signals[slot] = RISING
+                clock_counters[number] += 1
+            for number, (slot, high_period, low_period) in enumerate(
+                    netlist.siggens, siggen_base):
+                slot += signal_base
+                counters = siggen_counters[number]
+                if signals[slot] == HIGH:
+                    if counters[0] == high_period:
+                        counters[0] = 0
+                        signals[slot] = FALLING
+                    counters[0] += 1
+                elif signals[slot] == LOW:
+                    if counters[1] == low_period:
+                        counters[1] = 0
+                        signals[slot] = RISING
+                    counters[1] += 1
+
+    def execute_switches(self, state):
+        """Move the switch outputs towards the switch states.
+
+        Return True if successful. Set state.steady_state to False if any
+        signal changes, as do the other execute methods.
+        """
+        signals = state.signals
+        switch_states = state.switch_states
+        for (netlist, signal_base, dtype_base, clock_base, siggen_base,
+             switch_base, copies) in self.blocks:
+            for number, slot in enumerate(netlist.switch_slots, switch_base):
+                slot += signal_base
+                next_signals = NEXT_SIGNALS[signals[slot]]
+                if next_signals is None:
+                    return False
+                new_signal = next_signals[switch_states[number] == LOW]
+                if new_signal != signals[slot]:
+                    signals[slot] = new_signal
+                    state.steady_state = False
+        return True
+
+    def execute_d_types(self, state):
+        """Update the D-type memories and move their outputs towards them.
+
+        Return True if successful.
+        """
+        signals = state.signals
+        dtype_memory = state.dtype_memory
+        for (netlist, signal_base, dtype_base, clock_base, siggen_base,
+             switch_base, copies) in self.blocks:
+            for port_slot, slot in copies:
+                signals[port_slot] = signals[slot]
+            for number, (q_slot, qbar_slot, clock_slot, data_slot, set_slot,
+                         clear_slot) in enumerate(netlist.d_types,
+                                                  dtype_base):
+                if signals[signal_base + clock_slot] == RISING:
+                    data = signals[signal_base + data_slot]
+                    if data in (HIGH, FALLING):
+                        dtype_memory[number] = HIGH
+                    elif data in (LOW, RISING):
+                        dtype_memory[number] = LOW
+                if signals[signal_base + set_slot] == HIGH:
+                    dtype_memory[number] = HIGH
+                if signals[signal_base + clear_slot] == HIGH:
+                    dtype_memory[number] = LOW
+                memory = dtype_memory[number]
+                for slot, to_low in [(signal_base + q_slot, memory == LOW),
+                                     (signal_base + qbar_slot,
+                                      memory == HIGH)]:
+                    next_signals = NEXT_SIGNALS[signals[slot]]
+                    if next_signals is None:
+                        return False
+                    new_signal = next_signals[to_low]
+                    if new_signal != signals[slot]:
+                        signals[slot] = new_signal
+                        state.steady_state = False
+        return True
+
+    def execute_clocks(self, state):
+        """Finish the edges of the clocks, then the signal generators.
+
+        Return True if successful.
+        """
+        signals = state.signals
+        for (netlist, signal_base, dtype_base, clock_base, siggen_base,
+             switch_base, copies) in self.blocks:
+            for slot in netlist.clock_slots:
+                slot += signal_base
+                signal = signals[slot]
+                if signal == RISING:
+                    signals[slot] = HIGH
+                    state.steady_state = False
+                elif signal == FALLING:
+                    signals[slot] = LOW
+                    state.steady_state = False
+                elif signal == BLANK:
+                    return False
+        return True
+
+    def execute_gates(self, state):
+        """Move the gate outputs towards their logic functions.
+
+        Return True if successful.
+        """
+        signals = state.signals
+        for (netlist, signal_base, dtype_base, clock_base, siggen_base,
+             switch_base, copies) in self.blocks:
+            for port_slot, slot in copies:
+                signals[port_slot] = signals[slot]
+            for output_slot, input_slots, x, y in netlist.gates:
+                output_slot += signal_base
+                if x is None:  # XOR gate
+                    target = (HIGH if signals[signal_base + input_slots[0]] !=
+                              signals[signal_base + input_slots[1]] else LOW)
+                else:
+                    target = y
+                    for slot in input_slots:
+                        if signals[signal_base + slot] != x:
+                            target = HIGH - y
+                            break
+                next_signals = NEXT_SIGNALS[signals[output_slot]]
+                if next_signals is None:
+                    return False
+                new_signal = next_signals[target == LOW]
+                if new_signal != signals[output_slot]:
+                    signals[output_slot] = new_signal
+                    state.steady_state = False
+        return True
+
+    def execute_network(self, state):
+        """Execute all the devices for one simulation cycle.
+
+        Return True if successful and the network does not oscillate. If it
+        oscillates, the IDs of the devices in feedback loops are stored in
+        state.oscillating_devices.
+        """
+        self.update_clocks(state)
+
+        # A network state which recurs before the signals settle means the
+        # network oscillates. Networks which settle need one or two
+        # iterations, so states are only recorded from the second.
+        seen_states = {}
+        states = []
+        state.oscillating_devices = []
+        iteration_limit = 20
+        iterations = 0
+        while iterations < iteration_limit:
+            iterations += 1
+            state.last_iterations = iterations
+            state.steady_state = True
+
+            # D-types are executed before the clocks finish their edges, to
+            # catch the rising edge of the clock
+            if not (self.execute_switches(state) and
+                    self.execute_d_types(state) and
+                    self.execute_clocks(state) and
+                    self.execute_gates(state)):
+                return False
+            if state.steady_state:
+                return True
+            if iterations > 1:
+                network_state = (tuple(state.signals),
+                                 tuple(state.dtype_memory))
+                if network_state in seen_states:
+                    state.oscillating_devices = \
+                        self.find_oscillating_devices(
+                            states[seen_states[network_state]:])
+                    return False
+                seen_states[network_state] = len(states)
+                states.append(network_state)
+
+        state.oscillating_devices = self.find_oscillating_devices(
+            states[-2:])
+        return False
+
+    def find_oscillating_devices(self, states):
+        """Return the IDs of the oscillating devices.
+
+        states is a list of (signals, dtype_memory) tuples of a state. The
+        devices and instances whose signals or memories change between them
+        are searched for feedback loops by find_loops().
+        """
+        get_owner = self.get_owner
+        dtype_bases = [record[3] for record in self.instances]
+        changed = set()
+        for signals, dtype_memory in states[1:]:
+            changed.update(get_owner(slot) for slot, (signal, first_signal)
+                           in enumerate(zip(signals, states[0][0]))
+                           if signal != first_signal)
+            for number, (memory, first_memory) in enumerate(
+                    zip(dtype_memory, states[0][1])):
+                if memory != first_memory:
+                    if number < len(self.d_types):
+                        changed.add(self.owners[self.d_types[number][0]])
+                    else:
+                        changed.add(self.instances[bisect.bisect_right(
+                            dtype_bases, number) - 1][0])
+        changed.discard(None)
+        return self.find_loops(changed)
+
+    def find_loops(self, device_ids):
+        """Return the IDs of the given devices in feedback loops among them.
+
+        device_ids is a set of device and instance IDs, which are searched
+        for strongly connected components. An instance is taken as one
+        device, in a loop of its own if its subcircuit has one. The devices
+        in loops are returned in the order the devices were made, followed
+        by the instances. Devices which only follow a loop are left out.
+        """
+        get_owner = self.get_owner
+
+        # Devices are given by the slot of their first output, and their
+        # drivers by the slots of their inputs
+        input_slots = [(output_slot, input_slots)
+                       for output_slot, input_slots, x, y in self.gates]
+        input_slots.extend((d_type[0], d_type[2:]) for d_type in self.d_types)
+        for (instance_id, netlist, signal_base, dtype_base, clock_base,
+             siggen_base, switch_base, port_slots) in self.instances:
+            if len(netlist.initial_signals):
+                if netlist.feedback:
+                    port_slots += (signal_base,)
+                input_slots.append((signal_base, port_slots))
+        loads = {device_id: [] for device_id in device_ids}
+        drivers = {device_id: [] for device_id in device_ids}
+        for output_slot, slots in input_slots:
+            device_id = get_owner(output_slot)
+            if device_id not in device_ids:
+                continue
+            for slot in slots:
+                driver_id = get_owner(slot)
+                if driver_id in device_ids:
+                    loads[driver_id].append(device_id)
+                    drivers[device_id].append(driver_id)
+
+        # Kosaraju's algorithm: order the devices by when their depth first
+        # search finishes, then collect components along the drivers
+        finished = []
+        visited = set()
+        for start_id in device_ids:
+            if start_id in visited:
+                continue
+            visited.add(start_id)
+            stack = [(start_id, iter(loads[start_id]))]
+            while stack:
+                device_id, remaining_loads = stack[-1]
+                for load_id in remaining_loads:
+                    if load_id not in visited:
+                        visited.add(load_id)
+                        stack.append((load_id, iter(loads[load_id])))
+                        break
+                else:
+                    stack.pop()
+                    finished.append(device_id)
+
+        in_loops = set()
+        assigned = set()
+        for start_id in reversed(finished):
+            if start_id in assigned:
+                continue
+            assigned.add(start_id)
+            component = [start_id]
+            stack = [start_id]
+            while stack:
+                for driver_id in drivers[stack.pop()]:
+                    if driver_id not in assigned:
+                        assigned.add(driver_id)
+                        component.append(driver_id)
+                        stack.append(driver_id)
+            if len(component) > 1 or start_id in drivers[start_id]:
+                in_loops.update(component)
+
+        return [device_id for device_id
+                in list(dict.fromkeys(self.owners)) + list(
+                    self.instance_numbers)
+                if device_id in in_loops]
+
+    def record_signals(self, state):
+        """Record the current signal of every monitored output."""
+        signals = state.signals
+        for trace, slot in zip(state.traces, self.monitor_slots):
+            trace.append(signals[slot])
+
+    def run(self, state, cycles):
+        """Execute and record for cycles cycles.
+
+        Return True if successful, or False as soon as the network
+        oscillates.
+        """
+        for _ in range(cycles):
+            if not self.execute_network(state):
+                return False
+            self.record_signals(state)
+            state.cycles_completed += 1
+        return True
@@ -6,6 +6,7 @@ Classes
 --------
 Network - builds and executes the network.
 """
+from netlist import Netlist
 
 
 class Network:
@@ -14,7 +15,9 @@ class Network:
 
     This class contains many functions required for connecting devices together
     in the network, getting information about connections, and executing all
-    the devices in the network.
+    the devices in the network. The devices are executed by a
+    netlist.Netlist made from them, whose state is copied from the devices,
+    and from the subcircuit instances, before each cycle and back after it.
 
     Parameters
     ----------
@@ -35,33 +38,26 @@ class Network:
                     second_port_id): Connects the first device to the second
                                      device.
 
-    check_network(self): Checks if all inputs in the network are connected.
+    check_connection(self, first_device, first_port_id, second_device,
+                     second_port_id): Returns the error in a connection, if
+                                      any, and the input and output to
+                                      connect.
+
+    make_connections(self, connections): Makes many connections in one pass
+                                         and returns the error for each one.
 
-    update_signal(self, signal, target): Updates the signal in the direction of
-                                         the target.
+    check_network(self): Checks if all inputs in the network are connected.
 
     invert_signal(self, signal): Returns the inverse of the signal if the
                                  signal is HIGH or LOW.
 
-    execute_switch(self, device_id): Simulates a switch press.
-
-    execute_gate(self, device_id, x=None, y=None): Simulates a logic gate and
-                                              updates its output signal value.
-
-    execute_d_type(self, device_id): Simulates a D-type device and updates its
-                                     output signal value.
-
-    execute_clock(self, device_id): Simulates a clock and updates its output
-                                    signal value.
+    get_netlist(self): Returns the netlist which executes the devices, made
+                       again if they have changed.
 
-    update_clocks(self): If it is time to do so, sets clock signals to RISING
-                         or FALLING.
+    load_state(self): Copies the state of the devices into the netlist
+                      state.
 
-    execute_siggen(self, device_id): Simulates a signal generator and updates
-                                    its output signal value.
-
-    update_siggen(self): If it is time to do so, sets signal generator signals
-                         to RISING  or FALLING.
+    store_state(self): Copies the netlist state back into the devices.
 
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
@@ -77,6 +73,18 @@ class Network:
          self.DEVICE_ABSENT] = self.names.unique_error_codes(6)
         self.steady_state = True  # for checking if signals have settled
 
+        # IDs of the devices found oscillating by the last execute_network()
+        self.oscillating_devices = []
+
+        # Number of settling iterations taken by the last execute_network()
+        self.last_iterations = 0
+
+        # The netlist which executes the devices, its state, and the value of
+        # devices.structure_changes it was made at
+        self.netlist = None
+        self.state = None
+        self.netlist_changes = None
+
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
 
@@ -122,9 +130,25 @@ class Network:
         """
         first_device = self.devices.get_device(first_device_id)
         second_device = self.devices.get_device(second_device_id)
+        [error_type, input_device, input_id, connected_output] = \
+            self.check_connection(first_device, first_port_id, second_device,
+                                  second_port_id)
+        if error_type == self.NO_ERROR:
+            input_device.inputs[input_id] = connected_output
+            self.devices.structure_changes += 1
+        return error_type
 
+    def check_connection(self, first_device, first_port_id, second_device,
+                         second_port_id):
+        """Check a connection between the ports of two Device objects.
+
+        Either device may be None if it does not exist. Return a list of the
+        error, the device and ID of the input to connect, and the (device ID,
+        port ID) of the output to connect it to. Only the error is given if
+        the connection cannot be made, followed by Nones.
+        """
         if first_device is None or second_device is None:
-            error_type = self.DEVICE_ABSENT
+            return [self.DEVICE_ABSENT, None, None, None]
 
         elif first_port_id in first_device.inputs:
             if first_device.inputs[first_port_id] is not None:
@@ -134,10 +158,8 @@ class Network:
                 # Both ports are inputs
                 error_type = self.INPUT_TO_INPUT
             elif second_port_id in second_device.outputs:
-                # Make connection
-                first_device.inputs[first_port_id] = (second_device_id,
-                                                      second_port_id)
-                error_type = self.NO_ERROR
+                return [self.NO_ERROR, first_device, first_port_id,
+                        (second_device.device_id, second_port_id)]
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
 
@@ -150,48 +172,58 @@ class Network:
                     # Input is already in a connection
                     error_type = self.INPUT_CONNECTED
                 else:
-                    second_device.inputs[second_port_id] = (first_device_id,
-                                                            first_port_id)
-                    error_type = self.NO_ERROR
+                    return [self.NO_ERROR, second_device, second_port_id,
+                            (first_device.device_id, first_port_id)]
             else:
                 error_type = self.PORT_ABSENT
 
         else:  # first_port_id not a valid input or output port
             error_type = self.PORT_ABSENT
 
-        return error_type
+        return [error_type, None, None, None]
+
+    def make_connections(self, connections):
+        """Make many connections in one pass.
+
+        connections is an iterable of (first_device_id, first_port_id,
+        second_device_id, second_port_id) tuples, as in make_connection().
+        The devices are looked up in the device map directly, and each
+        connection is checked as make_connection() would check it, against
+        the connections made earlier in the same call, and made as soon as
+        it passes. Return a list of the errors, one for each connection,
+        with self.NO_ERROR for each connection that was made.
+        """
+        device_map = self.devices.device_map
+        check_connection = self.check_connection
+        errors = []
+        for (first_device_id, first_port_id, second_device_id,
+             second_port_id) in connections:
+            [error_type, input_device, input_id, connected_output] = \
+                check_connection(device_map.get(first_device_id),
+                                 first_port_id,
+                                 device_map.get(second_device_id),
+                                 second_port_id)
+            if error_type == self.NO_ERROR:
+                input_device.inputs[input_id] = connected_output
+            errors.append(error_type)
+        self.devices.structure_changes += 1
+        return errors
 
     def check_network(self):
-        """Return True if all inputs in the network are connected."""
+        """Return True if all inputs in the network are connected.
+
+        The ports of subcircuit instances are included.
+        """
         for device_id in self.devices.find_devices():
             device = self.devices.get_device(device_id)
             for input_id in device.inputs:
                 if self.get_connected_output(device_id, input_id) is None:
                     return False
+        for instance in self.devices.instances:
+            if None in instance.inputs:
+                return False
         return True
 
-    def update_signal(self, signal, target):
-        """Update the signal in the direction of the target.
-
-        Return updated signal, and set steady_state to false if the new signal
-        is different from the old signal.
-        """
-        if signal in [self.devices.LOW, self.devices.FALLING]:
-            if target == self.devices.LOW:
-                new_signal = self.devices.LOW
-            else:
-                new_signal = self.devices.RISING
-        elif signal in [self.devices.HIGH, self.devices.RISING]:
-            if target == self.devices.LOW:
-                new_signal = self.devices.FALLING
-            else:
-                new_signal = self.devices.HIGH
-        else:
-            return None
-        if signal != new_signal:
-            self.steady_state = False
-        return new_signal
-
     def invert_signal(self, signal):
         """Return the inverse of the signal if the signal is HIGH or LOW.
 
@@ -204,261 +236,110 @@ class Network:
         else:
             return None
 
-    def execute_switch(self, device_id):
-        """Simulate a switch.
+    def get_netlist(self):
+        """Return the Netlist which executes the devices.
 
-        The output signal is updated to the switch_state target. Return True
-        if successful.
+        The netlist is made again whenever a device, port or connection has
+        been added since it was made, and the devices of each kind are listed
+        in the order of its state. Return None if an input is not connected.
         """
-        device = self.devices.get_device(device_id)
-        target = device.switch_state
-        signal = self.get_output_signal(device_id, output_id=None)
-        # Update and store the updated signal
-        updated_signal = self.update_signal(signal, target)
-        if updated_signal is None:  # signal update is unsuccessful
-            return False
-        else:
-            device.outputs[None] = updated_signal
-            return True
-
-    def execute_gate(self, device_id, x=None, y=None):
-        """Simulate a logic gate and update its output signal value.
-
-        The rule is: if all its inputs are x, then its output is y, else its
-        output is the inverse of y.
-        Note: (x,y) pairs for AND, OR, NOR, NAND, XOR are: (HIGH, HIGH), (LOW,
-        LOW), (LOW, HIGH), (HIGH, LOW), (None, None).
-        Return True if successful.
+        if self.netlist_changes != self.devices.structure_changes:
+            self.netlist_changes = self.devices.structure_changes
+            try:
+                self.netlist = Netlist(self.devices)
+            except ValueError:  # an input is not connected
+                self.netlist = None
+                return None
+            self.state = self.netlist.make_state()
+            devices_list = self.devices.devices_list
+            self.output_dictionaries = [device.outputs
+                                        for device in devices_list]
+            self.output_links = [
+                (device.outputs, output_id, self.netlist.slots[
+                    (device.device_id, output_id)])
+                for device in devices_list for output_id in device.outputs]
+            [self.switch_devices, self.d_type_devices, self.clock_devices,
+             self.siggen_devices] = [
+                [device for device in devices_list
+                 if device.device_kind == device_kind]
+                for device_kind in [self.devices.SWITCH, self.devices.D_TYPE,
+                                    self.devices.CLOCK, self.devices.SIGGEN]]
+        return self.netlist
+
+    def load_state(self):
+        """Copy the state of the devices into the netlist state.
+
+        Switches, restored snapshots and cold starts change the devices
+        between cycles, so this is done before every cycle. The state of
+        each subcircuit instance follows that of the devices.
         """
-        device = self.devices.get_device(device_id)
-        input_signal_list = []
-        for input_id in device.inputs:
-            input_signal = self.get_input_signal(device_id, input_id)
-            if input_signal is None:  # this input is unconnected
-                return False
-            input_signal_list.append(input_signal)
-
-            if device.device_kind != self.devices.XOR:
-                if input_signal != x:
-                    output_signal = self.invert_signal(y)
-                    break
-                output_signal = y
-
-        if device.device_kind == self.devices.XOR:
-            # Output is high only if both inputs are different
-            if input_signal_list[0] == input_signal_list[1]:  # assume 2 inputs
-                output_signal = self.devices.LOW
-            else:
-                output_signal = self.devices.HIGH
-
-        # Update and store the new signal
-        signal = self.get_output_signal(device_id, None)
-        target = output_signal
-        updated_signal = self.update_signal(signal, target)
-        if updated_signal is None:  # if the update is unsuccessful
-            return False
-        device.outputs[None] = updated_signal
-        return True
-
-    def execute_d_type(self, device_id):
-        """Simulate a D-type device and update its output signal value.
-
-        Return True if successful.
+        state = self.state
+        state.signals = [signal for outputs in self.output_dictionaries
+                         for signal in outputs.values()]
+        state.dtype_memory = [device.dtype_memory
+                              for device in self.d_type_devices]
+        state.clock_counters = [device.clock_counter
+                                for device in self.clock_devices]
+        state.siggen_counters = [
+            [device.siggen_high_counter, device.siggen_low_counter]
+            for device in self.siggen_devices]
+        state.switch_states = [device.switch_state
+                               for device in self.switch_devices]
+        for instance in self.devices.instances:
+            instance_state = instance.state
+            state.signals.extend(instance_state.signals)
+            state.dtype_memory.extend(instance_state.dtype_memory)
+            state.clock_counters.extend(instance_state.clock_counters)
+            state.siggen_counters.extend(
+                list(counters) for counters in instance_state.siggen_counters)
+            state.switch_states.extend(instance_state.switch_states)
+
+    def store_state(self):
+        """Copy the netlist state back into the devices.
+
+        The outputs dictionaries are updated in place, so the monitors see
+        the new signals.
         """
-        device = self.devices.get_device(device_id)
-
-        for input_id in device.inputs:
-            input_signal = self.get_input_signal(device_id, input_id)
-            if input_signal is None:  # if the input is unconnected
-                return False
-            if input_id == self.devices.CLK_ID:
-                clock_signal = input_signal
-            elif input_id == self.devices.DATA_ID:
-                data_signal = input_signal
-            elif input_id == self.devices.CLEAR_ID:
-                clear_signal = input_signal
-            elif input_id == self.devices.SET_ID:
-                set_signal = input_signal
-
-        # Set D-type memory depending on the input signal
-        if clock_signal == self.devices.RISING:
-            if data_signal in [self.devices.HIGH, self.devices.FALLING]:
-                device.dtype_memory = self.devices.HIGH
-            elif data_signal in [self.devices.LOW, self.devices.RISING]:
-                device.dtype_memory = self.devices.LOW
-        if set_signal == self.devices.HIGH:
-            device.dtype_memory = self.devices.HIGH
-        if clear_signal == self.devices.HIGH:
-            device.dtype_memory = self.devices.LOW
-
-        if self.devices.Q_ID not in device.outputs:
-            if self.devices.QBAR_ID not in device.outputs:
-                return False
-        Q_signal = device.outputs[self.devices.Q_ID]
-        QBAR_signal = device.outputs[self.devices.QBAR_ID]
-
-        # Update the output towards its memory
-        new_Q = self.update_signal(Q_signal, device.dtype_memory)
-        new_QBAR = self.update_signal(QBAR_signal,
-                                      self.invert_signal(device.dtype_memory))
-        if new_Q is None or new_QBAR is None:  # if the update is unsuccessful
-            return False
-        device.outputs[self.devices.Q_ID] = new_Q
-        device.outputs[self.devices.QBAR_ID] = new_QBAR
-
-        return True
-
-    def execute_clock(self, device_id):
-        """Simulate a clock and update its output signal value.
-
-        Return True if successful.
-        """
-        device = self.devices.get_device(device_id)
-        output_signal = device.outputs[None]  # output ID is None
-
-        if output_signal == self.devices.RISING:
-            new_signal = self.update_signal(output_signal, self.devices.HIGH)
-            if new_signal is None:  # update is unsuccessful
-                return False
-            device.outputs[None] = new_signal
-            return True
-
-        elif output_signal == self.devices.FALLING:
-            new_signal = self.update_signal(output_signal, self.devices.LOW)
-            if new_signal is None:  # update is unsuccessful
-                return False
-            device.outputs[None] = new_signal
-            return True
-
-        elif output_signal in [self.devices.HIGH, self.devices.LOW]:
-            return True
-
-        else:
-            return False
-
-    def update_clocks(self):
-        """If it is time to do so, set clock signals to RISING or FALLING."""
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        for device_id in clock_devices:
-            device = self.devices.get_device(device_id)
-            if device.clock_counter == device.clock_half_period:
-                device.clock_counter = 0
-                output_signal = self.get_output_signal(device_id,
-                                                       output_id=None)
-                if output_signal == self.devices.HIGH:
-                    device.outputs[None] = self.devices.FALLING
-                elif output_signal == self.devices.LOW:
-                    device.outputs[None] = self.devices.RISING
-            device.clock_counter += 1
-
-    def execute_siggen(self, device_id):
-        """Simulate a signal generator and update its output signal value.
-
-        Return True if successful.
-        """
-        device = self.devices.get_device(device_id)
-        output_signal = device.outputs[None]  # output ID is None
-
-        if output_signal == self.devices.RISING:
-            new_signal = self.update_signal(output_signal, self.devices.HIGH)
-            if new_signal is None:  # update is unsuccessful
-                return False
-            device.outputs[None] = new_signal
-            return True
-
-        elif output_signal == self.devices.FALLING:
-            new_signal = self.update_signal(output_signal, self.devices.LOW)
-            if new_signal is None:  # update is unsuccessful
-                return False
-            device.outputs[None] = new_signal
-            return True
-
-        elif output_signal in [self.devices.HIGH, self.devices.LOW]:
-            return True
-
-        else:
-            return False
-
-    def update_siggen(self):
-        """If it is time to do so, set signal generator
-        signals to RISING or FALLING."""
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
-        for device_id in siggen_devices:
-            device = self.devices.get_device(device_id)
-            output_signal = self.get_output_signal(device_id,
-                                                   output_id=None)
-            if output_signal == self.devices.HIGH:
-                if device.siggen_high_counter == device.siggen_high_period:
-                    device.siggen_high_counter = 0
-                    device.outputs[None] = self.devices.FALLING
-                device.siggen_high_counter += 1
-            elif output_signal == self.devices.LOW:
-                if device.siggen_low_counter == device.siggen_low_period:
-                    device.siggen_low_counter = 0
-                    device.outputs[None] = self.devices.RISING
-                device.siggen_low_counter += 1
+        state = self.state
+        signals = state.signals
+        for outputs, output_id, slot in self.output_links:
+            outputs[output_id] = signals[slot]
+        for device, memory in zip(self.d_type_devices, state.dtype_memory):
+            device.dtype_memory = memory
+        for device, counter in zip(self.clock_devices,
+                                   state.clock_counters):
+            device.clock_counter = counter
+        for device, [high_counter, low_counter] in zip(
+                self.siggen_devices, state.siggen_counters):
+            device.siggen_high_counter = high_counter
+            device.siggen_low_counter = low_counter
+        for instance, record in zip(self.devices.instances,
+                                    self.netlist.instances):
+            instance_state = instance.state
+            for values, state_values, base in [
+                    (instance_state.signals, signals, record[2]),
+                    (instance_state.dtype_memory, state.dtype_memory,
+                     record[3]),
+                    (instance_state.clock_counters, state.clock_counters,
+                     record[4]),
+                    (instance_state.siggen_counters, state.siggen_counters,
+                     record[5])]:
+                values[:] = state_values[base:base + len(values)]
 
     def execute_network(self):
         """Execute all the devices in the network for one simulation cycle.
 
-        Return True if successful and the network does not oscillate.
+        Return True if successful and the network does not oscillate. If it
+        oscillates, the IDs of the devices in feedback loops are stored in
+        oscillating_devices.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
-
-        # This sets clock signals to RISING or FALLING, where necessary
-        self.update_clocks()
-        self.update_siggen()
-
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
-
-        iterations = 0
-        while iterations < iteration_limit:
-            iterations += 1
-            self.steady_state = True
-
-            for device_id in switch_devices:  # execute switch devices
-                if not self.execute_switch(device_id):
-                    return False
-            # Execute D-type devices before clocks to catch the rising edge of
-            # the clock
-            for device_id in d_type_devices:  # execute DTYPE devices
-                if not self.execute_d_type(device_id):
-                    return False
-            for device_id in clock_devices:  # complete clock executions
-                if not self.execute_clock(device_id):
-                    return False
-            for device_id in siggen_devices:
-                if not self.execute_siggen(device_id):
-                    return False
-            for device_id in and_devices:  # execute AND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in or_devices:  # execute OR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nand_devices:  # execute NAND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nor_devices:  # execute NOR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in xor_devices:  # execute XOR devices
-                if not self.execute_gate(device_id, None, None):
-                    return False
-            if self.steady_state:
-                break
+        netlist = self.get_netlist()
+        if netlist is None:
+            self.oscillating_devices = []
+            return False
+        self.load_state()
+        self.steady_state = netlist.execute_network(self.state)
+        self.store_state()
+        self.last_iterations = self.state.last_iterations
+        self.oscillating_devices = self.state.oscillating_devices
         return self.steady_state
@@ -8,6 +8,9 @@ Classes
 -------
 Parser - parses the definition file and builds the logic network.
 """
+from devices import Devices
+from network import Network
+from subcircuit import Subcircuit
 
 
 class Parser:
@@ -31,8 +34,13 @@ class Parser:
     --------------
     parse_network(self): Parses the circuit definition file.
 
+    set_subcircuit(self): Seperate function to define a subcircuit template.
+
     set_devices(self): Seperate function to set required devices.
 
+    make_instance(self, instance_id, subcircuit_id): Makes an instance of a
+                                                     subcircuit template.
+
     set_connections(self): Seperate function to set required devices.
 
     set_monitor(self): Seperate function to set monitoring points.
@@ -87,6 +95,13 @@ class Parser:
         self.LINE = 0
         self.MISSING = ""
 
+        # subcircuits stores {subcircuit_id: subcircuit.Subcircuit}
+        self.subcircuits = {}
+        # Devices and network which every template body is parsed into, made
+        # once as each new Devices and Network declares new error codes
+        self.template_devices = None
+        self.template_network = None
+
     def parse_network(self):
         """Parse the circuit definition file."""
         # Check all four keywords (DEVICES, CONNECT, MONITOR, END) are in
@@ -118,6 +133,9 @@ class Parser:
         else:
             pass
         while keyword.type is self.scanner.KEYWORD:
+            # Subcircuit templates are defined before the devices
+            while self.names.get_name_string(keyword.id) == "SUBCIRCUIT":
+                keyword = self.set_subcircuit()  # Set subcircuit template
             if keyword.id == self.scanner.DEVICES_ID:
                 keyword = self.set_devices()  # Set devices
             else:
@@ -136,6 +154,9 @@ class Parser:
                 print("Number of errors found: {}".format(self.error_count))
                 # Can only continue to logsim if error count is 0
                 if self.error_count is 0:
+                    # Start the D-types and clocks in a random state, once
+                    # the whole network has been made
+                    self.devices.cold_startup()
                     return keyword.id  # Returns a value to enable logsim
                 else:
                     return False
@@ -144,6 +165,44 @@ class Parser:
         else:
             self.call_error(self.scanner.INCORRECT_KEYWORD, self.LINE)
 
+    def set_subcircuit(self):
+        """Seperate function to define a subcircuit template"""
+        subcircuit = self.scanner.get_symbol()
+        if subcircuit.type != self.scanner.NAME:
+            self.call_error(self.scanner.NO_NAME)
+        if (subcircuit.id in self.subcircuits or
+                subcircuit.id in self.devices.gate_types or
+                subcircuit.id in self.devices.device_types):
+            self.scanner.error_location()
+            subcircuit_name = self.names.get_name_string(subcircuit.id)
+            raise SyntaxError(subcircuit_name +
+                              ' is not a valid subcircuit name')
+
+        # Parse the devices and connections of the template into a network
+        # of its own, emptied of the previous template, holding one copy of
+        # the subcircuit
+        if self.template_devices is None:
+            self.template_devices = Devices(self.names)
+            self.template_network = Network(self.names,
+                                            self.template_devices)
+        self.template_devices.devices_list = []
+        self.template_devices.device_map = {}
+        self.template_devices.instances = []
+        self.template_devices.instance_map = {}
+        devices, network = self.devices, self.network
+        self.devices = self.template_devices
+        self.network = self.template_network
+        try:
+            keyword = self.set_devices()
+            if keyword.id != self.scanner.CONNECT_ID:
+                self.call_error(self.scanner.INCORRECT_KEYWORD, self.LINE + 1)
+            keyword = self.set_connections()
+            self.subcircuits[subcircuit.id] = Subcircuit(
+                self.names, self.devices, subcircuit.id)
+        finally:
+            self.devices, self.network = devices, network
+        return keyword
+
     def set_devices(self):
         """Seperate function to set required devices"""
         symbol = self.scanner.get_symbol()
@@ -167,6 +226,9 @@ class Parser:
                 if device_name in i:
                     self.scanner.error_location()
                     raise SyntaxError(device_name + ' is not a valid name')
+            if device_id in self.subcircuits:
+                self.scanner.error_location()
+                raise SyntaxError(device_name + ' is not a valid name')
 
             # Check name is not overlapped
             if self.devices.get_device(device_id) is not None:
@@ -192,6 +254,12 @@ class Parser:
                 self.call_error(self.scanner.NO_NAME)
 
             device_kind = device_kind.id  # Sets device kind
+            if device_kind in self.subcircuits:
+                # Make an instance of a subcircuit template
+                symbol = self.make_instance(device_id, device_kind)
+                if symbol.type == self.scanner.KEYWORD:
+                    return symbol
+                continue
             if device_kind not in self.devices.gate_types \
                and device_kind not in self.devices.device_types:
                 self.scanner.error_location()
@@ -271,6 +339,23 @@ class Parser:
                 self.scanner.error_location()
                 self.scanner.display_error(self.scanner.NO_SEMICOLON)
 
+    def make_instance(self, instance_id, subcircuit_id):
+        """Makes an instance of a subcircuit template"""
+        error_type = self.subcircuits[subcircuit_id].instantiate(
+            self.devices, instance_id)
+        if error_type != self.devices.NO_ERROR:
+            self.scanner.error_location()
+            instance_name = self.names.get_name_string(instance_id)
+            raise SyntaxError(instance_name + ' has been used')
+
+        # Check for semicolon
+        self.LINE = self.scanner.current_line
+        semicolon = self.scanner.get_symbol()
+        if semicolon.type != self.scanner.SEMICOLON:
+            self.call_error(self.scanner.NO_SEMICOLON, self.LINE)
+        self.LINE = self.scanner.current_line
+        return self.scanner.get_symbol()
+
     def set_connections(self):
         """Seperate function to make connections"""
         first_device_name = self.scanner.get_symbol()
@@ -508,6 +593,15 @@ class Parser:
                           device_port + " is floating")
                 else:
                     continue
+        # The ports of subcircuit instances are inputs of their devices
+        for instance in self.devices.instances:
+            for port_number, connected_output in enumerate(instance.inputs):
+                if connected_output is None:
+                    self.error_count += 1
+                    device_id, input_id = instance.get_port_id(port_number)
+                    print("{}'s input {} is floating".format(
+                        self.names.get_name_string(device_id),
+                        self.names.get_name_string(input_id)))
 
     def set_dtype_input_values(self, GND):
         """Set all inputs of d-type if they are not connected
@@ -525,6 +619,15 @@ class Parser:
                     self.network.make_connection(GND, None, device_id, n)
                 else:
                     continue
+        # Including the D-types of subcircuit instances
+        for instance in self.devices.instances:
+            for port_number, connected_output in enumerate(instance.inputs):
+                if connected_output is None:
+                    device_id, input_id = instance.get_port_id(port_number)
+                    device = self.devices.get_device(device_id)
+                    if device.device_kind == self.devices.D_TYPE:
+                        self.network.make_connection(GND, None, device_id,
+                                                     input_id)
 
     def network_error_check(self, error_check, position=None,
                             connect_device=None, port_id=None,
@@ -617,16 +720,13 @@ class Parser:
 
     def set_ground(self):
         """Makes an arbitrary switch representing ground"""
-        GND = 0
-        while True:
-            # Adds ground signal in names list, after
-            # the last position in the list
-            if self.names.get_name_string(GND) is not None:
-                GND += 1
-            else:
-                self.devices.make_switch(GND, 0)
-                # Makes switch
-                return GND
+        # The ground switch has no name. Its ID is kept in the names list
+        # with no name string, so that names made later, such as those of
+        # the devices of subcircuit instances, are not given the same ID.
+        [GND] = self.names.lookup([None])
+        if self.devices.get_device(GND) is None:
+            self.devices.make_switch(GND, 0)
+        return GND
 
     def call_error(self, error_type, line_check=None):
         """Calls error functions in scanner.py"""
@@ -0,0 +1,154 @@
+"""Profile the simulation engine.
+
+Used in the Logic Simulator project to find where the time goes while the
+network is executed. The profiler times the execution phases of the netlist
+which runs the network, the copying of the device state in and out of it,
+and the recording of the monitors, and counts the settling iterations of
+each simulation cycle. It replaces the methods of the given instances only
+while it is enabled, so the simulator runs unchanged when it is not.
+
+Classes
+-------
+ProfileStats - stores the times and call counts gathered by a Profiler.
+Profiler - times the simulation engine.
+"""
+import time
+
+
+class ProfileStats:
+
+    """Store the times and call counts gathered by a Profiler.
+
+    Parameters
+    ----------
+    No parameters.
+
+    Public methods
+    --------------
+    get_report(self): Returns the statistics as text.
+    """
+
+    def __init__(self):
+        """Initialise empty statistics."""
+        # times stores {method_name: cumulative_seconds} and calls stores
+        # {method_name: number_of_calls}
+        self.times = {}
+        self.calls = {}
+
+        # iteration_counts stores {settling_iterations: number_of_cycles}
+        self.iteration_counts = {}
+
+    def get_report(self):
+        """Return the statistics as text, one method per line.
+
+        execute_network includes the time of the methods it calls.
+        """
+        lines = ["{:<16} {:>10} {:>10} {:>10}".format(
+            "method", "calls", "total ms", "us/call")]
+        for method_name, seconds in sorted(self.times.items(),
+                                           key=lambda item: -item[1]):
+            calls = self.calls[method_name]
+            lines.append("{:<16} {:>10} {:>10.1f} {:>10.2f}".format(
+                method_name, calls, seconds * 1e3,
+                seconds * 1e6 / calls if calls else 0))
+        lines.append("settling iterations per cycle:")
+        for iterations, cycles in sorted(self.iteration_counts.items()):
+            lines.append("{:>4} {:>10}".format(iterations, cycles))
+        return "\n".join(lines) + "\n"
+
+
+class Profiler:
+
+    """Time the simulation engine.
+
+    When enabled, the profiled methods of the network, its netlist and the
+    monitors are replaced by timed versions, which they pick up as they call
+    them through self. Disabling removes them again, leaving the class
+    methods. A netlist made again while the profiler is enabled, because
+    devices or connections were added, is not timed.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    enable(self): Starts timing the simulation engine.
+
+    disable(self): Stops timing the simulation engine and returns the
+                   statistics.
+
+    make_timed(self, method_name, method): Returns a timed version of the
+                                           method.
+    """
+
+    network_methods = ["execute_network", "load_state", "store_state"]
+    netlist_methods = ["update_clocks", "execute_switches", "execute_d_types",
+                       "execute_clocks", "execute_gates"]
+    monitors_methods = ["record_signals"]
+
+    def __init__(self, network, monitors):
+        """Initialise the statistics."""
+        self.network = network
+        self.monitors = monitors
+        self.stats = ProfileStats()
+        self.enabled = False
+
+        # profiled stores [(instance, method_names)] while enabled
+        self.profiled = []
+
+    def make_timed(self, method_name, method):
+        """Return a timed version of the method."""
+        times = self.stats.times
+        calls = self.stats.calls
+        times.setdefault(method_name, 0.0)
+        calls.setdefault(method_name, 0)
+        clock = time.perf_counter
+
+        def timed(*args):
+            start = clock()
+            result = method(*args)
+            times[method_name] += clock() - start
+            calls[method_name] += 1
+            return result
+        return timed
+
+    def enable(self):
+        """Start timing the simulation engine."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.profiled = [(self.network, self.network_methods),
+                         (self.monitors, self.monitors_methods)]
+        netlist = self.network.get_netlist()
+        if netlist is not None:
+            self.profiled.append((netlist, self.netlist_methods))
+        for instance, method_names in self.profiled:
+            for method_name in method_names:
+                # Set through __dict__, as a netlist refuses to be changed
+                vars(instance)[method_name] = self.make_timed(
+                    method_name, getattr(instance, method_name))
+
+        # Count the settling iterations of each cycle
+        execute_network = self.network.execute_network
+        iteration_counts = self.stats.iteration_counts
+        network = self.network
+
+        def counted_execute_network():
+            result = execute_network()
+            iterations = network.last_iterations
+            iteration_counts[iterations] = \
+                iteration_counts.get(iterations, 0) + 1
+            return result
+        self.network.execute_network = counted_execute_network
+
+    def disable(self):
+        """Stop timing the simulation engine and return the statistics."""
+        if self.enabled:
+            self.enabled = False
+            for instance, method_names in self.profiled:
+                for method_name in method_names:
+                    del instance.__dict__[method_name]
+            self.profiled = []
+        return self.stats
@@ -75,10 +75,13 @@ class Scanner:
                                 self.INCORRECT_KEYWORD, self.NO_KEYWORD,
                                 self.INVALID_VARIABLE, self.NO_CONNECT, self.NO_EOF] = range(13)
 
-        self.keywords_list = ["DEVICES", "CONNECT", "MONITOR", "END"]
+        self.keywords_list = ["DEVICES", "CONNECT", "MONITOR", "END",
+                              "SUBCIRCUIT"]
 
+        # SUBCIRCUIT is optional, so its ID is only made when a definition
+        # file uses it, and the IDs of other names are unchanged
         [self.DEVICES_ID, self.CONNECT_ID, self.MONITOR_ID,
-         self.END_ID] = self.names.lookup(self.keywords_list)
+         self.END_ID] = self.names.lookup(self.keywords_list[:4])
 
         self.current_character = ""
 
@@ -181,10 +184,13 @@ class Scanner:
 
     def get_name(self):
         """Seek the next name string in input_file. Return the name string
-        and set the next non-alphanumeric character to current_character."""
+        and set the next character which is neither alphanumeric nor an
+        underscore to current_character."""
         name = ""  # initialise the name to return
         while True:
-            if self.current_character.isalnum():
+            # Underscores join instance and device names, as in H1_X
+            if self.current_character.isalnum() or \
+                    self.current_character == "_":
                 name += str(self.current_character)
                 self.advance()
             else:
@@ -0,0 +1,613 @@
+"""Serve simulations of parsed circuits over a local socket.
+
+Used in the Logic Simulator project to run many short simulations without
+paying for interpreter startup and parsing each time. The server keeps the
+parsed circuits resident, keyed by a hash of the definition file, and each
+client loads one and drives it with requests.
+
+Requests and responses are JSON objects, one per line. A request has an "op"
+and its arguments:
+
+    {"op": "load", "path": <definition file>}
+    {"op": "reset"}
+    {"op": "switch", "name": <switch name>, "state": <0 or 1>}
+    {"op": "monitor", "signal": <signal name, such as D1.Q>}
+    {"op": "run", "cycles": <number of cycles>}
+    {"op": "traces", "start": <first cycle, default 0>}
+    {"op": "subscribe", "cycles": <number of cycles>,
+     "chunk": <cycles per message, default 1000>}
+    {"op": "runs"}
+    {"op": "follow", "run": <run ID>}
+
+Every response has "ok", and "error" if it is false. The response to
+"traces" gives the monitored signal names and the trace length, and is
+followed by "bytes" bytes holding each trace in turn, one byte per cycle.
+
+"subscribe" runs the circuit and pushes a message like the response to
+"traces" after each chunk, with "run" giving the ID of the run, "start" the
+first cycle of the chunk and the payload holding only the new samples. A
+last message has "done" set, or "error" if the circuit oscillates. Other
+clients find the runs in progress with "runs", and join one with "follow"
+to receive the same messages from the next chunk on. The next chunk is only
+run once every subscriber has taken the previous one, and a subscriber which
+takes longer than the server's subscriber_timeout, or disconnects, is
+dropped, with a last message whose "error" is "dropped" if it is still
+connected.
+
+Classes
+-------
+Circuit - stores a parsed circuit and its initial state.
+Session - stores the circuit loaded by a client.
+Run - stores a streamed run and the clients subscribed to it.
+SimulationServer - keeps circuits resident and serves client requests.
+SimulationClient - sends requests to a SimulationServer.
+"""
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+import streaming
+
+
+class Circuit:
+
+    """Store a parsed circuit and its initial state.
+
+    Parameters
+    ----------
+    path: path to the circuit definition file.
+
+    Public methods
+    --------------
+    reset(self): Returns the circuit to its state just after parsing.
+
+    get_signal_ids(self, signal_name): Returns the device and output IDs of
+                                       an existing signal.
+    """
+
+    def __init__(self, path):
+        """Parse the definition file and record its initial state.
+
+        Raise ValueError if the definition file has errors.
+        """
+        self.names = Names()
+        self.devices = Devices(self.names)
+        self.network = Network(self.names, self.devices)
+        self.monitors = Monitors(self.names, self.devices, self.network)
+        scanner = Scanner(path, self.names)
+        parser = Parser(self.names, self.devices, self.network,
+                        self.monitors, scanner)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                parsed = parser.parse_network()
+        except SyntaxError as error:
+            raise ValueError(str(error))
+        finally:
+            scanner.f.close()
+        if not parsed:
+            raise ValueError("errors in definition file")
+
+        self.initial_devices = self.devices.snapshot()
+        self.initial_monitors = list(self.monitors.monitors_dictionary)
+        self.cycles_completed = 0
+
+    def reset(self):
+        """Return the circuit to its state just after parsing.
+
+        The device states and switches are restored, monitors added since
+        are removed and the traces are cleared.
+        """
+        for monitor in list(self.monitors.monitors_dictionary):
+            if monitor not in self.initial_monitors:
+                self.monitors.remove_monitor(*monitor)
+        for monitor in self.initial_monitors:
+            if monitor not in self.monitors.monitors_dictionary:
+                self.monitors.make_monitor(*monitor)
+        self.monitors.reset_monitors()
+        self.devices.restore(self.initial_devices)
+        self.cycles_completed = 0
+
+    def get_signal_ids(self, signal_name):
+        """Return [device_id, output_id] of the signal, or None if absent."""
+        name_ids = [self.names.query(name_string)
+                    for name_string in signal_name.split(".")]
+        if None in name_ids or len(name_ids) > 2:
+            return None
+        device = self.devices.get_device(name_ids[0])
+        output_id = name_ids[1] if len(name_ids) == 2 else None
+        if device is None or output_id not in device.outputs:
+            return None
+        return [name_ids[0], output_id]
+
+
+class Session:
+
+    """Store the circuit loaded by a client.
+
+    Parameters
+    ----------
+    No parameters.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    def __init__(self):
+        """Initialise an empty session."""
+        self.file_hash = None
+        self.circuit = None
+
+
+class Run:
+
+    """Store a streamed run and the clients subscribed to it.
+
+    Parameters
+    ----------
+    run_id: ID of the run, unique within the server.
+    file_hash: hash of the definition file of the circuit being run.
+    cycles: number of cycles the run was asked for.
+
+    Public methods
+    --------------
+    add(self, writer): Subscribes a client and returns an event set when it
+                       leaves the run.
+
+    drop(self, writer, message=None): Unsubscribes a client.
+
+    broadcast(self, message, payload, timeout): Sends a message and its
+                                                payload to every subscriber.
+
+    finish(self, message): Sends the last message and unsubscribes everyone.
+    """
+
+    def __init__(self, run_id, file_hash, cycles):
+        """Initialise an empty set of subscribers."""
+        self.run_id = run_id
+        self.file_hash = file_hash
+        self.cycles = cycles
+        self.start = 0  # first cycle of the next chunk
+        # subscribers stores {writer: asyncio.Event set when it leaves}
+        self.subscribers = {}
+
+    def add(self, writer):
+        """Subscribe the client. Return an event set when it leaves."""
+        left = asyncio.Event()
+        self.subscribers[writer] = left
+        return left
+
+    def drop(self, writer, message=None):
+        """Unsubscribe the client, sending it message if it is connected."""
+        left = self.subscribers.pop(writer, None)
+        if left is None:
+            return
+        if message is not None and not writer.is_closing():
+            writer.write(json.dumps(message).encode() + b"\n")
+        left.set()
+
+    async def broadcast(self, message, payload, timeout):
+        """Send the message and payload to every subscriber.
+
+        Wait until each subscriber has taken them, for at most timeout
+        seconds, and drop those which take longer or have disconnected.
+        """
+        data = json.dumps(message).encode() + b"\n" + payload
+        writers = []
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                self.drop(writer)
+            else:
+                writer.write(data)
+                writers.append(writer)
+        if not writers:
+            return
+        drains = {asyncio.ensure_future(writer.drain()): writer
+                  for writer in writers}
+        done, pending = await asyncio.wait(drains, timeout=timeout)
+        for drain in pending:
+            drain.cancel()
+            self.drop(drains[drain], {"ok": False, "error": "dropped"})
+        for drain in done:
+            if drain.exception() is not None:
+                self.drop(drains[drain])
+
+    def finish(self, message):
+        """Send the last message to every subscriber and unsubscribe them."""
+        for writer in list(self.subscribers):
+            self.drop(writer, message)
+
+
+class SimulationServer:
+
+    """Keep parsed circuits resident and serve client requests.
+
+    Idle circuits are kept in a pool for each file hash. Loading a file takes
+    an idle circuit from its pool, or parses a new one if there is none, so
+    clients never share a circuit, and a circuit returns to the pool when its
+    client loads another file or disconnects. Streamed runs can be followed
+    by any client.
+
+    Parameters
+    ----------
+    subscriber_timeout: seconds a subscriber may take to receive a chunk
+                        before it is dropped.
+
+    Public methods
+    --------------
+    get_file_hash(self, path): Returns the hash of a definition file.
+
+    acquire(self, path): Returns a hash and an idle circuit for a definition
+                         file.
+
+    release(self, session): Returns the session's circuit to its pool.
+
+    handle_request(self, session, request): Carries out a request and returns
+                                            the response and any payload.
+
+    handle_subscribe(self, session, request, writer): Runs the session's
+                    circuit, pushing the new samples of each chunk to every
+                    subscriber.
+
+    handle_follow(self, request, writer): Subscribes a client to a run in
+                                          progress.
+
+    handle_client(self, reader, writer): Serves the requests of one client.
+
+    serve(self, address): Serves clients on a TCP or Unix socket until
+                          cancelled.
+    """
+
+    def __init__(self, subscriber_timeout=5.0):
+        """Initialise the pools of idle circuits and the runs."""
+        # circuits stores {file_hash: [idle Circuit]}
+        self.circuits = {}
+        self.subscriber_timeout = subscriber_timeout
+        # runs stores {run_id: Run} for the runs in progress
+        self.runs = {}
+        self.next_run_id = 0
+
+    def get_file_hash(self, path):
+        """Return the SHA-256 hash of the definition file as hex."""
+        with open(path, "rb") as definition_file:
+            return hashlib.sha256(definition_file.read()).hexdigest()
+
+    def acquire(self, path):
+        """Return (file_hash, circuit, cached) for the definition file.
+
+        cached is True if the circuit was already parsed, in which case it is
+        reset to its state just after parsing.
+        """
+        file_hash = self.get_file_hash(path)
+        pool = self.circuits.setdefault(file_hash, [])
+        if pool:
+            circuit = pool.pop()
+            circuit.reset()
+            return file_hash, circuit, True
+        return file_hash, Circuit(path), False
+
+    def release(self, session):
+        """Return the session's circuit to its pool."""
+        if session.circuit is not None:
+            self.circuits[session.file_hash].append(session.circuit)
+            session.file_hash = None
+            session.circuit = None
+
+    def handle_request(self, session, request):
+        """Carry out a request for the session.
+
+        Return (response, payload), where payload is bytes to send after the
+        response, or None.
+        """
+        op = request.get("op")
+        if op == "load":
+            self.release(session)
+            try:
+                file_hash, circuit, cached = self.acquire(request["path"])
+            except (OSError, ValueError) as error:
+                return {"ok": False, "error": str(error)}, None
+            session.file_hash = file_hash
+            session.circuit = circuit
+            return {"ok": True, "hash": file_hash, "cached": cached}, None
+
+        elif op == "runs":
+            return {"ok": True, "runs": [
+                {"run": run.run_id, "hash": run.file_hash,
+                 "cycles": run.cycles, "start": run.start}
+                for run in self.runs.values()]}, None
+
+        circuit = session.circuit
+        if circuit is None:
+            return {"ok": False, "error": "no circuit loaded"}, None
+
+        if op == "reset":
+            circuit.reset()
+            return {"ok": True}, None
+
+        elif op == "switch":
+            switch_id = circuit.names.query(str(request.get("name")))
+            if (switch_id is None or request.get("state") not in [0, 1] or
+                    not circuit.devices.set_switch(switch_id,
+                                                   request["state"])):
+                return {"ok": False, "error": "invalid switch"}, None
+            return {"ok": True}, None
+
+        elif op == "monitor":
+            monitor = circuit.get_signal_ids(str(request.get("signal")))
+            if monitor is None or circuit.monitors.make_monitor(
+                    *monitor, circuit.cycles_completed) != \
+                    circuit.monitors.NO_ERROR:
+                return {"ok": False, "error": "invalid monitor"}, None
+            return {"ok": True}, None
+
+        elif op == "run":
+            cycles = request.get("cycles")
+            if not isinstance(cycles, int) or cycles < 0:
+                return {"ok": False, "error": "invalid cycles"}, None
+            for cycle in range(cycles):
+                if not circuit.network.execute_network():
+                    circuit.monitors.flush_signals()
+                    circuit.cycles_completed += cycle
+                    return {"ok": False, "error": "oscillating",
+                            "cycles": cycle, "devices": [
+                                circuit.names.get_name_string(device_id)
+                                for device_id
+                                in circuit.network.oscillating_devices]}, None
+                circuit.monitors.record_signals()
+            circuit.monitors.flush_signals()
+            circuit.cycles_completed += cycles
+            return {"ok": True, "cycles": cycles,
+                    "total": circuit.cycles_completed}, None
+
+        elif op == "traces":
+            start = request.get("start", 0)
+            if not isinstance(start, int) or start < 0:
+                return {"ok": False, "error": "invalid start"}, None
+            circuit.monitors.flush_signals()
+            monitors_dictionary = circuit.monitors.monitors_dictionary
+            payload = b"".join(bytes(signal_list[start:])
+                               for signal_list in monitors_dictionary.values())
+            signals = [circuit.devices.get_signal_name(*monitor)
+                       for monitor in monitors_dictionary]
+            return {"ok": True, "signals": signals,
+                    "length": max(circuit.cycles_completed - start, 0),
+                    "bytes": len(payload)}, payload
+
+        return {"ok": False, "error": "unknown op"}, None
+
+    async def handle_subscribe(self, session, request, writer):
+        """Run the session's circuit, pushing the new samples of each chunk.
+
+        The client is the first subscriber of the run, and others may join
+        it with handle_follow(). The next chunk is taken once every
+        subscriber has received the previous one, or been dropped.
+        """
+        circuit = session.circuit
+        cycles = request.get("cycles")
+        chunk_cycles = request.get("chunk", 1000)
+        error = None
+        if circuit is None:
+            error = "no circuit loaded"
+        elif (not isinstance(cycles, int) or cycles < 0 or
+              not isinstance(chunk_cycles, int) or chunk_cycles < 1):
+            error = "invalid cycles"
+        if error is not None:
+            writer.write(json.dumps({"ok": False,
+                                     "error": error}).encode() + b"\n")
+            await writer.drain()
+            return
+
+        run = Run(self.next_run_id, session.file_hash, cycles)
+        self.next_run_id += 1
+        self.runs[run.run_id] = run
+        run.add(writer)
+        response = {"ok": True, "done": True}
+        signals = [circuit.devices.get_signal_name(*monitor)
+                   for monitor in circuit.monitors.monitors_dictionary]
+        stream = streaming.stream_signals(circuit.network, circuit.monitors,
+                                          cycles, chunk_cycles)
+        try:
+            async for start, length, samples, oscillating in stream:
+                circuit.cycles_completed += length
+                payload = b"".join(samples)
+                await run.broadcast(
+                    {"ok": True, "run": run.run_id, "signals": signals,
+                     "start": start, "length": length,
+                     "bytes": len(payload)}, payload,
+                    self.subscriber_timeout)
+                run.start = start + length
+                if oscillating:
+                    response = {"ok": False, "error": "oscillating",
+                                "devices": [
+                                    circuit.names.get_name_string(device_id)
+                                    for device_id
+                                    in circuit.network.oscillating_devices]}
+        finally:
+            await stream.aclose()
+            del self.runs[run.run_id]
+            response["run"] = run.run_id
+            response["total"] = circuit.cycles_completed
+            run.finish(response)
+        if not writer.is_closing():
+            await writer.drain()
+
+    async def handle_follow(self, request, writer):
+        """Subscribe the client to a run in progress until it leaves."""
+        run = self.runs.get(request.get("run"))
+        if run is None:
+            writer.write(json.dumps({"ok": False,
+                                     "error": "no such run"}).encode() +
+                         b"\n")
+            await writer.drain()
+            return
+        await run.add(writer).wait()
+        if not writer.is_closing():
+            await writer.drain()
+
+    async def handle_client(self, reader, writer):
+        """Serve the requests of one client until it disconnects."""
+        session = Session()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    response, payload = {"ok": False,
+                                         "error": "invalid request"}, None
+                else:
+                    if request.get("op") == "subscribe":
+                        await self.handle_subscribe(session, request, writer)
+                        continue
+                    if request.get("op") == "follow":
+                        await self.handle_follow(request, writer)
+                        continue
+                    response, payload = self.handle_request(session, request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                if payload is not None:
+                    writer.write(payload)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.release(session)
+            writer.close()
+
+    async def serve(self, address):
+        """Serve clients until cancelled.
+
+        address is "host:port" for a TCP socket, or the path of a Unix
+        socket.
+        """
+        if ":" in address:
+            host, port = address.rsplit(":", 1)
+            server = await asyncio.start_server(self.handle_client, host,
+                                                int(port))
+        else:
+            server = await asyncio.start_unix_server(self.handle_client,
+                                                     address)
+        async with server:
+            await server.serve_forever()
+
+
+class SimulationClient:
+
+    """Send requests to a SimulationServer.
+
+    Parameters
+    ----------
+    reader: asyncio.StreamReader of the connection.
+    writer: asyncio.StreamWriter of the connection.
+
+    Public methods
+    --------------
+    connect(cls, address): Opens a connection to the server at address.
+
+    request(self, op, **arguments): Sends a request and returns the response.
+
+    get_traces(self, start=0): Returns the monitored traces.
+
+    subscribe(self, cycles, chunk_cycles=1000): Runs the circuit and yields
+                                                the new samples of each chunk.
+
+    follow(self, run_id): Yields the new samples of each chunk of another
+                          client's run.
+
+    read_chunks(self): Yields the chunks pushed by the server until the last
+                       message.
+
+    close(self): Closes the connection.
+    """
+
+    def __init__(self, reader, writer):
+        """Store the connection."""
+        self.reader = reader
+        self.writer = writer
+        self.last_response = None
+
+    @classmethod
+    async def connect(cls, address):
+        """Open a connection to the server at address, as in serve()."""
+        if ":" in address:
+            host, port = address.rsplit(":", 1)
+            reader, writer = await asyncio.open_connection(host, int(port))
+        else:
+            reader, writer = await asyncio.open_unix_connection(address)
+        return cls(reader, writer)
+
+    async def request(self, op, **arguments):
+        """Send a request and return the response.
+
+        Any payload following the response is stored in its "payload" entry.
+        """
+        arguments["op"] = op
+        self.writer.write(json.dumps(arguments).encode() + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if "bytes" in response:
+            response["payload"] = await self.reader.readexactly(
+                response["bytes"])
+        return response
+
+    async def get_traces(self, start=0):
+        """Return {signal name: trace bytes} from cycle start onwards."""
+        response = await self.request("traces", start=start)
+        payload = response["payload"]
+        length = response["length"]
+        return {signal: payload[number * length:(number + 1) * length]
+                for number, signal in enumerate(response["signals"])}
+
+    async def subscribe(self, cycles, chunk_cycles=1000):
+        """Run the circuit, yielding (start, {signal name: new samples}).
+
+        The last message from the server is stored in last_response.
+        """
+        self.writer.write(json.dumps({"op": "subscribe", "cycles": cycles,
+                                      "chunk": chunk_cycles}).encode() + b"\n")
+        await self.writer.drain()
+        async for chunk in self.read_chunks():
+            yield chunk
+
+    async def follow(self, run_id):
+        """Follow a run, yielding (start, {signal name: new samples}).
+
+        The last message from the server is stored in last_response.
+        """
+        self.writer.write(json.dumps({"op": "follow",
+                                      "run": run_id}).encode() + b"\n")
+        await self.writer.drain()
+        async for chunk in self.read_chunks():
+            yield chunk
+
+    async def read_chunks(self):
+        """Yield (start, {signal name: new samples}) for each chunk pushed.
+
+        The message which ends the run is stored in last_response.
+        """
+        while True:
+            response = json.loads(await self.reader.readline())
+            if "bytes" not in response:
+                self.last_response = response
+                return
+            payload = await self.reader.readexactly(response["bytes"])
+            length = response["length"]
+            yield response["start"], {
+                signal: payload[number * length:(number + 1) * length]
+                for number, signal in enumerate(response["signals"])}
+
+    async def close(self):
+        """Close the connection."""
+        self.writer.close()
+        await self.writer.wait_closed()
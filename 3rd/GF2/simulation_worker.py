@@ -0,0 +1,89 @@
+"""Run the simulation in a background thread.
+
+Used in the Logic Simulator project by the GUI, so that the window stays
+responsive during long runs and the user can cancel a run part way through.
+
+Classes
+-------
+SimulationWorker - runs the network for a number of cycles in a thread.
+"""
+import threading
+import time
+
+
+class SimulationWorker(threading.Thread):
+
+    """Run the network for a number of cycles in a background thread.
+
+    This class executes the network and records the monitors one cycle at a
+    time. Progress is reported at most once per interval, with a snapshot of
+    the trace lengths taken after flushing the monitors, so the traces are
+    complete up to those lengths. The traces only ever grow, so the GUI can
+    draw them in place up to the snapshot while the run continues. A
+    cancelled run stops between cycles, leaving the monitors consistent at
+    the last completed cycle.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    cycles: number of cycles to run.
+    post: function that calls a function on the GUI thread, such as
+          wx.CallAfter.
+    on_progress: called through post with the number of cycles completed
+                 and {(device_id, output_id): trace length} for every
+                 monitor.
+    on_finished: called through post with the number of cycles completed
+                 and the status of the run when it ends.
+    interval: minimum time in seconds between progress reports.
+
+    Public methods
+    --------------
+    run(self): Runs the simulation, called in the new thread by start().
+
+    cancel(self): Stops the run after the current cycle.
+    """
+
+    def __init__(self, network, monitors, cycles, post, on_progress,
+                 on_finished, interval=0.1):
+        """Initialise the worker, which is started with start()."""
+        super().__init__(daemon=True)
+        self.network = network
+        self.monitors = monitors
+        self.cycles = cycles
+        self.post = post
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.interval = interval
+        self.cancelled = threading.Event()
+
+        self.status_types = [self.COMPLETED, self.CANCELLED,
+                             self.OSCILLATING] = range(3)
+
+    def run(self):
+        """Run the network for the given number of cycles."""
+        cycles_completed = 0
+        status = self.COMPLETED
+        last_report = time.monotonic()
+        while cycles_completed < self.cycles:
+            if self.cancelled.is_set():
+                status = self.CANCELLED
+                break
+            if not self.network.execute_network():
+                status = self.OSCILLATING
+                break
+            self.monitors.record_signals()
+            cycles_completed += 1
+
+            now = time.monotonic()
+            if now - last_report >= self.interval:
+                self.post(self.on_progress, cycles_completed,
+                          self.monitors.snapshot())
+                last_report = now
+
+        self.monitors.flush_signals()
+        self.post(self.on_finished, cycles_completed, status)
+
+    def cancel(self):
+        """Stop the run after the current cycle."""
+        self.cancelled.set()
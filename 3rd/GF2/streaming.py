@@ -0,0 +1,50 @@
+"""Stream the signal traces of a simulation as it runs.
+
+Used in the Logic Simulator project so that long runs can be followed live.
+The simulation runs in chunks of cycles inside an async generator, which
+yields only the samples recorded since the previous chunk. The generator
+does not run the next chunk until its consumer asks for it, so a slow
+consumer holds the simulation back instead of letting samples pile up.
+
+Functions
+---------
+stream_signals(network, monitors, cycles, chunk_cycles): Runs the network and
+                                    yields the new samples of each chunk.
+"""
+import asyncio
+
+
+async def stream_signals(network, monitors, cycles, chunk_cycles=1000):
+    """Run the network for cycles cycles, yielding each chunk's samples.
+
+    Each item is a (start, length, samples, oscillating) tuple, where start
+    is the index in the traces of the first new sample, length the number of
+    cycles run and samples a list of bytes holding the new samples of each
+    monitor, in monitors_dictionary order. If the network oscillates, the
+    last item holds the cycles run before it did, and oscillating is True.
+    The monitors are those present when the stream starts. The event loop
+    runs other tasks before each chunk.
+    """
+    traces = list(monitors.monitors_dictionary.values())
+    monitors.flush_signals()
+    start = max([len(trace) for trace in traces] + [0])
+    remaining = cycles
+    while remaining > 0:
+        await asyncio.sleep(0)
+        chunk = min(chunk_cycles, remaining)
+        cycles_run = 0
+        oscillating = False
+        while cycles_run < chunk:
+            if not network.execute_network():
+                oscillating = True
+                break
+            monitors.record_signals()
+            cycles_run += 1
+        monitors.flush_signals()
+        remaining -= cycles_run
+
+        yield (start, cycles_run, [bytes(trace[start:start + cycles_run])
+                                   for trace in traces], oscillating)
+        if oscillating:
+            return
+        start += cycles_run
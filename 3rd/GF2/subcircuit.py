@@ -0,0 +1,413 @@
+"""Store subcircuit templates and make instances of them.
+
+Used in the Logic Simulator project so that a block which is repeated many
+times, such as a full adder, is defined once in the definition file. The
+template is parsed and compiled into a netlist once, and each instance holds
+only the state of its devices and the outputs connected to its ports. The
+devices of an instance are found by name and given as views of its state.
+
+Classes
+-------
+Subcircuit - stores the structure of a subcircuit and makes instances of it.
+Instance - stores the state of one instance of a subcircuit.
+InstanceDevice - presents a device of an instance as a devices.Device.
+InstanceInputs - gives the connections of the inputs of a device of an
+                 instance.
+InstanceOutputs - gives the signals of the outputs of a device of an
+                  instance.
+"""
+import collections.abc
+import types
+
+from netlist import Netlist
+
+
+class Subcircuit:
+
+    """Store the structure of a subcircuit and make instances of it.
+
+    The template is made from a separate set of devices holding one copy of
+    the subcircuit, which may include instances of subcircuits defined
+    before it. Its Device objects are kept as the structure shared by every
+    instance, put in levelised order so that each gate is executed after
+    the gates driving it, and compiled once into a netlist.Netlist with
+    ports. Each instance holds only the state of the devices, laid out as in
+    that netlist, and is run from its tuples.
+
+    An instance named H1 of a template with a device X has a device named
+    H1_X. Inputs which are not connected inside the template are the ports
+    of the instance, left for the definition file to connect.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class holding the template's
+             devices.
+    subcircuit_id: name ID of the subcircuit.
+
+    Public methods
+    --------------
+    get_levelised_order(self, devices_list): Returns the devices with each
+                                             device after its drivers.
+
+    locate(self, device_name): Returns a device of the template and where its
+                               state is held in an instance.
+
+    instantiate(self, devices, instance_id): Makes an instance of the
+                                             subcircuit.
+    """
+
+    def __init__(self, names, devices, subcircuit_id):
+        """Record and compile the subcircuit held by devices."""
+        self.names = names
+        self.subcircuit_id = subcircuit_id
+        devices.devices_list = self.get_levelised_order(devices.devices_list)
+        self.devices_list = tuple(devices.devices_list)
+        self.device_map = types.MappingProxyType(dict(devices.device_map))
+        self.instance_map = types.MappingProxyType(
+            dict(devices.instance_map))
+        self.netlist = Netlist(devices, ports=True)
+
+    def get_levelised_order(self, devices_list):
+        """Return the devices with each device after its drivers.
+
+        Devices in a feedback loop keep their order in the definition file,
+        after the devices which can be levelised. Connections from instances
+        of other subcircuits are left out.
+        """
+        numbers = {device.device_id: number
+                   for number, device in enumerate(devices_list)}
+        drivers = [set() for device in devices_list]
+        loads = [[] for device in devices_list]
+        for number, device in enumerate(devices_list):
+            for connected_output in device.inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in numbers:
+                    first = numbers[connected_output[0]]
+                    if number not in loads[first]:
+                        drivers[number].add(first)
+                        loads[first].append(number)
+
+        ready = [number for number in range(len(devices_list))
+                 if not drivers[number]]
+        order = []
+        while ready:
+            number = ready.pop(0)
+            order.append(number)
+            for load in loads[number]:
+                drivers[load].discard(number)
+                if not drivers[load]:
+                    ready.append(load)
+
+        levelised = set(order)
+        order.extend(number for number in range(len(devices_list))
+                     if number not in levelised)
+        return [devices_list[number] for number in order]
+
+    def locate(self, device_name):
+        """Return a device of the template and where its state is held.
+
+        device_name names a device of the template, or of an instance within
+        it, as in H1_X. Return (device, netlist, bases, connections), where
+        device is the Device object in the template of its own subcircuit
+        and netlist is the netlist of that subcircuit. bases holds where the
+        signal slots, D-type memories, clock counters, signal generator
+        counters and switch states of that netlist start in the state of an
+        instance of this subcircuit. connections stores {input_id:
+        (device_id, output_id)} for the inputs connected inside this
+        subcircuit, and {input_id: port_number} for its ports. Return None
+        if there is no such device.
+        """
+        device_id = self.names.query(device_name)
+        device = self.device_map.get(device_id)
+        if device is not None:
+            connections = {}
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is None:
+                    connections[input_id] = self.netlist.port_numbers[
+                        (device_id, input_id)]
+                else:
+                    connections[input_id] = connected_output
+            return device, self.netlist, (0, 0, 0, 0, 0), connections
+
+        for instance_id, local_name in self.names.split_name(device_name):
+            instance = self.instance_map.get(instance_id)
+            if instance is None:
+                continue
+            located = instance.subcircuit.locate(local_name)
+            if located is None:
+                continue
+            device, netlist, bases, instance_connections = located
+            record = self.netlist.instances[
+                self.netlist.instance_numbers[instance_id]]
+            connections = {}
+            for input_id, connection in instance_connections.items():
+                if isinstance(connection, int):  # a port of the instance
+                    port_number = connection
+                    connection = instance.inputs[port_number]
+                    if connection is None:
+                        connection = self.netlist.port_numbers[
+                            instance.get_port_id(port_number)]
+                else:
+                    connection = instance.get_output_id(*connection)
+                connections[input_id] = connection
+            bases = tuple(record_base + base
+                          for record_base, base in zip(record[2:7], bases))
+            return device, netlist, bases, connections
+        return None
+
+    def instantiate(self, devices, instance_id):
+        """Make an instance of the subcircuit named by instance_id.
+
+        Return devices.NO_ERROR if successful, or devices.DEVICE_PRESENT if
+        the name of the instance, or that of one of its devices, is already
+        in use.
+        """
+        prefix = self.names.get_name_string(instance_id) + "_"
+        if (devices.get_device(instance_id) is not None or
+                instance_id in devices.instance_map or
+                any(devices.get_device(self.names.query(
+                    prefix + self.names.get_name_string(device.device_id)))
+                    is not None for device in self.devices_list)):
+            return devices.DEVICE_PRESENT
+        devices.add_instance(Instance(self.names, instance_id, self))
+        return devices.NO_ERROR
+
+
+class Instance:
+
+    """Store the state of one instance of a subcircuit.
+
+    The state is a netlist.SimulationState made by the netlist of the
+    subcircuit, and the instance keeps nothing else but the outputs
+    connected to its ports. Its devices are made as views of the state when
+    they are looked up.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    instance_id: name ID of the instance.
+    subcircuit: the Subcircuit it is an instance of.
+
+    Public methods
+    --------------
+    get_output_id(self, device_id, output_id): Returns a template output
+                                    named after the instance.
+
+    get_port_id(self, port_number): Returns the device and input IDs of a
+                                    port, named after the instance.
+
+    get_state_lists(self): Returns the lists holding the state of the
+                           instance.
+
+    get_device(self, device_id, local_name): Returns a view of a device of
+                                             the instance.
+    """
+
+    def __init__(self, names, instance_id, subcircuit):
+        """Make the state of the instance, with its ports unconnected."""
+        self.names = names
+        self.instance_id = instance_id
+        self.subcircuit = subcircuit
+
+        # state holds the signals, memories, counters and switch states of
+        # the devices, laid out as in subcircuit.netlist
+        self.state = subcircuit.netlist.make_state()
+
+        # inputs stores the (device_id, output_id) connected to each port,
+        # or None if the port is not connected
+        self.inputs = [None] * len(subcircuit.netlist.ports)
+
+    def get_output_id(self, device_id, output_id):
+        """Return (device_id, output_id) of a template output in the instance.
+
+        The device is named after the instance, as in H1_X.
+        """
+        [instance_device_id] = self.names.lookup([
+            self.names.get_name_string(self.instance_id) + "_" +
+            self.names.get_name_string(device_id)])
+        return (instance_device_id, output_id)
+
+    def get_port_id(self, port_number):
+        """Return the (device_id, input_id) of a port of the instance."""
+        device_id, input_id = self.subcircuit.netlist.ports[port_number]
+        return self.get_output_id(device_id, input_id)
+
+    def get_state_lists(self):
+        """Return the lists holding the state of the instance.
+
+        They are the signals, D-type memories and clock counters, then the
+        counters of each signal generator, then the switch states.
+        """
+        state = self.state
+        return ([state.signals, state.dtype_memory, state.clock_counters] +
+                state.siggen_counters + [state.switch_states])
+
+    def get_device(self, device_id, local_name):
+        """Return a view of the device named local_name in the template.
+
+        device_id is the ID of the device named after the instance. Return
+        None if the template has no such device.
+        """
+        located = self.subcircuit.locate(local_name)
+        if located is None:
+            return None
+        return InstanceDevice(self, device_id, *located)
+
+
+class InstanceDevice:
+
+    """Present a device of a subcircuit instance as a devices.Device.
+
+    The view holds no signals of its own. Its outputs are read from the
+    state of the instance, as are the states of switches and the memories of
+    D-types, which can also be set. The counters of clocks and signal
+    generators are only held in the state.
+
+    Parameters
+    ----------
+    instance: the Instance holding the device.
+    device_id: ID of the device, named after the instance.
+    device: the Device object in the template of the device's subcircuit.
+    netlist: the netlist.Netlist of that subcircuit.
+    bases: starts of the state of netlist in the state of the instance, as
+           given by Subcircuit.locate().
+    connections: connections of the inputs, as given by Subcircuit.locate().
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    def __init__(self, instance, device_id, device, netlist, bases,
+                 connections):
+        """Initialise the device properties and the views of its ports."""
+        self.instance = instance
+        self.device_id = device_id
+        self.device_kind = device.device_kind
+        self.clock_half_period = device.clock_half_period
+        self.siggen_high_period = device.siggen_high_period
+        self.siggen_low_period = device.siggen_low_period
+        self.clock_counter = None
+        self.siggen_high_counter = None
+        self.siggen_low_counter = None
+
+        self.inputs = InstanceInputs(instance, connections)
+        self.outputs = InstanceOutputs(instance, {
+            output_id: bases[0] + netlist.slots[(device.device_id,
+                                                 output_id)]
+            for output_id in device.outputs})
+
+        # Positions of the switch state or D-type memory in the state
+        number = netlist.device_numbers.get(device.device_id)
+        self.switch_number = None
+        self.dtype_number = None
+        if device.switch_state is not None:
+            self.switch_number = bases[4] + number
+        elif device.dtype_memory is not None:
+            self.dtype_number = bases[1] + number
+
+    @property
+    def switch_state(self):
+        """The state of the switch, or None if the device is not a switch."""
+        if self.switch_number is None:
+            return None
+        return self.instance.state.switch_states[self.switch_number]
+
+    @switch_state.setter
+    def switch_state(self, level):
+        self.instance.state.switch_states[self.switch_number] = level
+
+    @property
+    def dtype_memory(self):
+        """The memory of the D-type, or None if the device is not one."""
+        if self.dtype_number is None:
+            return None
+        return self.instance.state.dtype_memory[self.dtype_number]
+
+    @dtype_memory.setter
+    def dtype_memory(self, level):
+        self.instance.state.dtype_memory[self.dtype_number] = level
+
+
+class InstanceInputs(collections.abc.MutableMapping):
+
+    """Give the connections of the inputs of a device of an instance.
+
+    Inputs connected inside the subcircuit give the output they are
+    connected to, named after the instance, and cannot be changed. Inputs
+    which are ports give, and set, the connection of the instance's port.
+
+    Parameters
+    ----------
+    instance: the Instance holding the device.
+    connections: connections of the inputs, as given by Subcircuit.locate().
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    def __init__(self, instance, connections):
+        """Store the instance and the connections of the inputs."""
+        self.instance = instance
+        self.connections = connections
+
+    def __getitem__(self, input_id):
+        """Return the (device_id, output_id) connected to the input."""
+        connection = self.connections[input_id]
+        if isinstance(connection, int):  # a port of the instance
+            return self.instance.inputs[connection]
+        return self.instance.get_output_id(*connection)
+
+    def __setitem__(self, input_id, connected_output):
+        """Connect the port to the (device_id, output_id) given."""
+        connection = self.connections[input_id]
+        if not isinstance(connection, int):
+            raise ValueError("input is connected inside the subcircuit")
+        self.instance.inputs[connection] = connected_output
+
+    def __delitem__(self, input_id):
+        """Refuse to remove an input."""
+        raise TypeError("inputs of a subcircuit device cannot be removed")
+
+    def __iter__(self):
+        """Iterate over the input IDs."""
+        return iter(self.connections)
+
+    def __len__(self):
+        """Return the number of inputs."""
+        return len(self.connections)
+
+
+class InstanceOutputs(collections.abc.Mapping):
+
+    """Give the signals of the outputs of a device of an instance.
+
+    Parameters
+    ----------
+    instance: the Instance holding the device.
+    slots: dictionary of {output_id: slot} giving the signal slot of each
+           output in the state of the instance.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    def __init__(self, instance, slots):
+        """Store the instance and the signal slots of the outputs."""
+        self.instance = instance
+        self.slots = slots
+
+    def __getitem__(self, output_id):
+        """Return the signal at the output."""
+        return self.instance.state.signals[self.slots[output_id]]
+
+    def __iter__(self):
+        """Iterate over the output IDs."""
+        return iter(self.slots)
+
+    def __len__(self):
+        """Return the number of outputs."""
+        return len(self.slots)
@@ -0,0 +1,156 @@
+"""Simulate a circuit for every combination of its switch states.
+
+Used in the Logic Simulator project to generate truth tables and verify
+designs. The parsed circuit is sent once to each worker process, which then
+simulates the switch assignments it is given and returns the monitored
+signal traces, collected into one table.
+
+Functions
+---------
+get_switch_ids(names, devices): Returns the IDs of the switches in the
+                                circuit definition.
+
+get_assignment(index, switch_count): Returns the switch states of an
+                                     assignment.
+
+get_assignment_indices(switch_count, samples, seed): Returns the assignments
+                                                     to simulate.
+
+run_assignment(devices, network, monitors, switch_ids, index, cycles, seed):
+                                Simulates one assignment and returns its
+                                signal traces.
+
+sweep(names, devices, network, monitors, cycles, samples, seed, max_workers):
+                                Simulates the assignments in a process pool
+                                and returns the table of results.
+
+format_table(names, devices, monitors, table): Returns the table as text.
+"""
+import concurrent.futures
+import os
+import random
+
+# The circuit simulated by this worker process, set by _initialise_worker
+_worker_circuit = None
+
+
+def get_switch_ids(names, devices):
+    """Return the IDs of the switches in the circuit definition.
+
+    The ground switch made by the parser for unconnected D-type inputs has
+    no name, and is left out.
+    """
+    return [switch_id for switch_id in devices.find_devices(devices.SWITCH)
+            if names.get_name_string(switch_id) is not None]
+
+
+def get_assignment(index, switch_count):
+    """Return the list of switch states of assignment number index.
+
+    The first switch is the most significant bit of index, so assignments
+    are numbered in truth table order.
+    """
+    return [(index >> (switch_count - 1 - switch_number)) & 1
+            for switch_number in range(switch_count)]
+
+
+def get_assignment_indices(switch_count, samples=None, seed=None):
+    """Return the numbers of the assignments to simulate, in order.
+
+    Every assignment is simulated unless samples is given, in which case
+    that many distinct assignments are drawn at random.
+    """
+    assignment_count = 2 ** switch_count
+    if samples is None or samples >= assignment_count:
+        return range(assignment_count)
+    return sorted(random.Random(seed).sample(range(assignment_count),
+                                             samples))
+
+
+def run_assignment(devices, network, monitors, switch_ids, index, cycles,
+                   seed=None):
+    """Simulate one switch assignment from a cold start.
+
+    Return a tuple of the monitored signal traces, as bytes in
+    monitors_dictionary order, or None if the network oscillates. If seed is
+    given, the D-types and clocks start in the same state for every
+    assignment.
+    """
+    for switch_id, state in zip(switch_ids,
+                                get_assignment(index, len(switch_ids))):
+        devices.set_switch(switch_id, state)
+    monitors.reset_monitors()
+    devices.cold_startup(seed)
+
+    for _ in range(cycles):
+        if network.execute_network():
+            monitors.record_signals()
+        else:
+            return None
+    monitors.flush_signals()
+    return tuple(bytes(signal_list)
+                 for signal_list in monitors.monitors_dictionary.values())
+
+
+def _initialise_worker(circuit):
+    """Keep the circuit sent to this worker process."""
+    global _worker_circuit
+    _worker_circuit = circuit
+
+
+def _run_worker_assignment(index):
+    """Simulate one assignment with this worker process's circuit."""
+    devices, network, monitors, switch_ids, cycles, seed = _worker_circuit
+    return index, run_assignment(devices, network, monitors, switch_ids,
+                                 index, cycles, seed)
+
+
+def sweep(names, devices, network, monitors, cycles, samples=None, seed=None,
+          max_workers=None):
+    """Simulate switch assignments in a process pool.
+
+    The parsed circuit is sent once to each worker process. Return a
+    (switch_ids, rows) pair, where rows is a list of (assignment, traces)
+    pairs in assignment order, as returned by get_assignment and
+    run_assignment.
+    """
+    switch_ids = get_switch_ids(names, devices)
+    indices = get_assignment_indices(len(switch_ids), samples, seed)
+    circuit = (devices, network, monitors, switch_ids, cycles, seed)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    # Send the assignments in chunks to keep the number of messages low
+    chunk_size = max(1, len(indices) // (4 * max_workers))
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_initialise_worker,
+            initargs=(circuit,)) as executor:
+        results = list(executor.map(_run_worker_assignment, indices,
+                                    chunksize=chunk_size))
+
+    rows = [(get_assignment(index, len(switch_ids)), traces)
+            for index, traces in results]
+    return switch_ids, rows
+
+
+def format_table(names, devices, monitors, table):
+    """Return the table of results as text, one assignment per line."""
+    switch_ids, rows = table
+    switch_names = [names.get_name_string(switch_id)
+                    for switch_id in switch_ids]
+    monitor_names = [devices.get_signal_name(device_id, output_id)
+                     for device_id, output_id in monitors.monitors_dictionary]
+
+    lines = [" ".join(switch_names) + " | " + " ".join(monitor_names)]
+    for assignment, traces in rows:
+        states = " ".join(str(state).rjust(len(name))
+                          for state, name in zip(assignment, switch_names))
+        if traces is None:
+            results = "oscillating"
+        else:
+            results = " ".join(
+                trace.translate(monitors.display_table,
+                                monitors.display_ignored).decode()
+                for trace in traces)
+        lines.append(states + " | " + results)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,24 @@
+"""Test the bench_startup module and the startup of logsim."""
+import bench_startup
+
+
+def test_parse_import_times():
+    """Test if parse_import_times reads the cumulative times."""
+    report = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   names",
+        "import time:        40 |         40 |     collections.abc",
+        "import time:       300 |        460 | logsim"])
+
+    assert bench_startup.parse_import_times(report) == {
+        "names": 120, "collections.abc": 40, "logsim": 460}
+
+
+def test_startup_is_headless():
+    """Test if importing logsim leaves out the GUI dependencies."""
+    import_times = bench_startup.measure_startup()
+
+    assert "logsim" in import_times
+    assert "userint" in import_times
+    for module in bench_startup.GUI_MODULES:
+        assert module not in import_times
@@ -0,0 +1,28 @@
+"""Test the benchmark module."""
+import json
+
+import benchmark
+
+
+def test_run_benchmark():
+    """Test if run_benchmark gives a result for each workload and size."""
+    results = benchmark.run_benchmark(["chain", "counter"], [10, 20],
+                                      cycles=2)
+
+    assert results["cycles"] == 2
+    assert [(result["workload"], result["size"])
+            for result in results["results"]] == [
+        ("chain", 10), ("chain", 20), ("counter", 10), ("counter", 20)]
+    for result in results["results"]:
+        assert result["devices"] >= result["size"]
+        assert result["parse_s"] > 0
+        assert result["memory_bytes"] > 0
+
+
+def test_main_writes_json(tmp_path, capsys):
+    """Test if main saves the results as JSON."""
+    path = tmp_path / "results.json"
+    assert benchmark.main(["-w", "tree", "-s", "20", "-c", "1",
+                           "-o", str(path)]) == 0
+    assert json.loads(path.read_text())["results"][0]["workload"] == "tree"
+    assert benchmark.main(["-w", "spiral"]) == 1
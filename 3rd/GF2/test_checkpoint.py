@@ -0,0 +1,121 @@
+"""Test the checkpoint module."""
+import io
+import json
+import os
+
+import pytest
+
+from benchmark import make_circuit
+from userint import UserInterface
+from checkpoint import Checkpointer
+
+
+def make_userint(directory):
+    """Return a UserInterface for definition_2.txt that saves checkpoints."""
+    names, devices, network, monitors = make_circuit("definition_2.txt")
+    userint = UserInterface(names, devices, network, monitors)
+    userint.checkpointer = Checkpointer(directory, devices, monitors,
+                                        interval=4)
+    return userint
+
+
+def get_traces(userint):
+    """Return {signal name: trace} for the monitors of userint."""
+    return {userint.devices.get_signal_name(*monitor): list(signal_list)
+            for monitor, signal_list
+            in userint.monitors.monitors_dictionary.items()}
+
+
+def test_resume(tmp_path):
+    """Test if a resumed simulation carries on where the checkpoint was."""
+    userint = make_userint(str(tmp_path))
+    userint.batch_interface(io.StringIO("r 6\nz D3.Q\nc 3\n"))
+    traces = get_traces(userint)
+    devices_state = userint.devices.snapshot()
+
+    # Checkpoints after cycles 4 and 6 of the run, and at the end of each
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "segment_0.bin", "segment_0.json", "segment_1.bin", "segment_1.json",
+        "segment_2.bin", "segment_2.json", "state.json"]
+
+    resumed = make_userint(str(tmp_path))
+    assert resumed.checkpointer.resume() == 9
+    assert get_traces(resumed) == traces
+    assert resumed.devices.snapshot() == devices_state
+
+    # The next checkpoint only holds the new cycles
+    resumed.cycles_completed = 9
+    resumed.batch_interface(io.StringIO("c 2\n"))
+    segment_size = os.path.getsize(str(tmp_path / "segment_3.bin"))
+    assert segment_size == 2 * len(traces)
+
+    again = make_userint(str(tmp_path))
+    assert again.checkpointer.resume() == 11
+    assert get_traces(again) == get_traces(resumed)
+
+
+def test_resume_without_checkpoint(tmp_path):
+    """Test if resume returns None when there is no checkpoint."""
+    userint = make_userint(str(tmp_path))
+    assert userint.checkpointer.resume() is None
+
+
+def test_reset_starts_fresh_segments(tmp_path):
+    """Test if a reset drops the old segments from the state and the disk."""
+    userint = make_userint(str(tmp_path))
+    userint.batch_interface(io.StringIO("r 8\n"))
+    # Checkpoints after cycles 4 and 8, and at the end of the run
+    assert os.path.exists(str(tmp_path / "segment_2.bin"))
+
+    userint.batch_interface(io.StringIO("r 3\n"))
+    traces = get_traces(userint)
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "segment_3.bin", "segment_3.json", "state.json"]
+    with open(str(tmp_path / "state.json")) as state_file:
+        state = json.load(state_file)
+    assert (state["first_segment"], state["next_segment"]) == (3, 4)
+
+    resumed = make_userint(str(tmp_path))
+    assert resumed.checkpointer.resume() == 3
+    assert get_traces(resumed) == traces
+
+
+def test_resume_different_circuit(tmp_path):
+    """Test if resume refuses a checkpoint of a different circuit."""
+    userint = make_userint(str(tmp_path))
+    userint.batch_interface(io.StringIO("r 2\n"))
+
+    names, devices, network, monitors = make_circuit("definition_1.txt")
+    checkpointer = Checkpointer(str(tmp_path), devices, monitors)
+    state = devices.snapshot()
+    with pytest.raises(ValueError):
+        checkpointer.resume()
+    assert devices.snapshot() == state
+
+
+def test_crash_before_replacing_checkpoint(tmp_path, monkeypatch):
+    """Test if a crash in a new run's first save keeps the old checkpoint."""
+    userint = make_userint(str(tmp_path))
+    userint.batch_interface(io.StringIO("r 20\n"))
+    traces = get_traces(userint)
+
+    def crash(file_name, data):
+        raise OSError("crashed")
+
+    fresh = make_userint(str(tmp_path))
+    monkeypatch.setattr(fresh.checkpointer, "write_json", crash)
+    with pytest.raises(OSError):
+        fresh.checkpointer.save(2)
+    monkeypatch.undo()
+
+    resumed = make_userint(str(tmp_path))
+    assert resumed.checkpointer.resume() == 20
+    assert get_traces(resumed) == traces
+
+    # Once the new run saves, the old checkpoint's segments are deleted
+    fresh.batch_interface(io.StringIO("r 3\n"))
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "segment_6.bin", "segment_6.json", "state.json"]
+    resumed = make_userint(str(tmp_path))
+    assert resumed.checkpointer.resume() == 3
+    assert get_traces(resumed) == get_traces(fresh)
@@ -115,6 +115,43 @@ def test_make_device_gives_errors(new_devices, function_args, error):
     assert left_expression == right_expression
 
 
+def test_make_devices(new_devices):
+    """Test if make_devices makes each device or gives its error."""
+    names = new_devices.names
+    [AND1_ID, CL_ID, SW_ID] = names.lookup(["And1", "Clock1", "Sw1"])
+
+    errors = new_devices.make_devices([(AND1_ID, new_devices.AND, 2),
+                                       (CL_ID, new_devices.CLOCK, 0),
+                                       (SW_ID, new_devices.SWITCH, 1),
+                                       (AND1_ID, new_devices.OR, 2),
+                                       (CL_ID, new_devices.CLOCK, 3)])
+
+    assert errors == [new_devices.NO_ERROR, new_devices.INVALID_QUALIFIER,
+                      new_devices.NO_ERROR, new_devices.DEVICE_PRESENT,
+                      new_devices.NO_ERROR]
+    assert new_devices.find_devices() == [AND1_ID, SW_ID, CL_ID]
+    assert new_devices.get_device(AND1_ID).device_kind == new_devices.AND
+    assert new_devices.get_device(CL_ID).clock_half_period == 3
+    assert new_devices.make_devices([(SW_ID, new_devices.SWITCH, 0)]) == [
+        new_devices.DEVICE_PRESENT]
+
+
+def test_make_gate_input_ids(new_devices):
+    """Test if gates take their input IDs from gate_input_ids."""
+    names = new_devices.names
+    [AND1_ID, I1_ID, I3_ID] = names.lookup(["And1", "I1", "I3"])
+    name_count = len(names.name_string_list)
+
+    new_devices.make_device(AND1_ID, new_devices.AND, 3)
+
+    assert new_devices.gate_input_ids[3][0] == I1_ID
+    assert new_devices.gate_input_ids[3][2] == I3_ID
+    assert list(new_devices.get_device(AND1_ID).inputs) == \
+        list(new_devices.gate_input_ids[3])
+    # Making the gate adds no names
+    assert len(names.name_string_list) == name_count
+
+
 def test_get_signal_name(devices_with_items):
     """Test if get_signal_name returns the correct signal name."""
     devices = devices_with_items
@@ -148,3 +185,55 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_snapshot_restore(new_devices):
+    """Test if restore returns the devices to the state of the snapshot."""
+    names = new_devices.names
+    [CL_ID, D_ID, SW_ID] = names.lookup(["Clock1", "D1", "Sw1"])
+    new_devices.make_device(CL_ID, new_devices.CLOCK, 3)
+    new_devices.make_device(D_ID, new_devices.D_TYPE)
+    new_devices.make_device(SW_ID, new_devices.SWITCH, 0)
+
+    clock = new_devices.get_device(CL_ID)
+    dtype = new_devices.get_device(D_ID)
+    outputs = dtype.outputs
+    state = new_devices.snapshot()
+    saved = (dict(clock.outputs), clock.clock_counter, dict(dtype.outputs),
+             dtype.dtype_memory)
+
+    # Change every part of the state
+    clock.outputs[None] = new_devices.RISING
+    clock.clock_counter = 2
+    dtype.outputs[new_devices.Q_ID] = new_devices.FALLING
+    dtype.dtype_memory = 1 - dtype.dtype_memory
+    new_devices.set_switch(SW_ID, 1)
+
+    new_devices.restore(state)
+    assert (dict(clock.outputs), clock.clock_counter, dict(dtype.outputs),
+            dtype.dtype_memory) == saved
+    assert new_devices.get_device(SW_ID).switch_state == 0
+    # The outputs dictionaries are updated in place
+    assert dtype.outputs is outputs
+
+
+def test_cold_startup_seed(new_devices):
+    """Test if cold_startup gives the same states for the same seed."""
+    names = new_devices.names
+    device_ids = names.lookup(["Clock{}".format(n) for n in range(20)] +
+                              ["D{}".format(n) for n in range(20)])
+    for device_id in device_ids[:20]:
+        new_devices.make_device(device_id, new_devices.CLOCK, 7)
+    for device_id in device_ids[20:]:
+        new_devices.make_device(device_id, new_devices.D_TYPE)
+
+    # Devices are made in a fixed state
+    assert {new_devices.get_device(device_id).dtype_memory
+            for device_id in device_ids[20:]} == {new_devices.LOW}
+
+    new_devices.cold_startup(seed=3)
+    state = new_devices.snapshot()
+    new_devices.cold_startup(seed=4)
+    assert new_devices.snapshot() != state
+    new_devices.cold_startup(seed=3)
+    assert new_devices.snapshot() == state
@@ -0,0 +1,76 @@
+"""Test the memory module."""
+import sys
+import tracemalloc
+
+from benchmark import make_circuit
+import memory
+
+
+def test_get_deep_size():
+    """Test if shared objects are only counted once."""
+    shared = [1, 2, 3]
+    seen = set()
+    size = memory.get_deep_size([[shared, shared]], seen)
+    assert memory.get_deep_size([shared], seen) == 0
+    assert size > memory.get_deep_size([shared], set())
+
+
+def test_memory_report():
+    """Test if the report counts each subsystem and projects trace growth."""
+    names, devices, network, monitors = make_circuit("definition_2.txt")
+    report = memory.memory_report(names, devices, network, monitors)
+
+    # Three D-types and the clock, and the ground switch
+    assert report.counts["devices"] == 5
+    assert report.counts["monitors"] == 3
+    assert report.counts["cycles"] == 0
+    assert report.traced_bytes is None
+    for subsystem in memory.SUBSYSTEMS:
+        assert report.subsystem_bytes[subsystem] > 0
+    # Eight bytes per cycle for each of the three traces
+    assert report.bytes_per_step == 3 * 8 * memory.CYCLES_PER_STEP
+    assert report.project(memory.CYCLES_PER_STEP) == \
+        sum(report.subsystem_bytes.values()) + report.bytes_per_step
+
+    for _ in range(1000):
+        network.execute_network()
+        monitors.record_signals()
+    grown = memory.memory_report(names, devices, network, monitors)
+    assert grown.counts["cycles"] == 1000
+    assert grown.subsystem_bytes["monitors"] > \
+        report.subsystem_bytes["monitors"] + 3 * 8 * 1000
+    assert grown.bytes_per_step >= report.bytes_per_step
+
+
+def test_memory_report_device_dicts():
+    """Test if each device's __dict__ is charged to the devices alone."""
+    names, devices, network, monitors = make_circuit("definition_2.txt")
+    report = memory.memory_report(names, devices, network, monitors)
+
+    # Walk the names first, as the report does
+    seen = set()
+    memory.get_deep_size([names.name_string_list, names.name_index], seen)
+    walked = memory.get_deep_size(
+        [devices.devices_list, devices.device_map] +
+        [value for device in devices.devices_list
+         for attribute, value in vars(device).items()
+         if attribute != "inputs"], seen)
+    dict_bytes = sum(sys.getsizeof(vars(device))
+                     for device in devices.devices_list)
+    assert report.subsystem_bytes["devices"] == walked + dict_bytes
+    assert report.subsystem_bytes["network"] == memory.get_deep_size(
+        [device.inputs for device in devices.devices_list], seen)
+
+
+def test_memory_report_traced():
+    """Test if allocations are charged to the files of the subsystems."""
+    tracemalloc.start()
+    try:
+        circuit = make_circuit("definition_2.txt")
+        report = memory.memory_report(*circuit)
+    finally:
+        tracemalloc.stop()
+
+    assert report.traced_bytes["devices"] > 0
+    assert report.traced_bytes["parser"] > 0
+    assert "traced bytes" in report.get_report().splitlines()[0]
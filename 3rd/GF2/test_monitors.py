@@ -197,3 +197,179 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_record_signals_follows_monitor_changes(new_monitors):
+    """Test if record_signals only records the current set of monitors."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    LOW = devices.LOW
+    BLANK = devices.BLANK
+    new_monitors.record_signals()
+    new_monitors.remove_monitor(SW2_ID, None)
+    new_monitors.record_signals()
+    new_monitors.make_monitor(SW2_ID, None, 2)
+    new_monitors.record_signals()
+
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, LOW, LOW],
+        (OR1_ID, None): [LOW, LOW, LOW],
+        (SW2_ID, None): [BLANK, BLANK, LOW]}
+
+
+def test_record_signals_in_batches(new_monitors):
+    """Test if batched signals are flushed into the traces."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+    new_monitors.set_batch_size(2)
+    for switch_state in [LOW, HIGH, HIGH]:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    # The first two cycles have been flushed, the third is still batched
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == [LOW, HIGH]
+
+    new_monitors.flush_signals()
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, HIGH, HIGH],
+        (SW2_ID, None): [LOW, LOW, LOW],
+        (OR1_ID, None): [LOW, HIGH, HIGH]}
+
+    with pytest.raises(ValueError):
+        new_monitors.set_batch_size(0)
+
+
+def test_get_summary(new_monitors):
+    """Test if get_summary merges blocks of cycles at each level."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID] = names.lookup(["Sw1"])
+
+    LOW_BIT = 1 << devices.LOW
+    HIGH_BIT = 1 << devices.HIGH
+    for switch_state in [0, 0, 0, 1, 1]:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    assert new_monitors.get_summary(SW1_ID, None, 1) == [
+        LOW_BIT, LOW_BIT | HIGH_BIT, HIGH_BIT]
+    assert new_monitors.get_summary(SW1_ID, None, 2) == [
+        LOW_BIT | HIGH_BIT, HIGH_BIT]
+    assert new_monitors.get_summary(SW1_ID, None, 3) == [LOW_BIT | HIGH_BIT]
+
+    # Appending cycles only updates the trailing blocks
+    for _ in range(3):
+        network.execute_network()
+        new_monitors.record_signals()
+    assert new_monitors.get_summary(SW1_ID, None, 1) == [
+        LOW_BIT, LOW_BIT | HIGH_BIT, HIGH_BIT, HIGH_BIT]
+    assert new_monitors.get_summary(SW1_ID, None, 2) == [
+        LOW_BIT | HIGH_BIT, HIGH_BIT]
+
+    # Levels coarser than the trace give a single block
+    assert new_monitors.get_summary(SW1_ID, None, 10) == [LOW_BIT | HIGH_BIT]
+
+    new_monitors.reset_monitors()
+    assert new_monitors.get_summary(SW1_ID, None, 1) == []
+    assert new_monitors.get_summary(SW1_ID, 3, 1) is None
+
+
+def test_get_summary_length(new_monitors):
+    """Test if get_summary only reads the given length, without flushing."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID] = names.lookup(["Sw1"])
+
+    LOW_BIT = 1 << devices.LOW
+    HIGH_BIT = 1 << devices.HIGH
+    for switch_state in [0, 0, 1, 1]:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+    new_monitors.set_batch_size(4)
+    network.execute_network()
+    new_monitors.record_signals()  # batched, as if by another thread
+
+    assert new_monitors.get_summary(SW1_ID, None, 0, 3) == [
+        LOW_BIT, LOW_BIT, HIGH_BIT]
+    assert new_monitors.get_summary(SW1_ID, None, 1, 3) == [
+        LOW_BIT, HIGH_BIT]
+    assert len(new_monitors.pending_columns) == 1
+
+    # The summary carries on from the cycles already summarised
+    assert new_monitors.get_summary(SW1_ID, None, 1) == [
+        LOW_BIT, HIGH_BIT, HIGH_BIT]
+    assert new_monitors.pending_columns == []
+
+
+def test_display_signals_window(capsys, new_monitors):
+    """Test if display_signals displays only the requested cycles."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID] = names.lookup(["Sw1"])
+
+    for cycle in range(6):
+        devices.set_switch(SW1_ID, cycle % 2)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    new_monitors.display_signals(-2)
+    new_monitors.display_signals(1, 4)
+    out, _ = capsys.readouterr()
+
+    assert out.split("\n") == ["Sw1: _-",
+                               "Sw2: __",
+                               "Or1: _-",
+                               "Sw1: -_-",
+                               "Sw2: ___",
+                               "Or1: -_-",
+                               ""]
+
+
+def test_snapshot_restore(new_monitors):
+    """Test if restore cuts the traces back to the snapshot."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    LOW = devices.LOW
+    HIGH = devices.HIGH
+    BLANK = devices.BLANK
+
+    for _ in range(2):
+        network.execute_network()
+        new_monitors.record_signals()
+    state = new_monitors.snapshot()
+    signal_list = new_monitors.monitors_dictionary[(OR1_ID, None)]
+    new_monitors.get_summary(OR1_ID, None, 1)
+
+    devices.set_switch(SW1_ID, HIGH)
+    for _ in range(2):
+        network.execute_network()
+        new_monitors.record_signals()
+    new_monitors.remove_monitor(SW2_ID, None)
+    new_monitors.make_monitor(SW2_ID, None, 4)
+
+    new_monitors.restore(state)
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] is signal_list
+    assert new_monitors.monitors_dictionary == {(SW1_ID, None): [LOW, LOW],
+                                                (OR1_ID, None): [LOW, LOW],
+                                                (SW2_ID, None): [BLANK, BLANK]}
+
+    # Summaries are rebuilt from the restored traces
+    network.execute_network()
+    new_monitors.record_signals()
+    assert new_monitors.get_summary(OR1_ID, None, 1) == [1 << LOW,
+                                                         1 << HIGH]
@@ -78,3 +78,12 @@ def test_query(used_names, new_names, expected_name_id, string):
     """Test if lookup returns expected index."""
     assert used_names.query(string) == expected_name_id
     assert new_names.query(string) is None
+
+
+def test_split_name(used_names):
+    """Test if names are split after each known name before an underscore."""
+    [alice, alice_bob] = used_names.lookup(["Alice", "Alice_Bob"])
+    assert used_names.split_name("Alice_Bob_Eve") == [(alice, "Bob_Eve"),
+                                                      (alice_bob, "Eve")]
+    assert used_names.split_name("Carol_Eve") == []
+    assert used_names.split_name("Alice") == []
@@ -0,0 +1,55 @@
+"""Test the netgen module."""
+import pytest
+
+import netgen
+from benchmark import make_circuit
+
+
+def make_file(tmp_path, text):
+    """Write text to a definition file and return its path."""
+    path = tmp_path / "definition.txt"
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize("workload", list(netgen.DEVICES_PER_UNIT))
+def test_generate(tmp_path, workload):
+    """Test if every workload parses and settles at the requested size."""
+    circuit = make_circuit(make_file(tmp_path, netgen.generate(workload, 200,
+                                                               seed=1)))
+    assert circuit is not None
+    names, devices, network, monitors = circuit
+
+    assert 190 <= len(devices.devices_list) <= 230
+    assert monitors.monitors_dictionary
+    for _ in range(4):
+        assert network.execute_network()
+
+
+def test_ripple_carry_adder(tmp_path):
+    """Test if the generated adder adds 010 and 111."""
+    circuit = make_circuit(make_file(tmp_path,
+                                     netgen.ripple_carry_adder(3)))
+    names, devices, network, monitors = circuit
+    assert network.execute_network()
+
+    outputs = ["X2_0", "X2_1", "X2_2", "G3_2"]
+    assert [network.get_output_signal(device_id, None)
+            for device_id in names.lookup(outputs)] == [1, 0, 0, 1]
+
+
+def test_odd_ring_oscillates(tmp_path):
+    """Test if a ring of odd length oscillates, and is reported."""
+    circuit = make_circuit(make_file(tmp_path, netgen.ring(3)))
+    names, devices, network, monitors = circuit
+
+    assert not network.execute_network()
+    assert network.oscillating_devices == names.lookup(["R0", "R1", "R2"])
+
+
+def test_main(tmp_path):
+    """Test if main writes a definition file, or rejects bad arguments."""
+    path = str(tmp_path / "chain.txt")
+    assert netgen.main(["chain", "10", path]) == 0
+    assert make_circuit(path) is not None
+    assert netgen.main(["spiral", "10", path]) == 1
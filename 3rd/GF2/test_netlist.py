@@ -0,0 +1,152 @@
+"""Test the netlist module."""
+import threading
+
+import pytest
+
+import netgen
+from names import Names
+from network import Network
+from devices import Devices
+from monitors import Monitors
+from benchmark import make_circuit
+from netlist import Netlist
+
+
+def run_network(network, monitors, cycles):
+    """Run the network, returning its results and traces as bytes."""
+    results = []
+    for _ in range(cycles):
+        results.append(network.execute_network())
+        monitors.record_signals()
+    monitors.flush_signals()
+    return results, [bytes(trace)
+                     for trace in monitors.monitors_dictionary.values()]
+
+
+def run_netlist(netlist, state, cycles):
+    """Run the netlist, returning its results and traces as bytes."""
+    results = []
+    for _ in range(cycles):
+        results.append(netlist.execute_network(state))
+        netlist.record_signals(state)
+    return results, [bytes(trace) for trace in state.traces]
+
+
+@pytest.fixture(params=["definition_1.txt", "definition_2.txt",
+                        "definition_5.txt", "counter", "lfsr", "dag",
+                        "ring"])
+def definition_path(request, tmp_path):
+    """Return the path of a definition file or of a generated workload."""
+    if request.param.endswith(".txt"):
+        return request.param
+    path = tmp_path / "circuit.txt"
+    path.write_text(netgen.generate(request.param, 60, seed=1))
+    return str(path)
+
+
+def test_netlist_matches_network(definition_path):
+    """Test if a netlist simulates exactly as the network it was made from."""
+    names, devices, network, monitors = make_circuit(definition_path)
+    netlist = Netlist(devices, monitors)
+    state = netlist.make_state()
+    assert run_netlist(netlist, state, 50) == run_network(network, monitors,
+                                                          50)
+    for device in devices.devices_list:
+        for output_id, signal in device.outputs.items():
+            assert netlist.get_signal(state, device.device_id,
+                                      output_id) == signal
+
+
+def test_netlist_oscillating():
+    """Test if a netlist finds oscillations after as many iterations."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    monitors.make_monitor(NOR1, None)
+    netlist = Netlist(devices, monitors)
+    state = netlist.make_state()
+
+    assert not netlist.run(state, 3)
+    assert not network.execute_network()
+    assert state.last_iterations == network.last_iterations
+    assert state.cycles_completed == 0
+
+
+def test_make_state_cold_startup(definition_path):
+    """Test if a seeded state starts as Devices.cold_startup() does."""
+    names, devices, network, monitors = make_circuit(definition_path)
+    netlist = Netlist(devices, monitors)
+    state = netlist.make_state(seed=7)
+    devices.cold_startup(seed=7)
+    assert run_netlist(netlist, state, 30) == run_network(network, monitors,
+                                                          30)
+
+
+def test_states_are_independent():
+    """Test if states of one netlist do not affect each other."""
+    names, devices, network, monitors = make_circuit("definition_2.txt")
+    netlist = Netlist(devices, monitors)
+    switch_id = devices.find_devices(devices.SWITCH)[0]
+    level = devices.get_device(switch_id).switch_state
+
+    first = netlist.make_state()
+    second = netlist.make_state()
+    assert netlist.set_switch(second, switch_id, devices.HIGH - level)
+    assert not netlist.set_switch(
+        first, devices.find_devices(devices.D_TYPE)[0], devices.HIGH)
+    netlist.run(first, 10)
+    copy = first.copy()
+    netlist.run(second, 10)
+    assert first.cycles_completed == second.cycles_completed == 10
+    assert first.switch_states != second.switch_states
+    netlist.run(copy, 5)
+    assert len(first.traces[0]) == 10
+    assert len(copy.traces[0]) == 15
+
+    # The devices still hold the state the netlist was made from
+    assert devices.get_device(switch_id).switch_state == level
+
+
+def test_netlist_cannot_be_changed():
+    """Test if the netlist refuses changes and unconnected inputs."""
+    names, devices, network, monitors = make_circuit("definition_1.txt")
+    netlist = Netlist(devices, monitors)
+    with pytest.raises(AttributeError):
+        netlist.gates = ()
+    with pytest.raises(TypeError):
+        netlist.slots[(0, None)] = 0
+
+    names = Names()
+    devices = Devices(names)
+    [AND1] = names.lookup(["And1"])
+    devices.make_device(AND1, devices.AND, 2)
+    with pytest.raises(ValueError):
+        Netlist(devices)
+
+
+def test_concurrent_simulations(tmp_path):
+    """Test if threads sharing one netlist get the results of running alone."""
+    path = tmp_path / "circuit.txt"
+    path.write_text(netgen.generate("counter", 40, seed=3))
+    names, devices, network, monitors = make_circuit(str(path))
+    netlist = Netlist(devices, monitors)
+
+    expected = [run_netlist(netlist, netlist.make_state(seed=seed), 100)
+                for seed in range(8)]
+    results = [None] * 8
+
+    def simulate(seed):
+        results[seed] = run_netlist(netlist, netlist.make_state(seed=seed),
+                                    100)
+
+    threads = [threading.Thread(target=simulate, args=(seed,))
+               for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == expected
@@ -178,6 +178,27 @@ def test_make_connection_gives_error(network_with_devices,
     assert left_expression == right_expression
 
 
+def test_make_connections(network_with_devices):
+    """Test if make_connections makes each connection or gives its error."""
+    network = network_with_devices
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2, X_ID] = names.lookup(
+        ["Sw1", "Sw2", "Or1", "I1", "I2", "X"])
+
+    errors = network.make_connections([(SW1_ID, None, OR1_ID, I1),
+                                       (OR1_ID, I1, SW2_ID, None),
+                                       (SW2_ID, None, SW1_ID, None),
+                                       (X_ID, None, OR1_ID, I2),
+                                       (OR1_ID, I2, SW2_ID, None)])
+
+    assert errors == [network.NO_ERROR, network.INPUT_CONNECTED,
+                      network.OUTPUT_TO_OUTPUT, network.DEVICE_ABSENT,
+                      network.NO_ERROR]
+    assert network.check_network()
+
+
 def test_execute_xor(new_network):
     """Test if execute_network returns the correct output for XOR gates."""
     network = new_network
@@ -348,3 +369,37 @@ def test_oscillating_network(new_network):
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+
+
+def test_oscillating_devices(new_network):
+    """Test if a ring oscillator is found early and reported alone."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, NAND1, NAND2, NAND3, AND1, I1, I2] = names.lookup(
+        ["Sw1", "Nand1", "Nand2", "Nand3", "And1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(NAND1, devices.NAND, 2)
+    devices.make_device(NAND2, devices.NAND, 1)
+    devices.make_device(NAND3, devices.NAND, 1)
+    devices.make_device(AND1, devices.AND, 1)
+
+    # A ring of three inverters, enabled by the switch, driving an AND gate
+    network.make_connection(SW1, None, NAND1, I1)
+    network.make_connection(NAND3, None, NAND1, I2)
+    network.make_connection(NAND1, None, NAND2, I1)
+    network.make_connection(NAND2, None, NAND3, I1)
+    network.make_connection(NAND3, None, AND1, I1)
+
+    assert not network.execute_network()
+    assert network.oscillating_devices == [NAND1, NAND2, NAND3]
+    # The oscillation is found before the 20 iteration limit
+    assert network.last_iterations < 20
+
+    # The report is cleared once the network settles
+    devices.set_switch(SW1, 0)
+    for _ in range(3):
+        network.execute_network()
+    assert network.execute_network()
+    assert network.oscillating_devices == []
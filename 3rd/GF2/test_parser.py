@@ -183,4 +183,39 @@ def test_set_monitors_count_error(parser_with_devices, txt):
     parser_with_devices.scanner.advance()
 
     parser_with_devices.set_monitor()
-    assert parser_with_devices.error_count == 13 #12 erros from floaing inputs in G1, G2, G3, G4, G8
\ No newline at end of file
+    assert parser_with_devices.error_count == 13 #12 erros from floaing inputs in G1, G2, G3, G4, G8
+
+@pytest.mark.parametrize("txt", [('SUBCIRCUIT HALF\nX = XOR;\nCONNECT\nDEVICES\nH1 = HALF;\nH1 = HALF;\nCONNECT\nMONITOR\nEND\n'), ('SUBCIRCUIT HALF\nX = XOR;\nCONNECT\nDEVICES\nHALF = XOR;\nCONNECT\nMONITOR\nEND\n'), ('SUBCIRCUIT AND\nX = XOR;\nCONNECT\nDEVICES\nCONNECT\nMONITOR\nEND\n')])
+#1. same instance name used more than once
+#2. subcircuit name used as a device name
+#3. device type used as a subcircuit name
+
+def test_set_subcircuit_raises_syntaxerror(new_parser, txt):
+    """Test if subcircuit templates and instances raise expected syntax error"""
+    f = open(new_parser.scanner.path, 'w+')
+    f.write(txt)
+    f.close()
+
+    with pytest.raises(SyntaxError):
+        new_parser.parse_network()
+
+
+def test_set_subcircuit_reuses_template_devices(new_parser):
+    """Test if templates do not declare new error codes for each template"""
+    f = open(new_parser.scanner.path, 'w+')
+    f.write('SUBCIRCUIT HALF\nX = XOR;\nCONNECT\n'
+            'SUBCIRCUIT INV\nN = NAND, 1;\nCONNECT\n'
+            'SUBCIRCUIT BUF\nO = OR, 1;\nCONNECT\n'
+            'DEVICES\nH1 = HALF;\nN1 = INV;\nB1 = BUF;\nS1 = SWITCH, 0;\n'
+            'CONNECT\nS1 -> H1_X.I1, H1_X.I2;\nH1_X -> N1_N.I1;\n'
+            'N1_N -> B1_O.I1;\nMONITOR\nB1_O;\nEND\n')
+    f.close()
+
+    error_code_count = new_parser.names.error_code_count
+    assert new_parser.parse_network()
+    # One Devices and one Network for all three templates
+    assert new_parser.names.error_code_count == error_code_count + 12
+    assert len(new_parser.subcircuits) == 3
+    # Instances keep no devices of their own, only S1 and the GND switch
+    assert len(new_parser.devices.devices_list) == 2
+    assert len(new_parser.devices.instances) == 3
@@ -0,0 +1,38 @@
+"""Test the profiler module."""
+from benchmark import make_circuit
+from profiler import Profiler
+
+
+def test_profiler():
+    """Test if the profiler counts calls and iterations only when enabled."""
+    names, devices, network, monitors = make_circuit("definition_1.txt")
+
+    profiler = Profiler(network, monitors)
+    profiler.enable()
+    for _ in range(3):
+        assert network.execute_network()
+        monitors.record_signals()
+    stats = profiler.disable()
+    assert "execute_network" not in vars(network)
+    assert "record_signals" not in vars(monitors)
+
+    # Runs after disabling are not counted
+    network.execute_network()
+
+    assert stats.calls["execute_network"] == 3
+    assert stats.calls["record_signals"] == 3
+    # The clocks are updated once a cycle, and every phase of the netlist is
+    # executed on every iteration
+    iterations = sum(count * cycles
+                     for count, cycles in stats.iteration_counts.items())
+    assert sum(stats.iteration_counts.values()) == 3
+    assert stats.calls["update_clocks"] == 3
+    assert stats.calls["load_state"] == stats.calls["store_state"] == 3
+    assert stats.calls["execute_switches"] == iterations
+    assert stats.calls["execute_gates"] == iterations
+    assert stats.times["execute_network"] > stats.times["execute_gates"]
+    assert "execute_gates" not in vars(network.netlist)
+
+    report = stats.get_report().splitlines()
+    assert report[0].split() == ["method", "calls", "total", "ms", "us/call"]
+    assert report[1].split()[0] == "execute_network"
@@ -0,0 +1,199 @@
+"""Test the server module."""
+import asyncio
+
+import pytest
+
+from server import Session, Run, SimulationServer, SimulationClient
+
+
+@pytest.fixture
+def new_server():
+    """Return a new SimulationServer instance."""
+    return SimulationServer()
+
+
+def test_handle_request(new_server):
+    """Test if a session can load, drive and reset a circuit."""
+    session = Session()
+    assert new_server.handle_request(session, {"op": "run", "cycles": 1}) \
+        == ({"ok": False, "error": "no circuit loaded"}, None)
+
+    response, payload = new_server.handle_request(
+        session, {"op": "load", "path": "definition_1.txt"})
+    assert response["ok"] and not response["cached"]
+    circuit = session.circuit
+
+    requests = [{"op": "monitor", "signal": "X1"},
+                {"op": "switch", "name": "SW1", "state": 0},
+                {"op": "run", "cycles": 3}]
+    for request in requests:
+        assert new_server.handle_request(session, request)[0]["ok"]
+    assert not new_server.handle_request(
+        session, {"op": "monitor", "signal": "X9"})[0]["ok"]
+    assert not new_server.handle_request(
+        session, {"op": "switch", "name": "X1", "state": 0})[0]["ok"]
+
+    # SW1 = 0 and SW2 = SW3 = 1, so the sum X2 is LOW, the carry G3 is HIGH
+    # and X1 is HIGH
+    response, payload = new_server.handle_request(
+        session, {"op": "traces", "start": 1})
+    assert response["signals"] == ["X2", "G3", "X1"]
+    assert response["length"] == 2
+    assert payload == bytes([0, 0, 1, 1, 1, 1])
+
+    # Loading the file again reuses the circuit, back in its initial state
+    response, payload = new_server.handle_request(
+        session, {"op": "load", "path": "definition_1.txt"})
+    assert response["cached"]
+    assert session.circuit is circuit
+    assert list(circuit.monitors.monitors_dictionary.values()) == [[], []]
+    new_server.handle_request(session, {"op": "run", "cycles": 1})
+    assert new_server.handle_request(session, {"op": "traces"})[1] == \
+        bytes([1, 1])
+
+
+def test_sessions_do_not_share(new_server):
+    """Test if two sessions loading one file get their own circuits."""
+    sessions = [Session(), Session()]
+    for session in sessions:
+        new_server.handle_request(session,
+                                  {"op": "load", "path": "definition_1.txt"})
+    assert sessions[0].file_hash == sessions[1].file_hash
+    assert sessions[0].circuit is not sessions[1].circuit
+
+    new_server.release(sessions[0])
+    assert new_server.circuits[sessions[1].file_hash] != []
+
+
+def test_client(new_server, tmp_path):
+    """Test if a client can drive the server over a Unix socket."""
+    address = str(tmp_path / "logsim.sock")
+
+    async def run_client():
+        unix_server = await asyncio.start_unix_server(
+            new_server.handle_client, address)
+        async with unix_server:
+            client = await SimulationClient.connect(address)
+            loaded = await client.request("load", path="definition_2.txt")
+            ran = await client.request("run", cycles=8)
+            traces = await client.get_traces()
+            invalid = await client.request("jump")
+            await client.close()
+        return loaded, ran, traces, invalid
+
+    loaded, ran, traces, invalid = asyncio.run(run_client())
+    assert loaded["ok"]
+    assert ran == {"ok": True, "cycles": 8, "total": 8}
+    assert list(traces) == ["D1.Q", "D2.Q", "D3.Q"]
+    assert all(len(trace) == 8 for trace in traces.values())
+    assert invalid == {"ok": False, "error": "unknown op"}
+
+
+def test_subscribe(new_server, tmp_path):
+    """Test if a subscriber receives each chunk of new samples."""
+    address = str(tmp_path / "logsim.sock")
+
+    async def run_client():
+        unix_server = await asyncio.start_unix_server(
+            new_server.handle_client, address)
+        async with unix_server:
+            client = await SimulationClient.connect(address)
+            await client.request("load", path="definition_2.txt")
+            chunks = [chunk async for chunk in client.subscribe(10, 4)]
+            traces = await client.get_traces()
+            await client.close()
+        return chunks, traces, client.last_response
+
+    chunks, traces, last_response = asyncio.run(run_client())
+    assert [start for start, samples in chunks] == [0, 4, 8]
+    assert last_response == {"ok": True, "done": True, "run": 0, "total": 10}
+    for signal, trace in traces.items():
+        assert b"".join(samples[signal]
+                        for start, samples in chunks) == trace
+
+
+def test_follow(new_server, tmp_path):
+    """Test if a second client can follow a run driven by another."""
+    address = str(tmp_path / "logsim.sock")
+
+    async def drive():
+        driver = await SimulationClient.connect(address)
+        await driver.request("load", path="definition_2.txt")
+        chunks = [chunk async for chunk in driver.subscribe(2000, 1)]
+        await driver.close()
+        return chunks, driver.last_response
+
+    async def follow():
+        follower = await SimulationClient.connect(address)
+        runs = []
+        while not runs:
+            runs = (await follower.request("runs"))["runs"]
+        chunks = [chunk async for chunk in follower.follow(runs[0]["run"])]
+        missing = await follower.request("follow", run=runs[0]["run"])
+        await follower.close()
+        return chunks, follower.last_response, missing
+
+    async def run_clients():
+        unix_server = await asyncio.start_unix_server(
+            new_server.handle_client, address)
+        async with unix_server:
+            return await asyncio.gather(drive(), follow())
+
+    (driven, driver_last), (followed, follower_last, missing) = \
+        asyncio.run(run_clients())
+    assert len(driven) == 2000
+    assert followed  # joined before the run ended
+    # The follower receives every chunk from the one after it joined
+    assert followed == driven[-len(followed):]
+    assert follower_last == driver_last == {"ok": True, "done": True,
+                                            "run": 0, "total": 2000}
+    assert missing == {"ok": False, "error": "no such run"}
+    assert new_server.runs == {}
+
+
+class FakeWriter:
+    """Stand in for a StreamWriter whose drain() may never finish."""
+
+    def __init__(self, slow=False, closing=False):
+        """Record the behaviour of the writer."""
+        self.data = b""
+        self.slow = slow
+        self.closing = closing
+
+    def write(self, data):
+        """Store the data written."""
+        self.data += data
+
+    def is_closing(self):
+        """Return True if the connection is closed."""
+        return self.closing
+
+    async def drain(self):
+        """Wait forever if the writer is slow."""
+        if self.slow:
+            await asyncio.Event().wait()
+
+
+def test_run_drops_slow_and_closed_subscribers():
+    """Test if a broadcast drops slow and closed subscribers and carries on."""
+    fast, slow, closed = FakeWriter(), FakeWriter(slow=True), \
+        FakeWriter(closing=True)
+    run = Run(0, "hash", 10)
+
+    async def broadcast():
+        left = [run.add(writer) for writer in [fast, slow, closed]]
+        await run.broadcast({"start": 0}, b"ab", timeout=0.01)
+        await run.broadcast({"start": 2}, b"cd", timeout=0.01)
+        return left
+
+    left = asyncio.run(broadcast())
+    assert list(run.subscribers) == [fast]
+    assert [event.is_set() for event in left] == [False, True, True]
+    assert fast.data == b'{"start": 0}\nab{"start": 2}\ncd'
+    assert slow.data == (b'{"start": 0}\nab'
+                         b'{"ok": false, "error": "dropped"}\n')
+    assert closed.data == b""
+
+    run.finish({"ok": True, "done": True})
+    assert run.subscribers == {}
+    assert fast.data.endswith(b'{"ok": true, "done": true}\n')
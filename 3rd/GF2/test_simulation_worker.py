@@ -0,0 +1,81 @@
+"""Test the simulation_worker module."""
+import pytest
+
+from names import Names
+from network import Network
+from devices import Devices
+from monitors import Monitors
+from simulation_worker import SimulationWorker
+
+
+@pytest.fixture
+def new_monitors():
+    """Return a Monitors class instance with a monitor on a NAND gate."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, SW2_ID, NAND1_ID, I1, I2] = new_names.lookup(["Sw1", "Sw2",
+                                                          "Nand1", "I1",
+                                                          "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 1)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(NAND1_ID, new_devices.NAND, 2)
+    new_network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    new_network.make_connection(SW2_ID, None, NAND1_ID, I2)
+    new_monitors.make_monitor(NAND1_ID, None)
+    return new_monitors
+
+
+def run_worker(monitors, cycles, cancel=False):
+    """Run a worker in this thread and return the reports it posted."""
+    reports = []
+    worker = SimulationWorker(
+        monitors.network, monitors, cycles,
+        lambda function, *args: function(*args),
+        lambda cycles_completed, trace_lengths: reports.append(
+            (cycles_completed, list(trace_lengths.values()))),
+        lambda *args: reports.append(args), interval=0)
+    if cancel:
+        worker.cancel()
+    worker.start()
+    worker.join()
+    return worker, reports
+
+
+def test_run_completes(new_monitors):
+    """Test if the worker records every cycle and reports its progress."""
+    worker, reports = run_worker(new_monitors, 5)
+    [NAND1_ID] = new_monitors.names.lookup(["Nand1"])
+    HIGH = new_monitors.devices.HIGH
+
+    assert new_monitors.monitors_dictionary[(NAND1_ID, None)] == [HIGH] * 5
+    # Each report gives the trace lengths when it was made
+    assert reports == [(1, [1]), (2, [2]), (3, [3]), (4, [4]), (5, [5]),
+                       (5, worker.COMPLETED)]
+
+
+def test_cancelled_run(new_monitors):
+    """Test if a cancelled run stops with the monitors consistent."""
+    worker, reports = run_worker(new_monitors, 5, cancel=True)
+    [NAND1_ID] = new_monitors.names.lookup(["Nand1"])
+
+    assert new_monitors.monitors_dictionary[(NAND1_ID, None)] == []
+    assert reports == [(0, worker.CANCELLED)]
+
+
+def test_oscillating_run(new_monitors):
+    """Test if the worker stops when the network oscillates."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [NAND1_ID, I1, I2] = names.lookup(["Nand1", "I1", "I2"])
+
+    # Feed the NAND gate its own output, so it never settles
+    devices.get_device(NAND1_ID).inputs = {I1: None, I2: None}
+    network.make_connection(NAND1_ID, None, NAND1_ID, I1)
+    network.make_connection(NAND1_ID, None, NAND1_ID, I2)
+
+    worker, reports = run_worker(new_monitors, 5)
+    assert reports == [(0, worker.OSCILLATING)]
@@ -0,0 +1,50 @@
+"""Test the streaming module."""
+import asyncio
+
+from names import Names
+from network import Network
+from devices import Devices
+from monitors import Monitors
+from benchmark import make_circuit
+from streaming import stream_signals
+
+
+def test_stream_signals():
+    """Test if chunks hold each new sample once and only run on demand."""
+    names, devices, network, monitors = make_circuit("definition_2.txt")
+    traces = list(monitors.monitors_dictionary.values())
+
+    async def take_chunks():
+        chunks = []
+        stream = stream_signals(network, monitors, 10, chunk_cycles=4)
+        async for chunk in stream:
+            # The next chunk has not been run yet
+            assert len(traces[0]) == chunk[0] + chunk[1]
+            chunks.append(chunk)
+        return chunks
+
+    chunks = asyncio.run(take_chunks())
+    assert [(start, length) for start, length, samples, oscillating
+            in chunks] == [(0, 4), (4, 4), (8, 2)]
+    assert not any(oscillating for start, length, samples, oscillating
+                   in chunks)
+    for number, trace in enumerate(traces):
+        assert b"".join(samples[number] for start, length, samples,
+                        oscillating in chunks) == bytes(trace)
+
+
+def test_stream_signals_oscillating():
+    """Test if the stream ends with a last chunk if the network oscillates."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    monitors.make_monitor(NOR1, None)
+
+    async def take_chunks():
+        return [chunk async for chunk in stream_signals(network, monitors, 5)]
+
+    assert asyncio.run(take_chunks()) == [(0, 0, [b""], True)]
@@ -0,0 +1,132 @@
+"""Test the subcircuit module."""
+import pytest
+
+from names import Names
+from network import Network
+from devices import Devices
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from subcircuit import Subcircuit
+
+
+@pytest.fixture
+def half_adder():
+    """Return names and a Subcircuit of a half adder listed out of order."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [G1, X1, I1, HALF] = names.lookup(["G1", "X1", "I1", "HALF"])
+    devices.make_devices([(G1, devices.AND, 2), (X1, devices.XOR)])
+    network.make_connection(X1, None, G1, I1)
+    return names, Subcircuit(names, devices, HALF)
+
+
+def test_subcircuit_structure(half_adder):
+    """Test if the template is levelised and its free inputs are ports."""
+    names, subcircuit = half_adder
+    [G1, X1, I1, I2] = names.lookup(["G1", "X1", "I1", "I2"])
+
+    assert [device.device_id
+            for device in subcircuit.devices_list] == [X1, G1]
+    assert subcircuit.netlist.ports == ((X1, I1), (X1, I2), (G1, I2))
+    assert len(subcircuit.netlist.gates) == 2
+
+
+def test_instantiate(half_adder):
+    """Test if instances share the template and hold only their state."""
+    names, subcircuit = half_adder
+    devices = Devices(names)
+    network = Network(names, devices)
+    [H1, H2, I1, I2, SW] = names.lookup(["H1", "H2", "I1", "I2", "SW"])
+
+    assert subcircuit.instantiate(devices, H1) == devices.NO_ERROR
+    assert subcircuit.instantiate(devices, H2) == devices.NO_ERROR
+    assert subcircuit.instantiate(devices, H1) == devices.DEVICE_PRESENT
+    assert devices.devices_list == []
+    first, second = devices.instances
+    assert first.subcircuit is second.subcircuit is subcircuit
+    assert first.state.signals is not second.state.signals
+    assert first.inputs == [None, None, None]
+
+    # The devices of an instance are views named after it
+    [H1_X1, H1_G1, H2_G1] = names.lookup(["H1_X1", "H1_G1", "H2_G1"])
+    assert devices.get_device(H1_G1).device_kind == devices.AND
+    assert network.get_connected_output(H1_G1, I1) == (H1_X1, None)
+    assert network.get_connected_output(H2_G1, I2) is None
+    assert devices.get_device(names.lookup(["H1_G2"])[0]) is None
+
+    # Ports are connected on the instance, and internal connections are kept
+    devices.make_switch(SW, devices.HIGH)
+    assert network.make_connection(SW, None, H1_G1, I2) == network.NO_ERROR
+    assert first.inputs == [None, None, (SW, None)]
+    assert network.make_connection(SW, None, H1_G1,
+                                   I1) == network.INPUT_CONNECTED
+    assert not network.check_network()
+
+
+def test_nested_subcircuits(tmp_path):
+    """Test if a subcircuit made of instances of another one adds."""
+    path = tmp_path / "nested.txt"
+    path.write_text("SUBCIRCUIT HALF\nX = XOR;\nA = AND, 2;\nCONNECT\n"
+                    "SUBCIRCUIT FULL\nH1 = HALF;\nH2 = HALF;\nO = OR, 2;\n"
+                    "CONNECT\nH1_X -> H2_X.I1, H2_A.I1;\nH1_A -> O.I1;\n"
+                    "H2_A -> O.I2;\n"
+                    "DEVICES\nF = FULL;\nSA = SWITCH, 1;\nSB = SWITCH, 1;\n"
+                    "SC = SWITCH, 1;\nCONNECT\nSA -> F_H1_X.I1, F_H1_A.I1;\n"
+                    "SB -> F_H1_X.I2, F_H1_A.I2;\n"
+                    "SC -> F_H2_X.I2, F_H2_A.I2;\n"
+                    "MONITOR\nF_H2_X;\nF_O;\nEND\n")
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(str(path), names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+    scanner.f.close()
+
+    # 1 + 1 + 1 is 11
+    for _ in range(2):
+        assert network.execute_network()
+        monitors.record_signals()
+    assert list(monitors.monitors_dictionary.values()) == [
+        [devices.HIGH] * 2, [devices.HIGH] * 2]
+    [SC, F_H2_A, I2] = names.lookup(["SC", "F_H2_A", "I2"])
+    assert network.get_connected_output(F_H2_A, I2) == (SC, None)
+
+
+def test_instance_oscillating():
+    """Test if an instance of a subcircuit with a loop is found oscillating."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [N, I1, RING, R1] = names.lookup(["N", "I1", "RING", "R1"])
+    devices.make_device(N, devices.NAND, 1)
+    network.make_connection(N, None, N, I1)
+    subcircuit = Subcircuit(names, devices, RING)
+
+    devices = Devices(names)
+    network = Network(names, devices)
+    assert subcircuit.instantiate(devices, R1) == devices.NO_ERROR
+    assert subcircuit.netlist.feedback
+    assert not network.execute_network()
+    assert network.oscillating_devices == [R1]
+
+
+def test_ripple_carry_adder():
+    """Test if the adder in definition_5.txt, made of subcircuits, adds."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner("definition_5.txt", names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+
+    # 01 + 11 with no carry in is 100
+    assert network.execute_network()
+    [FA0_X2, FA1_X2, FA1_G3] = names.lookup(["FA0_X2", "FA1_X2", "FA1_G3"])
+    assert network.get_output_signal(FA0_X2, None) == devices.LOW
+    assert network.get_output_signal(FA1_X2, None) == devices.LOW
+    assert network.get_output_signal(FA1_G3, None) == devices.HIGH
@@ -0,0 +1,47 @@
+"""Test the sweep module."""
+import pytest
+
+from benchmark import make_circuit
+import sweep
+
+
+@pytest.fixture
+def full_adder():
+    """Return the parsed full adder in definition_1.txt."""
+    return make_circuit("definition_1.txt")
+
+
+def test_get_assignment():
+    """Test if assignments are numbered in truth table order."""
+    assert sweep.get_assignment(0, 3) == [0, 0, 0]
+    assert sweep.get_assignment(1, 3) == [0, 0, 1]
+    assert sweep.get_assignment(6, 3) == [1, 1, 0]
+
+
+def test_get_assignment_indices():
+    """Test if a sample has the requested number of distinct assignments."""
+    assert list(sweep.get_assignment_indices(2)) == [0, 1, 2, 3]
+    sample = sweep.get_assignment_indices(10, samples=5, seed=1)
+    assert len(set(sample)) == 5
+    assert sample == sorted(sample)
+    assert sample == sweep.get_assignment_indices(10, samples=5, seed=1)
+
+
+def test_sweep(full_adder):
+    """Test if the sweep gives the truth table of the full adder."""
+    names, devices, network, monitors = full_adder
+    table = sweep.sweep(names, devices, network, monitors, 2, max_workers=2)
+    switch_ids, rows = table
+
+    assert [names.get_name_string(switch_id)
+            for switch_id in switch_ids] == ["SW1", "SW2", "SW3"]
+    assert len(rows) == 8
+    for assignment, traces in rows:
+        total = sum(assignment)
+        # X2 is the sum bit and G3 the carry bit
+        assert traces == (bytes([total % 2] * 2), bytes([total // 2] * 2))
+
+    text = sweep.format_table(names, devices, monitors, table)
+    lines = text.splitlines()
+    assert lines[0] == "SW1 SW2 SW3 | X2 G3"
+    assert lines[4] == "  0   1   1 | __ --"
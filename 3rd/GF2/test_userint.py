@@ -0,0 +1,99 @@
+"""Test the userint module."""
+import io
+
+import pytest
+
+from names import Names
+from network import Network
+from devices import Devices
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from userint import UserInterface
+
+
+@pytest.fixture
+def new_userint():
+    """Return a UserInterface instance with a switch driving an AND gate."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, SW2_ID, AND1_ID, I1, I2] = new_names.lookup(["Sw1", "Sw2",
+                                                         "And1", "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 1)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 1)
+    new_devices.make_device(AND1_ID, new_devices.AND, 2)
+    new_network.make_connection(SW1_ID, None, AND1_ID, I1)
+    new_network.make_connection(SW2_ID, None, AND1_ID, I2)
+    new_monitors.make_monitor(AND1_ID, None)
+
+    return UserInterface(new_names, new_devices, new_network, new_monitors)
+
+
+def test_batch_interface(new_userint, capsys):
+    """Test if batch_interface runs a script and displays only on request."""
+    script = io.StringIO("\n".join([
+        "# run, then drop switch 1 and carry on",
+        "r 2",
+        "",
+        "s Sw1 0",
+        "c 2",
+        "d",
+        "d 1",
+        "q",
+        "r 5"]))
+
+    new_userint.batch_interface(script)
+    output = capsys.readouterr().out.splitlines()
+
+    assert output == ["Running for 2 cycles",
+                      "Successfully set switch.",
+                      "Continuing for 2 cycles. Total: 4",
+                      "And1: --__",
+                      "And1: _"]
+    assert new_userint.cycles_completed == 4
+
+
+def test_batch_interface_invalid_command(new_userint, capsys):
+    """Test if batch_interface reports an invalid command and carries on."""
+    new_userint.batch_interface(io.StringIO("x\nr 1\n"))
+    output = capsys.readouterr().out.splitlines()
+
+    assert output == ["Invalid command. Enter 'h' for help.",
+                      "Running for 1 cycles"]
+
+
+def test_snapshot_restore(new_userint, capsys):
+    """Test if scenarios can be branched from one snapshot."""
+    new_userint.batch_interface(io.StringIO("r 2\n"))
+    state = new_userint.snapshot()
+
+    new_userint.batch_interface(io.StringIO("s Sw1 0\nc 2\n"))
+    new_userint.restore(state)
+    assert new_userint.cycles_completed == 2
+
+    new_userint.batch_interface(io.StringIO("c 2\nd\n"))
+    output = capsys.readouterr().out.splitlines()
+    assert output[-1] == "And1: ----"
+
+
+def test_monitor_instance_signal(capsys):
+    """Test if a device made by a subcircuit instance can be monitored."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner("definition_5.txt", names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+    scanner.f.close()
+    capsys.readouterr()
+
+    userint = UserInterface(names, devices, network, monitors)
+    userint.batch_interface(io.StringIO("m FA0_X1\nr 2\nd\n"))
+    output = capsys.readouterr().out.splitlines()
+
+    assert "Successfully made monitor." in output
+    assert "FA0_X1: __" in output  # A0 and B0 are both 1
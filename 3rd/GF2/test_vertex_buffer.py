@@ -0,0 +1,39 @@
+"""Test the vertex_buffer module."""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("OpenGL")
+
+from vertex_buffer import VertexBuffer
+
+
+def test_append_grows_capacity():
+    """Test if append doubles the capacity and keeps earlier vertices."""
+    buffer = VertexBuffer(2, capacity=4)
+    buffer.append([[0, 0], [1, 1], [2, 2]])
+    buffer.append([[3, 3], [4, 4]])
+
+    assert buffer.length == 5
+    assert len(buffer.data) == 8
+    assert buffer.data[:5].tolist() == [[0, 0], [1, 1], [2, 2], [3, 3],
+                                        [4, 4]]
+
+    # A large append grows the capacity by as many doublings as it needs
+    buffer.append(np.zeros((20, 2)))
+    assert buffer.length == 25
+    assert len(buffer.data) == 32
+
+
+def test_clear():
+    """Test if clear empties the array but keeps its storage."""
+    buffer = VertexBuffer(3, capacity=2)
+    buffer.append(np.ones((5, 3)))
+    buffer.uploaded = 5
+    buffer.clear()
+
+    assert buffer.length == 0
+    assert buffer.uploaded == 0
+    assert len(buffer.data) == 8
+
+    buffer.append([[1, 2, 3]])
+    assert buffer.data[:buffer.length].tolist() == [[1, 2, 3]]
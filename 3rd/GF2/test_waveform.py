@@ -0,0 +1,119 @@
+"""Test the waveform module."""
+import pytest
+
+from names import Names
+from devices import Devices
+
+np = pytest.importorskip("numpy")
+waveform = pytest.importorskip("waveform")
+
+
+@pytest.fixture
+def new_devices():
+    """Return a new instance of the Devices class."""
+    new_names = Names()
+    return Devices(new_names)
+
+
+def test_trace_vertices_2d(new_devices):
+    """Test if trace_vertices_2d gives two vertices per cycle."""
+    devices = new_devices
+    signal_list = [devices.LOW, devices.HIGH, devices.FALLING, devices.BLANK]
+
+    vertices, colours = waveform.trace_vertices_2d(signal_list, devices,
+                                                   50, 100, 25, 10)
+
+    assert vertices.tolist() == [[50, 100], [75, 100],
+                                 [75, 110], [100, 110],
+                                 [100, 110], [125, 100],
+                                 [125, 100], [150, 100]]
+    assert colours[:6].tolist() == [list(waveform.TRACE_COLOUR)] * 6
+    assert colours[6:].tolist() == [list(waveform.BLANK_COLOUR)] * 2
+
+
+def test_trace_vertices_2d_empty(new_devices):
+    """Test if trace_vertices_2d copes with an empty trace."""
+    vertices, colours = waveform.trace_vertices_2d([], new_devices,
+                                                   50, 100, 25, 10)
+    assert vertices.shape == (0, 2)
+    assert colours.shape == (0, 3)
+
+
+def test_summary_vertices_2d(new_devices):
+    """Test if summary_vertices_2d draws levels, bands and edges."""
+    devices = new_devices
+    low_bit = 1 << devices.LOW
+    high_bit = 1 << devices.HIGH
+    blank_bit = 1 << devices.BLANK
+    summary = [blank_bit, low_bit, low_bit | high_bit, high_bit]
+
+    vertices, block_starts = waveform.summary_vertices_2d(summary, devices,
+                                                          0, 0, 4, 10)
+    segments = {tuple(map(tuple, pair))
+                for pair in vertices.reshape(-1, 2, 2).tolist()}
+
+    assert segments == {
+        ((4, 0), (8, 0)),  # LOW block
+        ((8, 0), (12, 0)), ((8, 10), (12, 10)),  # transition band
+        ((12, 10), (16, 10)),  # HIGH block
+        ((8, 0), (8, 10)), ((12, 0), (12, 10))}  # edges between blocks
+
+    # Vertices are ordered by block
+    assert block_starts.tolist() == [0, 0, 2, 8, 12]
+    assert vertices[8:12].tolist() == [[12, 10], [16, 10], [12, 0], [12, 10]]
+
+
+def test_trace_mesh_3d(new_devices):
+    """Test if trace_mesh_3d places one block per non-blank cycle."""
+    devices = new_devices
+    signal_list = [devices.HIGH, devices.BLANK, devices.LOW, devices.RISING]
+
+    mesh = waveform.trace_mesh_3d(signal_list, devices, 0, 40, 20, 40, 10, 5)
+
+    # 24 vertices per block, BLANK is left out
+    assert mesh.shape == (72, 6)
+    blocks = mesh.reshape(3, 24, 6)
+
+    # The HIGH cuboid spans x = -10..10, y = 40..61 and z = -5..5
+    high = blocks[0, :, 3:]
+    assert high.min(axis=0).tolist() == [-10, 40, -5]
+    assert high.max(axis=0).tolist() == [10, 61, 5]
+
+    # The LOW cuboid is two cycles along and only one unit high
+    low = blocks[1, :, 3:]
+    assert low.min(axis=0).tolist() == [30, 40, -5]
+    assert low.max(axis=0).tolist() == [50, 41, 5]
+
+    # The first face of the RISING prism is the slope
+    assert blocks[2, 0, :3].tolist() == [-1, 1, 0]
+    assert blocks[2, 0, 3:].tolist() == [70, 61, -5]
+
+    # Every normal is a unit axis or a sloped face, never missing
+    normals = blocks[:2, :, :3]
+    assert (np.abs(normals).sum(axis=2) == 1).all()
+
+
+@pytest.mark.parametrize("pan, zoom, expected_range", [
+    (0, 1, (0, 3)),  # the screen shows scene coordinates 0 to 100
+    (-100, 1, (3, 7)),  # scene coordinates 100 to 200
+    (-100, 2, (1, 3)),  # scene coordinates 50 to 100
+    (500, 1, (0, 0)),  # the items are left of the screen
+    (-5000, 1, (10, 10)),  # the items are right of the screen
+])
+def test_visible_range(pan, zoom, expected_range):
+    """Test if visible_range returns the items that are on screen."""
+    # Ten items of width 25 starting at scene coordinate 25
+    assert waveform.visible_range(pan, zoom, 100, 25, 25, 10) == \
+        expected_range
+
+
+@pytest.mark.parametrize("step_size, expected_stride", [
+    (25, 1),
+    (10, 2),
+    (5, 5),
+    (2.4, 10),
+    (0.01, 2000),
+])
+def test_label_stride(step_size, expected_stride):
+    """Test if label_stride spaces labels at least 20 units apart."""
+    assert waveform.label_stride(step_size, 20) == expected_stride
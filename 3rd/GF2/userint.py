@@ -1,7 +1,8 @@
 """Implement the interactive command line user interface.
 
 Used in the Logic Simulator project to enable the user to enter commands
-to run the simulation or adjust the network properties.
+to run the simulation or adjust the network properties, either one at a
+time or from a command script.
 
 Classes:
 --------
@@ -30,6 +31,11 @@ class UserInterface:
     command_interface(self): Reads in the commands and calls the corresponding
                              functions.
 
+    batch_interface(self, command_file): Runs the commands in a command
+                                         script without prompting.
+
+    execute_command(self, command): Calls the function for the command.
+
     get_line(self): Prints a prompt for the user and updates the user entry.
 
     read_command(self): Returns the first non-whitespace character.
@@ -64,6 +70,16 @@ class UserInterface:
     run_command(self): Runs the simulation from scratch.
 
     continue_command(self): Continues a previously run simulation.
+
+    display_command(self): Displays the signals recorded by the monitors.
+
+    save_checkpoint(self, cycles_completed): Saves a checkpoint, if
+                                             checkpoints are enabled.
+
+    snapshot(self): Returns the state of the simulation.
+
+    restore(self, state): Returns the simulation to a state returned by
+                          snapshot().
     """
 
     def __init__(self, names, devices, network, monitors):
@@ -74,6 +90,8 @@ class UserInterface:
         self.network = network
 
         self.cycles_completed = 0  # number of simulation cycles completed
+        self.display_after_run = True  # display the signals after each run
+        self.checkpointer = None  # checkpoint.Checkpointer(), if enabled
 
         self.character = ""  # current character
         self.line = ""  # current string entered by the user
@@ -86,23 +104,48 @@ class UserInterface:
         self.get_line()  # get the user entry
         command = self.read_command()  # read the first character
         while command != "q":
-            if command == "h":
-                self.help_command()
-            elif command == "s":
-                self.switch_command()
-            elif command == "m":
-                self.monitor_command()
-            elif command == "z":
-                self.zap_command()
-            elif command == "r":
-                self.run_command()
-            elif command == "c":
-                self.continue_command()
-            else:
-                print("Invalid command. Enter 'h' for help.")
+            self.execute_command(command)
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
 
+    def batch_interface(self, command_file):
+        """Run the commands in a command script without prompting.
+
+        command_file is an open file, such as sys.stdin, with one command per
+        line. Blank lines and lines starting with '#' are skipped, and the
+        script ends at a 'q' command or the end of the file. The signals are
+        only displayed when a 'd' command asks for them.
+        """
+        self.display_after_run = False
+        for line in command_file:
+            self.line = line.rstrip("\n")
+            self.cursor = 0
+            command = self.read_command()  # read the first character
+            if command == "" or command == "#":
+                continue
+            if command == "q":
+                break
+            self.execute_command(command)
+
+    def execute_command(self, command):
+        """Call the function for the command."""
+        if command == "h":
+            self.help_command()
+        elif command == "s":
+            self.switch_command()
+        elif command == "m":
+            self.monitor_command()
+        elif command == "z":
+            self.zap_command()
+        elif command == "r":
+            self.run_command()
+        elif command == "c":
+            self.continue_command()
+        elif command == "d":
+            self.display_command()
+        else:
+            print("Invalid command. Enter 'h' for help.")
+
     def get_line(self):
         """Print prompt for the user and update the user entry."""
         self.cursor = 0
@@ -130,13 +173,14 @@ class UserInterface:
             self.get_character()
 
     def read_string(self):
-        """Return the next alphanumeric string."""
+        """Return the next name string of letters, digits and underscores."""
         self.skip_spaces()
         name_string = ""
         if not self.character.isalpha():  # the string must start with a letter
             print("Error! Expected a name.")
             return None
-        while self.character.isalnum():
+        # Underscores join instance and device names, as in FA0_X1
+        while self.character.isalnum() or self.character == "_":
             name_string = "".join([name_string, self.character])
             self.get_character()
         return name_string
@@ -207,6 +251,7 @@ class UserInterface:
         print("s X N     - set switch X to N (0 or 1)")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("d [N]     - display the monitored signals (the last N cycles)")
         print("h         - help (this command)")
         print("q         - quit the program")
 
@@ -248,13 +293,24 @@ class UserInterface:
 
         Return True if successful.
         """
-        for _ in range(cycles):
+        for cycle in range(1, cycles + 1):
             if self.network.execute_network():
                 self.monitors.record_signals()
             else:
+                self.monitors.flush_signals()
                 print("Error! Network oscillating.")
+                if self.network.oscillating_devices:
+                    print("Oscillating devices: " + ", ".join(
+                        self.names.get_name_string(device_id)
+                        for device_id in self.network.oscillating_devices))
                 return False
-        self.monitors.display_signals()
+            if (self.checkpointer is not None and
+                    cycle % self.checkpointer.interval == 0):
+                self.save_checkpoint(self.cycles_completed + cycle)
+        self.monitors.flush_signals()
+        self.save_checkpoint(self.cycles_completed + cycles)
+        if self.display_after_run:
+            self.monitors.display_signals()
         return True
 
     def run_command(self):
@@ -279,3 +335,37 @@ class UserInterface:
                 self.cycles_completed += cycles
                 print(" ".join(["Continuing for", str(cycles), "cycles.",
                                 "Total:", str(self.cycles_completed)]))
+
+    def display_command(self):
+        """Display the signals recorded by the monitors.
+
+        If a number N follows the command, only the last N cycles are
+        displayed.
+        """
+        if self.line[self.cursor:].strip():
+            cycles = self.read_number(1, None)
+            if cycles is not None:
+                self.monitors.display_signals(-cycles)
+        else:
+            self.monitors.display_signals()
+
+    def save_checkpoint(self, cycles_completed):
+        """Save a checkpoint to disk, if checkpoints are enabled."""
+        if self.checkpointer is not None:
+            self.checkpointer.save(cycles_completed)
+
+    def snapshot(self):
+        """Return the state of the simulation.
+
+        The state is made of compact copies of the device states and monitor
+        trace lengths, and the number of cycles completed, so it is cheap to
+        take and can be restored many times.
+        """
+        return (self.devices.snapshot(), self.monitors.snapshot(),
+                self.cycles_completed)
+
+    def restore(self, state):
+        """Return the simulation to a state returned by snapshot()."""
+        [devices_state, monitors_state, self.cycles_completed] = state
+        self.devices.restore(devices_state)
+        self.monitors.restore(monitors_state)
@@ -0,0 +1,100 @@
+"""Keep a growing vertex array in an OpenGL buffer object.
+
+Used in the Logic Simulator project by the GUI canvases, which append the
+geometry of newly simulated cycles to each trace instead of rebuilding and
+re-sending the whole trace every time the simulation is continued.
+
+Classes
+-------
+VertexBuffer - a vertex array that is grown by appending to it.
+"""
+import numpy as np
+from OpenGL import GL
+
+
+class VertexBuffer:
+
+    """Keep a growing vertex array in an OpenGL buffer object.
+
+    This class holds a copy of the vertex array in memory, with room to
+    grow, and mirrors it in a buffer object. The capacity is doubled when
+    it runs out, so appending costs time proportional to the appended
+    vertices, and only the vertices appended since the last upload are
+    sent to the graphics card.
+
+    Parameters
+    ----------
+    width: number of floats in each vertex.
+    capacity: number of vertices to make room for at first.
+
+    Public methods
+    --------------
+    append(self, rows): Appends vertices to the end of the array.
+
+    clear(self): Empties the array, keeping its storage for reuse.
+
+    upload(self): Sends the vertices appended since the last upload to the
+                  buffer object, and returns the buffer object.
+
+    delete(self): Frees the buffer object.
+    """
+
+    def __init__(self, width, capacity=256):
+        """Initialise an empty vertex array."""
+        self.width = width
+        self.data = np.empty((capacity, width), dtype=np.float32)
+        self.length = 0
+
+        # Number of vertices already in the buffer object, and its capacity
+        self.uploaded = 0
+        self.buffer = None
+        self.buffer_capacity = 0
+
+    def append(self, rows):
+        """Append vertices to the end of the array."""
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, self.width)
+        end = self.length + len(rows)
+        if end > len(self.data):
+            capacity = len(self.data)
+            while capacity < end:
+                capacity *= 2
+            data = np.empty((capacity, self.width), dtype=np.float32)
+            data[:self.length] = self.data[:self.length]
+            self.data = data
+        self.data[self.length:end] = rows
+        self.length = end
+
+    def clear(self):
+        """Empty the array, keeping its storage for reuse."""
+        self.length = 0
+        self.uploaded = 0
+
+    def upload(self):
+        """Send the new vertices to the buffer object and return it.
+
+        The whole array is sent when the buffer object is first made or has
+        to grow; otherwise only the vertices appended since the last upload
+        are sent. The buffer object is left bound to GL_ARRAY_BUFFER.
+        """
+        if self.buffer is None:
+            self.buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffer)
+        if self.buffer_capacity != len(self.data):
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, self.data.nbytes, self.data,
+                            GL.GL_DYNAMIC_DRAW)
+            self.buffer_capacity = len(self.data)
+        elif self.uploaded < self.length:
+            new_rows = self.data[self.uploaded:self.length]
+            GL.glBufferSubData(GL.GL_ARRAY_BUFFER,
+                               self.uploaded * self.data.itemsize * self.width,
+                               new_rows.nbytes, new_rows)
+        self.uploaded = self.length
+        return self.buffer
+
+    def delete(self):
+        """Free the buffer object."""
+        if self.buffer is not None:
+            GL.glDeleteBuffers(1, [self.buffer])
+            self.buffer = None
+            self.buffer_capacity = 0
+        self.uploaded = 0
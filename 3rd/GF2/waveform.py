@@ -0,0 +1,202 @@
+"""Build vertex arrays for drawing signal traces.
+
+Used in the Logic Simulator project by the GUI canvases, which draw each
+signal trace from one vertex array instead of issuing one OpenGL call per
+vertex. The arrays are built in scene coordinates, so panning and zooming
+only change the modelview matrix and never require the arrays to be rebuilt.
+
+Functions
+---------
+trace_vertices_2d(signal_list, devices, x_start, y_origin, x_step_size,
+                  y_step_size): Returns the line strip vertices and colours
+                                of a signal trace.
+
+summary_vertices_2d(summary, devices, x_start, y_origin, block_width,
+                    y_step_size): Returns the line vertices of a trace
+                                  summary and where each block starts.
+
+trace_mesh_3d(signal_list, devices, x_start, y_origin, x_step_size,
+              y_step_size, half_width, half_depth): Returns the interleaved
+                                normals and vertices of a 3D signal trace.
+
+visible_range(pan, zoom, screen_size, start, step_size, count): Returns the
+                                range of rows or cycles that are on screen.
+
+label_stride(step_size, min_spacing): Returns how many cycles apart cycle
+                                      labels must be to not overlap.
+"""
+import math
+
+import numpy as np
+
+TRACE_COLOUR = (0.0, 1.0, 0.0)  # signal traces are green
+BLANK_COLOUR = (0.0, 0.0, 0.0)  # blank cycles are drawn in the background
+
+# Quad faces of the 3D trace blocks, as rows of (normal, corners), where each
+# corner is (x, y, z) in units of (half width, height, half depth) relative to
+# the bottom centre of the block.
+CUBOID_FACES = [
+    ((0, -1, 0), [(-1, 0, -1), (1, 0, -1), (1, 0, 1), (-1, 0, 1)]),
+    ((0, 1, 0), [(1, 1, -1), (-1, 1, -1), (-1, 1, 1), (1, 1, 1)]),
+    ((-1, 0, 0), [(-1, 1, -1), (-1, 0, -1), (-1, 0, 1), (-1, 1, 1)]),
+    ((1, 0, 0), [(1, 0, -1), (1, 1, -1), (1, 1, 1), (1, 0, 1)]),
+    ((0, 0, -1), [(-1, 0, -1), (-1, 1, -1), (1, 1, -1), (1, 0, -1)]),
+    ((0, 0, 1), [(-1, 1, 1), (-1, 0, 1), (1, 0, 1), (1, 1, 1)])]
+PRISM_SIDES = [
+    ((0, -1, 0), [(-1, 0, -1), (1, 0, -1), (1, 0, 1), (-1, 0, 1)]),
+    ((-1, 0, 0), [(-1, 1, -1), (-1, 0, -1), (-1, 0, 1), (-1, 1, 1)]),
+    ((0, 0, -1), [(-1, 0, -1), (-1, 1, -1), (1, 1, -1), (1, 0, -1)]),
+    ((0, 0, 1), [(-1, 1, 1), (-1, 0, 1), (1, 0, 1), (1, 1, 1)])]
+RISING_PRISM_FACES = [
+    ((-1, 1, 0), [(1, 1, -1), (-1, 0, -1), (-1, 0, 1), (1, 1, 1)])
+    ] + PRISM_SIDES
+FALLING_PRISM_FACES = [
+    ((1, 1, 0), [(1, 0, -1), (-1, 1, -1), (-1, 1, 1), (1, 0, 1)])
+    ] + PRISM_SIDES
+
+
+def trace_vertices_2d(signal_list, devices, x_start, y_origin, x_step_size,
+                      y_step_size):
+    """Return the line strip vertices and colours of a signal trace.
+
+    Each cycle contributes two vertices, at the start and end of the cycle,
+    so consecutive cycles at different levels are joined by a vertical edge.
+    RISING and FALLING cycles are drawn as a ramp across the cycle. Return a
+    (vertices, colours) pair of float32 arrays of shapes (2n, 2) and (2n, 3).
+    """
+    signals = np.asarray(signal_list, dtype=np.int8)
+    count = len(signals)
+    y_high = y_origin + y_step_size
+
+    x = x_start + x_step_size * np.arange(count + 1, dtype=np.float32)
+    starts_high = (signals == devices.HIGH) | (signals == devices.FALLING)
+    ends_high = (signals == devices.HIGH) | (signals == devices.RISING)
+
+    vertices = np.empty((2 * count, 2), dtype=np.float32)
+    vertices[0::2, 0] = x[:-1]
+    vertices[1::2, 0] = x[1:]
+    vertices[0::2, 1] = np.where(starts_high, y_high, y_origin)
+    vertices[1::2, 1] = np.where(ends_high, y_high, y_origin)
+
+    colours = np.empty((2 * count, 3), dtype=np.float32)
+    colours[:] = TRACE_COLOUR
+    colours[np.repeat(signals == devices.BLANK, 2)] = BLANK_COLOUR
+    return vertices, colours
+
+
+def summary_vertices_2d(summary, devices, x_start, y_origin, block_width,
+                        y_step_size):
+    """Return the line vertices of a trace summary.
+
+    summary is a list of signal bit masks, one per block, as returned by
+    Monitors.get_summary(). Blocks holding a single level are drawn as a
+    line at that level, blocks holding a transition as a band between LOW
+    and HIGH, and neighbouring blocks at different levels are joined by an
+    edge. Return a (vertices, block_starts) pair, where vertices is a float32
+    array of shape (2m, 2) for drawing as GL_LINES, ordered by block, and
+    the vertices of block n are vertices[block_starts[n]:block_starts[n+1]].
+    """
+    masks = np.asarray(summary, dtype=np.int64)
+    low_bit = 1 << devices.LOW
+    high_bit = 1 << devices.HIGH
+    signals = masks & ~(1 << devices.BLANK)
+    y_high = y_origin + y_step_size
+
+    x = x_start + block_width * np.arange(len(masks), dtype=np.float32)
+    previous = np.concatenate(([0], signals[:-1]))
+
+    # Each block has up to three segments: LOW line, HIGH line and edge
+    present = np.empty((len(masks), 3), dtype=bool)
+    present[:, 0] = (signals != 0) & (signals != high_bit)
+    present[:, 1] = (signals != 0) & (signals != low_bit)
+    present[:, 2] = (signals != 0) & (previous != 0) & (signals != previous)
+
+    segments = np.empty((len(masks), 3, 2, 2), dtype=np.float32)
+    segments[:, :2, 0, 0] = x[:, None]
+    segments[:, :2, 1, 0] = x[:, None] + block_width
+    segments[:, 0, :, 1] = y_origin
+    segments[:, 1, :, 1] = y_high
+    segments[:, 2, :, 0] = x[:, None]
+    segments[:, 2, 0, 1] = y_origin
+    segments[:, 2, 1, 1] = y_high
+
+    block_starts = np.zeros(len(masks) + 1, dtype=np.int64)
+    np.cumsum(2 * present.sum(axis=1), out=block_starts[1:])
+    return segments[present].reshape(-1, 2), block_starts
+
+
+def face_template(faces):
+    """Return the (24, 6) array of normals and corners of a block's faces.
+
+    Blocks with fewer than six faces are padded with a zero-area quad, so
+    that every block has the same number of vertices.
+    """
+    template = np.zeros((24, 6), dtype=np.float32)
+    for face_number, (normal, corners) in enumerate(faces):
+        for corner_number, corner in enumerate(corners):
+            template[4 * face_number + corner_number] = normal + corner
+    return template
+
+
+def trace_mesh_3d(signal_list, devices, x_start, y_origin, x_step_size,
+                  y_step_size, half_width, half_depth):
+    """Return the interleaved normals and vertices of a 3D signal trace.
+
+    Each cycle is drawn as a block centred on x_start + n * x_step_size: a
+    tall cuboid for HIGH, a flat cuboid for LOW and a prism for RISING and
+    FALLING. BLANK cycles are left out. Return a float32 array of shape
+    (24m, 6) for drawing as GL_QUADS in the GL_N3F_V3F format.
+    """
+    signals = np.asarray(signal_list, dtype=np.int8)
+    templates = np.zeros((len(devices.signal_types), 24, 6), dtype=np.float32)
+    templates[devices.HIGH] = face_template(CUBOID_FACES)
+    templates[devices.LOW] = face_template(CUBOID_FACES)
+    templates[devices.RISING] = face_template(RISING_PRISM_FACES)
+    templates[devices.FALLING] = face_template(FALLING_PRISM_FACES)
+    heights = np.full(len(devices.signal_types), y_step_size / 2 + 1,
+                      dtype=np.float32)
+    heights[devices.LOW] = 1
+
+    drawn = np.flatnonzero(signals != devices.BLANK)
+    blocks = templates[signals[drawn]]
+    x = x_start + x_step_size * drawn.astype(np.float32)
+
+    mesh = np.empty((len(drawn), 24, 6), dtype=np.float32)
+    mesh[:, :, :3] = blocks[:, :, :3]
+    mesh[:, :, 3] = x[:, None] + half_width * blocks[:, :, 3]
+    mesh[:, :, 4] = (y_origin +
+                     heights[signals[drawn]][:, None] * blocks[:, :, 4])
+    mesh[:, :, 5] = half_depth * blocks[:, :, 5]
+    return mesh.reshape(-1, 6)
+
+
+def visible_range(pan, zoom, screen_size, start, step_size, count):
+    """Return the range of rows or cycles that are on screen.
+
+    Item n covers scene coordinates start + n * step_size to
+    start + (n + 1) * step_size along one axis, and the scene is drawn on
+    screen at pan + zoom * scene coordinate. Return a (first, stop) pair
+    such that items first to stop - 1 are at least partly on screen.
+    """
+    scene_min = -pan / zoom
+    scene_max = (screen_size - pan) / zoom
+    first = math.floor((scene_min - start) / step_size)
+    stop = math.ceil((scene_max - start) / step_size)
+    first = min(max(first, 0), count)
+    stop = min(max(stop, first), count)
+    return first, stop
+
+
+def label_stride(step_size, min_spacing):
+    """Return how many cycles apart cycle labels must be to not overlap.
+
+    step_size is the width of a cycle on screen and min_spacing the space a
+    label needs. The stride is the smallest of 1, 2, 5, 10, 20, 50, ... that
+    leaves at least min_spacing between labels.
+    """
+    stride = 1
+    while True:
+        for multiple in (1, 2, 5):
+            if stride * multiple * step_size >= min_spacing:
+                return stride * multiple
+        stride *= 10